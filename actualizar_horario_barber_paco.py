@@ -10,7 +10,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'saasBarber.settings')
 django.setup()
 
-from core.models import Business
+from core.models import Business, schedule_day_intervals
 
 def actualizar_horario():
     """Actualiza el horario de cierre a las 20:00 para todos los días."""
@@ -24,15 +24,17 @@ def actualizar_horario():
         dias_semana = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
         
         for dia in dias_semana:
-            if dia in schedule_config:
-                # Mantener la hora de apertura y enabled, solo cambiar close
+            if dia in schedule_config and schedule_config[dia].get('intervals'):
+                # Mantener los tramos y enabled, solo cambiar el cierre del último tramo
+                schedule_config[dia]['intervals'][-1]['close'] = '20:00'
+            elif dia in schedule_config and 'intervals' not in schedule_config[dia]:
+                # Formato anterior (un solo par open/close)
                 schedule_config[dia]['close'] = '20:00'
             else:
                 # Si no existe, crear con horario estándar
                 schedule_config[dia] = {
-                    'open': '09:00',
-                    'close': '20:00',
-                    'enabled': True if dia not in ['saturday', 'sunday'] else (True if dia == 'saturday' else False)
+                    'enabled': True if dia not in ['saturday', 'sunday'] else (True if dia == 'saturday' else False),
+                    'intervals': [{'open': '09:00', 'close': '20:00'}],
                 }
         
         # Guardar cambios
@@ -56,9 +58,9 @@ def actualizar_horario():
             'sunday': 'Domingo',
         }
         for dia_key, dia_nombre in dias_nombres.items():
-            dia_config = schedule_config.get(dia_key, {})
-            if dia_config.get('enabled', False):
-                print(f"  {dia_nombre}: {dia_config.get('open', 'N/A')} - {dia_config.get('close', 'N/A')}")
+            tramos = schedule_day_intervals(schedule_config.get(dia_key))
+            if tramos:
+                print(f"  {dia_nombre}: {', '.join(f'{apertura} - {cierre}' for apertura, cierre in tramos)}")
             else:
                 print(f"  {dia_nombre}: Cerrado")
         print("=" * 60)
@@ -1,8 +1,23 @@
+import os
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.paginator import Paginator
+from django.core.exceptions import PermissionDenied
+from django.db.models import QuerySet
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.functional import cached_property
 from django.utils.html import format_html
 from django import forms
-from .models import CustomUser, Business, Service, Appointment, GalleryImage
+from .models import (
+    CustomUser, Business, Service, Appointment, GalleryImage,
+    WebhookEndpoint, WebhookEvent, WebhookDeadLetter, MediaBlob, ArchivedAppointment,
+    RequestProfile, ScheduleException, schedule_day_intervals,
+)
+from .db import estimate_row_count
+from .exports import appointment_rows, export_response
 
 
 @admin.register(CustomUser)
@@ -28,6 +43,17 @@ class CustomUserAdmin(BaseUserAdmin):
     )
 
 
+class ScheduleExceptionInline(admin.TabularInline):
+    """Festivos y horarios especiales del negocio."""
+    model = ScheduleException
+    fields = ['start_date', 'end_date', 'is_closed', 'intervals', 'reason']
+    extra = 0
+    
+    def get_queryset(self, request):
+        # Solo las vigentes: las pasadas se consultan en su propio admin
+        return super().get_queryset(request).filter(end_date__gte=timezone.localdate())
+
+
 @admin.register(Business)
 class BusinessAdmin(admin.ModelAdmin):
     """Admin para Business."""
@@ -36,6 +62,7 @@ class BusinessAdmin(admin.ModelAdmin):
     search_fields = ['name', 'slug', 'owner__email']
     prepopulated_fields = {'slug': ('name',)}
     readonly_fields = ['created_at', 'updated_at', 'schedule_display']
+    inlines = [ScheduleExceptionInline]
     
     fieldsets = (
         ('Información Básica', {
@@ -74,18 +101,20 @@ class BusinessAdmin(admin.ModelAdmin):
             'fields': ('schedule_config', 'schedule_display'),
             'description': format_html(
                 '<p><strong>Configura los horarios de atención por día de la semana.</strong></p>'
-                '<p>Formato JSON (copia y pega este ejemplo y modifica según necesites):</p>'
+                '<p>Formato JSON (copia y pega este ejemplo y modifica según necesites). Cada día puede '
+                'tener varios tramos de apertura, por ejemplo para cerrar a la hora de comida:</p>'
                 '<pre style="background: #f5f5f5; padding: 10px; border-radius: 4px; font-size: 12px;">'
                 '{{\n'
-                '  "monday": {{"open": "09:00", "close": "20:00", "enabled": true}},\n'
-                '  "tuesday": {{"open": "09:00", "close": "20:00", "enabled": true}},\n'
-                '  "wednesday": {{"open": "09:00", "close": "20:00", "enabled": true}},\n'
-                '  "thursday": {{"open": "09:00", "close": "20:00", "enabled": true}},\n'
-                '  "friday": {{"open": "09:00", "close": "20:00", "enabled": true}},\n'
-                '  "saturday": {{"open": "09:00", "close": "20:00", "enabled": true}},\n'
-                '  "sunday": {{"open": "09:00", "close": "20:00", "enabled": false}}\n'
+                '  "monday": {{"enabled": true, "intervals": [{{"open": "09:00", "close": "14:00"}}, {{"open": "15:00", "close": "20:00"}}]}},\n'
+                '  "tuesday": {{"enabled": true, "intervals": [{{"open": "09:00", "close": "14:00"}}, {{"open": "15:00", "close": "20:00"}}]}},\n'
+                '  "wednesday": {{"enabled": true, "intervals": [{{"open": "09:00", "close": "14:00"}}, {{"open": "15:00", "close": "20:00"}}]}},\n'
+                '  "thursday": {{"enabled": true, "intervals": [{{"open": "09:00", "close": "14:00"}}, {{"open": "15:00", "close": "20:00"}}]}},\n'
+                '  "friday": {{"enabled": true, "intervals": [{{"open": "09:00", "close": "20:00"}}]}},\n'
+                '  "saturday": {{"enabled": true, "intervals": [{{"open": "09:00", "close": "14:00"}}]}},\n'
+                '  "sunday": {{"enabled": false, "intervals": []}}\n'
                 '}}'
                 '</pre>'
+                '<p>Los días festivos y horarios especiales se agregan abajo, en Excepciones de Horario.</p>'
             )
         }),
         ('Fechas', {
@@ -111,9 +140,10 @@ class BusinessAdmin(admin.ModelAdmin):
         
         html = "<ul style='list-style: none; padding: 0;'>"
         for day_key, day_name in days.items():
-            day_config = obj.schedule_config.get(day_key, {})
-            if day_config.get('enabled', False):
-                html += f"<li><strong>{day_name}:</strong> {day_config.get('open', 'N/A')} - {day_config.get('close', 'N/A')}</li>"
+            intervals = schedule_day_intervals(obj.schedule_config.get(day_key))
+            if intervals:
+                hours = ', '.join(f"{open_time} - {close_time}" for open_time, close_time in intervals)
+                html += f"<li><strong>{day_name}:</strong> {hours}</li>"
             else:
                 html += f"<li><strong>{day_name}:</strong> <span style='color: #999;'>Cerrado</span></li>"
         html += "</ul>"
@@ -122,6 +152,44 @@ class BusinessAdmin(admin.ModelAdmin):
     schedule_display.short_description = 'Vista Previa de Horarios'
 
 
+@admin.register(ScheduleException)
+class ScheduleExceptionAdmin(admin.ModelAdmin):
+    """Admin para ScheduleException."""
+    list_display = ['business', 'start_date', 'end_date', 'is_closed', 'intervals_display', 'reason']
+    list_filter = ['is_closed', 'start_date']
+    search_fields = ['business__name', 'business__slug', 'reason']
+    list_select_related = ['business']
+    date_hierarchy = 'start_date'
+    readonly_fields = ['created_at', 'updated_at']
+    
+    fieldsets = (
+        (None, {
+            'fields': ('business', 'start_date', 'end_date', 'reason')
+        }),
+        ('Horario', {
+            'fields': ('is_closed', 'intervals'),
+            'description': format_html(
+                '<p>Marca <strong>Cerrado</strong> para festivos o vacaciones. Para un horario especial '
+                'desmárcalo e indica los tramos de apertura (hora local del negocio), por ejemplo:</p>'
+                '<pre style="background: #f5f5f5; padding: 10px; border-radius: 4px; font-size: 12px;">'
+                '[{{"open": "10:00", "close": "14:00"}}]'
+                '</pre>'
+            )
+        }),
+        ('Fechas', {
+            'fields': ('created_at', 'updated_at'),
+            'classes': ('collapse',)
+        }),
+    )
+    
+    def intervals_display(self, obj):
+        if obj.is_closed:
+            return 'Cerrado'
+        return ', '.join(f'{open_time} - {close_time}' for open_time, close_time in obj.get_intervals())
+    
+    intervals_display.short_description = 'Horario'
+
+
 @admin.register(Service)
 class ServiceAdmin(admin.ModelAdmin):
     """Admin para Service."""
@@ -153,14 +221,226 @@ class GalleryImageAdmin(admin.ModelAdmin):
     ordering = ['business', 'order', '-created_at']
 
 
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    """Admin de solo lectura para MediaBlob."""
+    list_display = ['name', 'size', 'ref_count', 'created_at']
+    search_fields = ['digest', 'name']
+    readonly_fields = ['digest', 'name', 'size', 'ref_count', 'created_at']
+
+
+@admin.register(ArchivedAppointment)
+class ArchivedAppointmentAdmin(admin.ModelAdmin):
+    """Admin de solo lectura para las citas archivadas."""
+    list_display = ['original_id', 'business', 'client', 'service_name', 'start_time', 'status', 'archived_at']
+    list_filter = ['status', 'is_block']
+    list_select_related = ['business', 'client']
+    search_fields = ['business__slug', 'client__email', 'service_name']
+    date_hierarchy = 'start_time'
+    show_full_result_count = False
+    actions = ['export_csv', 'export_jsonl_gzip']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.action(description='Exportar seleccionadas (CSV)')
+    def export_csv(self, request, queryset):
+        return export_response(appointment_rows(queryset, archived=True), 'citas-archivadas', 'csv')
+
+    @admin.action(description='Exportar seleccionadas (JSONL comprimido)')
+    def export_jsonl_gzip(self, request, queryset):
+        return export_response(appointment_rows(queryset, archived=True), 'citas-archivadas', 'jsonl', compress=True)
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Perfiles de peticiones capturados con ?_profile=1 (solo lectura)."""
+    list_display = ['created_at', 'method', 'path', 'view_name', 'business_slug', 'status_code',
+                    'duration_ms', 'query_count', 'db_ms', 'user']
+    list_filter = ['view_name', 'status_code']
+    list_select_related = ['user']
+    search_fields = ['path', 'business_slug', 'view_name']
+    date_hierarchy = 'created_at'
+    readonly_fields = ['user', 'method', 'path', 'view_name', 'business_slug', 'status_code',
+                       'duration_ms', 'query_count', 'db_ms', 'pstats_download', 'collapsed_download',
+                       'created_at', 'top_functions']
+    exclude = ['pstats_file', 'collapsed_file']
+    # Tipo de descarga -> campo (los archivos están en un storage privado, sin URL)
+    download_fields = {'pstats': 'pstats_file', 'collapsed': 'collapsed_file'}
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        # admin_view exige una sesión de staff activa
+        return [
+            path(
+                '<int:object_id>/descargar/<str:kind>/',
+                self.admin_site.admin_view(self.download_view),
+                name='core_requestprofile_download',
+            ),
+        ] + super().get_urls()
+
+    def download_view(self, request, object_id, kind):
+        """Entrega el volcado del perfil como adjunto (solo staff con permiso de ver perfiles)."""
+        field_name = self.download_fields.get(kind)
+        if field_name is None:
+            raise Http404
+        profile = get_object_or_404(RequestProfile, pk=object_id)
+        if not self.has_view_permission(request, profile):
+            raise PermissionDenied
+        file = getattr(profile, field_name)
+        if not file:
+            raise Http404
+        return FileResponse(file.open('rb'), as_attachment=True, filename=os.path.basename(file.name))
+
+    def _download_link(self, obj, kind):
+        if not getattr(obj, self.download_fields[kind]):
+            return '-'
+        url = reverse('admin:core_requestprofile_download', args=[obj.pk, kind])
+        return format_html('<a href="{}">Descargar</a>', url)
+
+    def pstats_download(self, obj):
+        return self._download_link(obj, 'pstats')
+    pstats_download.short_description = 'Volcado pstats'
+
+    def collapsed_download(self, obj):
+        return self._download_link(obj, 'collapsed')
+    collapsed_download.short_description = 'Pilas (collapsed)'
+
+    def top_functions(self, obj):
+        """Funciones con más tiempo acumulado según el volcado de cProfile."""
+        from .profiling import format_top_functions
+        if not obj.pstats_file:
+            return '-'
+        try:
+            return format_html('<pre style="font-size:11px">{}</pre>', format_top_functions(obj))
+        except Exception as e:
+            return f'No se pudo leer el perfil: {str(e)}'
+    top_functions.short_description = 'Funciones más costosas'
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginador que, sin filtros, usa el número estimado de filas de la tabla
+    en lugar de COUNT(*) (que recorre la tabla completa). Con filtros o
+    búsqueda, el conteo es exacto porque se limita a las filas que coinciden.
+    """
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            estimate = estimate_row_count(queryset.model, using=queryset.db)
+            if estimate and estimate > self.exact_count_threshold:
+                return estimate
+        return super().count
+
+
+class InputFilter(admin.SimpleListFilter):
+    """
+    Filtro con un campo de texto en lugar de la lista de opciones, para
+    relaciones con miles de valores (no carga la tabla relacionada).
+    """
+    template = 'admin/core/input_filter.html'
+    placeholder = ''
+
+    def lookups(self, request, model_admin):
+        # Una opción ficticia para que el admin muestre el filtro
+        return (('', ''),)
+
+    def choices(self, changelist):
+        all_choice = next(super().choices(changelist))
+        # Conservar los demás filtros y la búsqueda al enviar el formulario
+        all_choice['query_parts'] = [
+            (name, value)
+            for name, values in self.request.GET.lists()
+            if name not in (self.parameter_name, 'p')
+            for value in values
+        ]
+        yield all_choice
+
+
+class BusinessSlugFilter(InputFilter):
+    title = 'negocio (slug)'
+    parameter_name = 'negocio'
+    placeholder = 'barber-paco'
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(business__slug=self.value().strip())
+        return queryset
+
+
+class ClientEmailFilter(InputFilter):
+    title = 'cliente (email)'
+    parameter_name = 'cliente'
+    placeholder = 'cliente@ejemplo.com'
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(client__email=self.value().strip())
+        return queryset
+
+
 @admin.register(Appointment)
 class AppointmentAdmin(admin.ModelAdmin):
-    """Admin para Appointment."""
-    list_display = ['__str__', 'business', 'client', 'service', 'start_time', 'end_time', 'status', 'is_block', 'created_at']
-    list_filter = ['status', 'is_block', 'business', 'start_time', 'created_at']
-    search_fields = ['business__name', 'client__email', 'service__name', 'notes']
+    """
+    Admin para Appointment, pensado para tablas con millones de filas:
+    relaciones en la misma consulta, filtros de texto y autocompletado en lugar
+    de listas completas, jerarquía de fechas sin DISTINCT (ver
+    change_list.html) y conteo estimado sin filtros.
+    """
+    list_display = [
+        'id', 'business', 'client', 'service_name', 'start_time', 'end_time', 'status', 'is_block', 'created_at',
+    ]
+    list_display_links = ['id']
+    list_select_related = ['business', 'client', 'service']
+    list_filter = ['status', 'is_block', BusinessSlugFilter, ClientEmailFilter]
+    search_fields = ['=id', '=client__email', '=business__slug']
+    search_help_text = 'Búsqueda exacta por ID de cita, email del cliente o slug del negocio.'
+    autocomplete_fields = ['business', 'client', 'service']
     readonly_fields = ['created_at', 'updated_at']
     date_hierarchy = 'start_time'
+    # Orden total que coincide con el índice (start_time, id)
+    ordering = ['-start_time', '-id']
+    paginator = EstimatedCountPaginator
+    actions = ['export_csv', 'export_csv_gzip', 'export_jsonl_gzip']
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    
+    def get_search_results(self, request, queryset, search_term):
+        # Una sola búsqueda exacta por índice según el formato del término,
+        # en lugar del OR de iexact (LIKE/UPPER) sobre varias tablas del admin
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        if term.isdigit():
+            return queryset.filter(id=int(term)), False
+        if '@' in term:
+            return queryset.filter(client__email=term), False
+        return queryset.filter(business__slug=term), False
+    
+    @admin.action(description='Exportar seleccionadas (CSV)')
+    def export_csv(self, request, queryset):
+        return export_response(appointment_rows(queryset), 'citas', 'csv')
+    
+    @admin.action(description='Exportar seleccionadas (CSV comprimido)')
+    def export_csv_gzip(self, request, queryset):
+        return export_response(appointment_rows(queryset), 'citas', 'csv', compress=True)
+    
+    @admin.action(description='Exportar seleccionadas (JSONL comprimido)')
+    def export_jsonl_gzip(self, request, queryset):
+        return export_response(appointment_rows(queryset), 'citas', 'jsonl', compress=True)
+    
+    @admin.display(description='Servicio', ordering='service__name')
+    def service_name(self, obj):
+        # str(service) incluye el nombre del negocio: una consulta más por fila
+        return obj.service.name if obj.service else '—'
     
     fieldsets = (
         ('Información de la Cita', {
@@ -178,3 +458,59 @@ class AppointmentAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(WebhookEndpoint)
+class WebhookEndpointAdmin(admin.ModelAdmin):
+    """Admin para WebhookEndpoint."""
+    list_display = ['business', 'url', 'is_active', 'created_at']
+    list_filter = ['is_active', 'created_at']
+    search_fields = ['business__name', 'url']
+    list_select_related = ['business']
+    readonly_fields = ['created_at', 'updated_at']
+    
+    fieldsets = (
+        ('Destino', {
+            'fields': ('business', 'url', 'is_active')
+        }),
+        ('Eventos y Firma', {
+            'fields': ('events', 'secret'),
+            'description': format_html(
+                '<p>Eventos disponibles: appointment.created, appointment.confirmed, '
+                'appointment.completed, appointment.cancelled, appointment.no_show.</p>'
+                '<p>Cada petición incluye la cabecera <code>X-SaasBarber-Signature</code> '
+                '(HMAC-SHA256 de <code>timestamp.body</code>).</p>'
+            )
+        }),
+        ('Fechas', {
+            'fields': ('created_at', 'updated_at'),
+            'classes': ('collapse',)
+        }),
+    )
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    """Admin para WebhookEvent (cola de salida)."""
+    list_display = ['id', 'event_type', 'endpoint', 'status', 'attempts', 'next_attempt_at', 'created_at']
+    list_filter = ['status', 'event_type']
+    list_select_related = ['endpoint__business']
+    readonly_fields = ['endpoint', 'event_type', 'payload', 'status', 'attempts', 'next_attempt_at',
+                       'last_error', 'created_at', 'delivered_at']
+
+
+@admin.register(WebhookDeadLetter)
+class WebhookDeadLetterAdmin(admin.ModelAdmin):
+    """Admin para WebhookDeadLetter."""
+    list_display = ['id', 'event_type', 'endpoint', 'attempts', 'last_error', 'created_at']
+    list_filter = ['event_type', 'created_at']
+    list_select_related = ['endpoint__business']
+    readonly_fields = ['endpoint', 'event_type', 'payload', 'attempts', 'last_error',
+                       'event_created_at', 'created_at']
+    actions = ['requeue']
+    
+    @admin.action(description='Reintentar entrega de los eventos seleccionados')
+    def requeue(self, request, queryset):
+        from .webhooks import requeue_dead_letters
+        count = requeue_dead_letters(queryset)
+        self.message_user(request, f'{count} eventos reencolados.')
@@ -0,0 +1,3 @@
+"""
+API REST versionada (/api/v1/) sobre Django REST Framework.
+"""
@@ -0,0 +1,36 @@
+"""
+Paginación por cursor de la API.
+
+A diferencia de LIMIT/OFFSET, cada página parte de la posición codificada en
+el cursor (WHERE start_time < ... ORDER BY start_time, id LIMIT n): el costo
+por página no crece con la profundidad del historial y las páginas no se
+desplazan cuando se insertan citas nuevas.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class StartTimeCursorPagination(CursorPagination):
+    """
+    Citas ordenadas por (start_time, id), usa el índice appt_start_time_id
+    (o el de (business, start_time) al filtrar por negocio). Por defecto de la
+    más reciente a la más antigua; ?orden=asc para el orden cronológico.
+    """
+    ordering = ('-start_time', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    direction_query_param = 'orden'
+
+    def get_ordering(self, request, queryset, view):
+        # Los enlaces next/previous conservan ?orden=, así el cursor se lee en su mismo orden
+        if request.query_params.get(self.direction_query_param) == 'asc':
+            return ('start_time', 'id')
+        return self.ordering
+
+
+class IdCursorPagination(CursorPagination):
+    """Catálogos (negocios, servicios): orden estable por id."""
+    ordering = ('id',)
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
@@ -0,0 +1,87 @@
+"""
+Serializers de la API v1.
+
+Todos aceptan `fields` (lista de campos de primer nivel): la vista lo toma de
+?fields=id,start_time,service y el serializer descarta el resto, de modo que
+la app móvil recibe solo lo que pide y la vista no carga relaciones que no se
+van a serializar.
+"""
+from rest_framework import serializers
+from core.models import Appointment, Business, Service
+from core.services import AppointmentStatusService
+
+
+class SparseFieldsMixin:
+    """Limita los campos serializados a `fields` (None = todos)."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class ServiceSummarySerializer(serializers.ModelSerializer):
+    """Servicio anidado dentro de un negocio o una cita."""
+
+    class Meta:
+        model = Service
+        fields = ['id', 'name', 'duration_minutes', 'price']
+
+
+class ClientSummarySerializer(serializers.Serializer):
+    """Datos de contacto del cliente de una cita."""
+    id = serializers.IntegerField()
+    first_name = serializers.CharField()
+    last_name = serializers.CharField()
+    email = serializers.EmailField()
+    phone = serializers.CharField(allow_null=True)
+
+
+class BusinessSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    # Servicios activos precargados por la vista (Prefetch to_attr='active_services')
+    services = ServiceSummarySerializer(source='active_services', many=True, read_only=True)
+
+    class Meta:
+        model = Business
+        fields = [
+            'id', 'slug', 'name', 'description', 'address', 'phone', 'email',
+            'timezone', 'capacity', 'schedule_config',
+            'logo_url', 'hero_image_url', 'primary_color', 'instagram_url', 'facebook_url',
+            'services',
+        ]
+
+
+class ServiceSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    business = serializers.CharField(source='business.slug', read_only=True)
+
+    class Meta:
+        model = Service
+        fields = ['id', 'business', 'name', 'description', 'duration_minutes', 'price']
+
+
+class AppointmentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    business = serializers.CharField(source='business.slug', read_only=True)
+    service = ServiceSummarySerializer(read_only=True)
+    client = ClientSummarySerializer(read_only=True)
+
+    class Meta:
+        model = Appointment
+        fields = [
+            'id', 'business', 'service', 'client', 'start_time', 'end_time',
+            'status', 'is_block', 'notes', 'created_at', 'updated_at',
+        ]
+
+
+class StatusOperationSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    # El estado se valida por operación en AppointmentStatusService (resultado por ítem)
+    status = serializers.CharField()
+
+
+class BatchStatusSerializer(serializers.Serializer):
+    """Cuerpo de POST /appointments/batch-status/."""
+    business = serializers.SlugField()
+    operations = StatusOperationSerializer(
+        many=True, allow_empty=False, max_length=AppointmentStatusService.MAX_OPERATIONS,
+    )
@@ -0,0 +1,14 @@
+"""
+Rutas de la API v1. Se incluyen en saasBarber/urls.py bajo /api/v1/ con el
+namespace 'v1' (NamespaceVersioning: request.version == 'v1').
+"""
+from rest_framework.routers import DefaultRouter
+from . import views
+
+router = DefaultRouter()
+router.register('businesses', views.BusinessViewSet, basename='business')
+router.register('services', views.ServiceViewSet, basename='service')
+router.register('appointments', views.AppointmentViewSet, basename='appointment')
+router.register('availability', views.AvailabilityViewSet, basename='availability')
+
+urlpatterns = router.urls
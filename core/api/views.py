@@ -0,0 +1,245 @@
+"""
+Viewsets de la API v1: negocios, servicios, citas y disponibilidad.
+
+Cada viewset arma su queryset según los campos pedidos en ?fields=: las
+relaciones que se van a serializar se cargan en la misma consulta
+(select_related) o en una sola consulta adicional (prefetch), y las que no se
+piden no se cargan.
+"""
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from rest_framework.response import Response
+from core.models import Appointment, Business, Service
+from core.services import MAX_COMPACT_DAYS, AppointmentStatusService, AvailabilityService
+from core.tenancy import get_business_by_slug
+from .pagination import IdCursorPagination, StartTimeCursorPagination
+from .serializers import AppointmentSerializer, BatchStatusSerializer, BusinessSerializer, ServiceSerializer
+
+APPOINTMENT_STATUSES = {key for key, _label in Appointment.STATUS_CHOICES}
+
+
+def _business_or_404(slug):
+    """Negocio activo (caché de tenant) o 404."""
+    business = get_business_by_slug(slug)
+    if business is None:
+        raise NotFound('Negocio no encontrado.')
+    return business
+
+
+def _parse_date_param(params, name, required=False):
+    value = params.get(name)
+    if not value:
+        if required:
+            raise ValidationError({name: 'Este parámetro es obligatorio (YYYY-MM-DD).'})
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: 'Fecha inválida, usa YYYY-MM-DD.'})
+    return parsed
+
+
+def _business_tz(business):
+    try:
+        return ZoneInfo(business.timezone)
+    except Exception:
+        return timezone.get_current_timezone()
+
+
+class SparseFieldsViewMixin:
+    """
+    ?fields=a,b,c para viewsets cuyo serializer acepta `fields`.
+
+    `related_fields` relaciona campos del serializer con la relación que hay
+    que cargar con select_related cuando el campo se pide.
+    """
+    related_fields = {}
+
+    def get_requested_fields(self):
+        if not hasattr(self, '_requested_fields'):
+            raw = self.request.query_params.get('fields')
+            fields = [name.strip() for name in raw.split(',') if name.strip()] if raw else None
+            if fields is not None:
+                unknown = set(fields) - set(self.get_serializer_class().Meta.fields)
+                if unknown:
+                    raise ValidationError({'fields': f"Campos desconocidos: {', '.join(sorted(unknown))}"})
+            self._requested_fields = fields
+        return self._requested_fields
+
+    def wants(self, field):
+        fields = self.get_requested_fields()
+        return fields is None or field in fields
+
+    def select_requested(self, queryset):
+        related = [relation for field, relation in self.related_fields.items() if self.wants(field)]
+        return queryset.select_related(*related) if related else queryset
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.get_requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+
+class BusinessViewSet(SparseFieldsViewMixin, viewsets.ReadOnlyModelViewSet):
+    """Negocios activos con sus servicios activos (GET /businesses/<slug>/)."""
+    serializer_class = BusinessSerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = IdCursorPagination
+    lookup_field = 'slug'
+
+    def get_queryset(self):
+        queryset = Business.objects.filter(is_active=True)
+        if self.wants('services'):
+            queryset = queryset.prefetch_related(Prefetch(
+                'services',
+                queryset=Service.objects.filter(is_active=True).order_by('name'),
+                to_attr='active_services',
+            ))
+        return queryset
+
+
+class ServiceViewSet(SparseFieldsViewMixin, viewsets.ReadOnlyModelViewSet):
+    """Servicios activos; ?business=<slug> para los de un negocio."""
+    serializer_class = ServiceSerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = IdCursorPagination
+    related_fields = {'business': 'business'}
+
+    def get_queryset(self):
+        slug = self.request.query_params.get('business')
+        if slug:
+            queryset = Service.objects.filter(is_active=True, business_id=_business_or_404(slug).pk)
+        else:
+            queryset = Service.objects.filter(is_active=True, business__is_active=True)
+        return self.select_requested(queryset)
+
+
+class AppointmentViewSet(SparseFieldsViewMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Citas del usuario autenticado.
+
+    Sin parámetros: las citas en las que es cliente. Con ?business=<slug>: las
+    del negocio (solo su dueño). Filtros: ?status=pending,confirmed,
+    ?desde=YYYY-MM-DD y ?hasta=YYYY-MM-DD (inclusive, en la zona horaria del
+    negocio). Paginación por cursor sobre (start_time, id).
+    """
+    serializer_class = AppointmentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = StartTimeCursorPagination
+    related_fields = {'business': 'business', 'service': 'service', 'client': 'client'}
+
+    def get_queryset(self):
+        user = self.request.user
+        params = self.request.query_params
+        if self.action == 'retrieve':
+            queryset = Appointment.objects.filter(Q(client=user) | Q(business__owner=user))
+            return self.select_requested(queryset)
+
+        tz = timezone.get_current_timezone()
+        slug = params.get('business')
+        if slug:
+            business = _business_or_404(slug)
+            if business.owner_id != user.pk:
+                raise PermissionDenied('No autorizado')
+            queryset = Appointment.objects.filter(business_id=business.pk)
+            tz = _business_tz(business)
+        else:
+            queryset = Appointment.objects.filter(client=user)
+
+        statuses = [status for status in params.get('status', '').split(',') if status]
+        if statuses:
+            unknown = set(statuses) - APPOINTMENT_STATUSES
+            if unknown:
+                raise ValidationError({'status': f"Estados desconocidos: {', '.join(sorted(unknown))}"})
+            queryset = queryset.filter(status__in=statuses)
+
+        date_from = _parse_date_param(params, 'desde')
+        if date_from:
+            queryset = queryset.filter(start_time__gte=datetime.combine(date_from, time.min, tzinfo=tz))
+        date_to = _parse_date_param(params, 'hasta')
+        if date_to:
+            queryset = queryset.filter(
+                start_time__lt=datetime.combine(date_to + timedelta(days=1), time.min, tzinfo=tz)
+            )
+        return self.select_requested(queryset)
+
+    @action(detail=False, methods=['post'], url_path='batch-status')
+    def batch_status(self, request, *args, **kwargs):
+        """
+        Cambia el estado de varias citas del negocio en una transacción:
+        {"business": "<slug>", "operations": [{"id": 12, "status": "completed"}, ...]}
+
+        Responde 200 con un resultado por operación (en el mismo orden); las
+        operaciones inválidas no impiden aplicar las demás.
+        """
+        serializer = BatchStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        business = _business_or_404(serializer.validated_data['business'])
+        if business.owner_id != request.user.pk:
+            raise PermissionDenied('No autorizado')
+
+        operations = [(op['id'], op['status']) for op in serializer.validated_data['operations']]
+        results = AppointmentStatusService.apply_batch(business, operations)
+        return Response({
+            'updated': sum(1 for result in results if result['ok'] and result['changed']),
+            'failed': sum(1 for result in results if not result['ok']),
+            'results': results,
+        })
+
+
+class AvailabilityViewSet(viewsets.ViewSet):
+    """
+    Horarios disponibles de un servicio en una fecha:
+    GET /availability/?business=<slug>&service=<id>&date=YYYY-MM-DD
+
+    Con ?format=compact responde por día el primer slot, el paso y los rangos
+    libres [primer_slot, cantidad], y acepta ?days=N (1 a 14) días consecutivos.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def list(self, request, *args, **kwargs):
+        params = request.query_params
+        if not params.get('business') or not params.get('service'):
+            raise ValidationError('Los parámetros business, service y date son obligatorios.')
+        business = _business_or_404(params['business'])
+        date = _parse_date_param(params, 'date', required=True)
+        try:
+            service_id = int(params['service'])
+        except ValueError:
+            raise ValidationError({'service': 'Debe ser un id numérico.'})
+        service = Service.objects.filter(id=service_id, business_id=business.pk, is_active=True).first()
+        if service is None:
+            raise NotFound('Servicio no encontrado.')
+
+        if params.get('format') == 'compact':
+            try:
+                days = int(params.get('days', 1))
+            except ValueError:
+                days = 0
+            if not 1 <= days <= MAX_COMPACT_DAYS:
+                raise ValidationError({'days': f'Debe estar entre 1 y {MAX_COMPACT_DAYS}.'})
+            dates = [date + timedelta(days=i) for i in range(days)]
+            grids = AvailabilityService.get_slot_grids(business, service, dates)
+            return Response({
+                'business': business.slug,
+                'service': service.pk,
+                'format': 'compact',
+                'duration_minutes': service.duration_minutes,
+                'days': [{'date': day.isoformat(), **grid.as_compact()} for day, grid in zip(dates, grids)],
+            })
+
+        slots = AvailabilityService.get_available_slots(business, service, date)
+        return Response({
+            'business': business.slug,
+            'service': service.pk,
+            'date': date.isoformat(),
+            'duration_minutes': service.duration_minutes,
+            'slots': [slot.isoformat() for slot in slots],
+        })
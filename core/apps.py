@@ -8,3 +8,12 @@ class CoreConfig(AppConfig):
     def ready(self):
         """Importa las señales cuando la app está lista."""
         import core.signals
+        
+        from django.conf import settings
+        if settings.SQLITE_TUNING:
+            from django.db.backends.signals import connection_created
+            from .db import configure_sqlite_connection
+            connection_created.connect(configure_sqlite_connection)
+        
+        from .metrics import REGISTRY
+        REGISTRY.start_flusher()
@@ -0,0 +1,137 @@
+"""
+Archivo de citas antiguas (tabla caliente / tabla fría).
+
+Las citas que terminaron hace más de APPOINTMENT_ARCHIVE_AFTER_DAYS se mueven
+de Appointment a ArchivedAppointment en lotes, cada uno en su propia
+transacción (copia + borrado), para mantener chica la tabla que usan el
+dashboard, la disponibilidad y el admin. Como cada lote se mueve completo o no
+se mueve, volver a ejecutar el proceso continúa donde se quedó.
+"""
+import logging
+from datetime import timedelta
+from heapq import merge
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import Appointment, ArchivedAppointment
+from .services import delete_appointments
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FIELDS = (
+    'id', 'business_id', 'client_id', 'service_id', 'service__name', 'service__price',
+    'start_time', 'end_time', 'status', 'notes', 'is_block', 'created_at', 'updated_at',
+)
+
+
+def get_archive_cutoff(days=None, now=None):
+    """Fecha límite: se archivan las citas que terminaron antes de este momento."""
+    if days is None:
+        days = settings.APPOINTMENT_ARCHIVE_AFTER_DAYS
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def archivable_appointments(cutoff):
+    """Citas que ya se pueden archivar."""
+    return Appointment.objects.filter(end_time__lt=cutoff)
+
+
+def _archive_batch(ids, archived_at):
+    with transaction.atomic():
+        rows = list(
+            Appointment.objects.filter(id__in=ids).order_by('id').values(*ARCHIVE_FIELDS)
+        )
+        ArchivedAppointment.objects.bulk_create(
+            [
+                ArchivedAppointment(
+                    original_id=row['id'],
+                    business_id=row['business_id'],
+                    client_id=row['client_id'],
+                    service_id=row['service_id'],
+                    service_name=row['service__name'] or '',
+                    service_price=row['service__price'],
+                    start_time=row['start_time'],
+                    end_time=row['end_time'],
+                    status=row['status'],
+                    notes=row['notes'],
+                    is_block=row['is_block'],
+                    created_at=row['created_at'],
+                    updated_at=row['updated_at'],
+                    archived_at=archived_at,
+                )
+                for row in rows
+            ],
+            # Si una cita ya estaba archivada, no duplicarla
+            ignore_conflicts=True,
+        )
+        delete_appointments(
+            Appointment.objects.filter(id__in=[row['id'] for row in rows]),
+            bookings=[(row['business_id'], row['start_time'], row['end_time']) for row in rows],
+        )
+    return len(rows)
+
+
+def archive_appointments(cutoff=None, batch_size=None, max_batches=None):
+    """
+    Mueve las citas anteriores a `cutoff` a ArchivedAppointment en lotes.
+
+    Es un generador: después de cada lote produce (archivadas_en_el_lote,
+    total_archivadas, pendientes_estimadas) para que el llamador reporte
+    progreso.
+    """
+    cutoff = cutoff or get_archive_cutoff()
+    batch_size = batch_size or settings.APPOINTMENT_ARCHIVE_BATCH_SIZE
+    queryset = archivable_appointments(cutoff)
+    remaining = queryset.count()
+    archived_total = 0
+    last_id = 0
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        ids = list(
+            queryset.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        moved = _archive_batch(ids, timezone.now())
+        last_id = ids[-1]
+        batches += 1
+        archived_total += moved
+        remaining = max(remaining - moved, 0)
+        yield moved, archived_total, remaining
+
+    if archived_total:
+        logger.info(f"{archived_total} citas archivadas (anteriores a {cutoff.isoformat()})")
+
+
+def get_client_history(user, limit=10, now=None):
+    """
+    Historial de citas pasadas del cliente, de la más reciente a la más antigua,
+    combinando la tabla activa y el archivo. Siempre se leen las `limit` más
+    recientes de cada tabla (una consulta por índice cada una): el archivo
+    puede tener citas más recientes que las de la tabla activa si se archivó
+    con un --days menor que APPOINTMENT_ARCHIVE_AFTER_DAYS.
+
+    Returns:
+        list: Hasta `limit` citas (Appointment o ArchivedAppointment)
+    """
+    now = now or timezone.now()
+    recent = list(
+        Appointment.objects.filter(client=user, is_block=False, start_time__lt=now)
+        .select_related('business', 'service')
+        .order_by('-start_time')[:limit]
+    )
+    archived = (
+        ArchivedAppointment.objects.filter(client=user, is_block=False)
+        .select_related('business', 'service')
+        .order_by('-start_time')[:limit]
+    )
+    return list(merge(recent, archived, key=lambda a: a.start_time, reverse=True))[:limit]
+
+
+def count_client_appointments(user):
+    """Total de reservas del cliente, incluyendo las archivadas."""
+    return (
+        Appointment.objects.filter(client=user, is_block=False).count()
+        + ArchivedAppointment.objects.filter(client=user, is_block=False).count()
+    )
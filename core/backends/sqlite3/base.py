@@ -0,0 +1,20 @@
+"""
+Backend SQLite con soporte para transacciones BEGIN IMMEDIATE.
+
+Se activa con SQLITE_TUNING=True (ver saasBarber/settings.py). Las
+transacciones abiertas con core.db.booking_atomic toman el lock de escritura
+al iniciar, en lugar de intentar promoverlo a mitad de la transacción (que en
+SQLite falla de inmediato con "database is locked" si hay otro escritor).
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # Lo activa booking_atomic solo para la transacción que está por abrir
+    begin_immediate = False
+
+    def _start_transaction_under_autocommit(self):
+        if self.begin_immediate:
+            self.cursor().execute("BEGIN IMMEDIATE")
+        else:
+            super()._start_transaction_under_autocommit()
@@ -0,0 +1,225 @@
+"""
+Caché de páginas públicas por negocio.
+
+Cada negocio tiene una "versión de contenido" guardada en la caché compartida.
+Cualquier cambio que afecte a su landing page (datos del negocio, servicios,
+galería) genera una versión nueva, con lo que las páginas cacheadas con la
+versión anterior dejan de usarse sin tener que borrarlas una por una.
+
+La disponibilidad usa además una "versión de disponibilidad" por negocio y
+día, que cambia al crear, mover, cancelar o borrar citas de ese día: las
+respuestas de slots de otros días siguen siendo válidas.
+"""
+import hashlib
+import json
+import secrets
+import time
+from datetime import timedelta
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from .tenancy import get_request_business
+
+# Parámetros GET que cambian el contenido de la landing page
+UNCACHEABLE_PARAMS = ('service', 'date', 'success')
+
+
+def _content_version_key(business_id):
+    return f'business:content:{business_id}'
+
+
+def _new_version():
+    return secrets.token_hex(6)
+
+
+def get_content_version(business_id):
+    """Retorna la versión de contenido actual del negocio (la crea si no existe)."""
+    key = _content_version_key(business_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_content_version(business_id):
+    """Versión asíncrona de get_content_version."""
+    key = _content_version_key(business_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, _new_version(), None)
+        version = await cache.aget(key)
+    # Sin caché (DummyCache) cada petición recibe una versión nueva: nunca un 304 viejo
+    return version or _new_version()
+
+
+def bump_content_version(business_id):
+    """Invalida las páginas cacheadas del negocio generando una versión nueva."""
+    cache.set(_content_version_key(business_id), _new_version(), None)
+
+
+def bump_content_versions(business_ids):
+    """Igual que bump_content_version pero para muchos negocios en una sola operación."""
+    cache.set_many({_content_version_key(business_id): _new_version() for business_id in business_ids}, None)
+
+
+def _availability_version_key(business_id, date):
+    return f'business:availability:{business_id}:{date.isoformat()}'
+
+
+# Las versiones por día solo importan mientras se consultan sus slots
+AVAILABILITY_VERSION_TIMEOUT = 7 * 24 * 3600
+
+# Hoy los slots que ya pasaron desaparecen en cada corte de 15 minutos
+TODAY_BUCKET_SECONDS = 15 * 60
+
+
+async def aget_availability_versions(business_id, dates):
+    """Versiones de disponibilidad de los días dados (las crea si no existen)."""
+    keys = [_availability_version_key(business_id, date) for date in dates]
+    versions = await cache.aget_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            await cache.aadd(key, _new_version(), AVAILABILITY_VERSION_TIMEOUT)
+        versions.update(await cache.aget_many(missing))
+    return [versions.get(key) or _new_version() for key in keys]
+
+
+def bump_availability_versions(business_id, dates):
+    """Invalida la disponibilidad cacheada del negocio en esos días."""
+    if dates:
+        cache.set_many(
+            {_availability_version_key(business_id, date): _new_version() for date in dates},
+            AVAILABILITY_VERSION_TIMEOUT,
+        )
+
+
+def booking_dates(time_ranges):
+    """
+    Días cuya disponibilidad puede cambiar por citas en los intervalos dados.
+    No depende de la zona horaria del negocio (no requiere consultarlo):
+    incluye un día de margen a cada lado de las fechas en UTC.
+    """
+    dates = set()
+    for start_time, end_time in time_ranges:
+        if start_time is None:
+            continue
+        day = (start_time - timedelta(days=1)).date()
+        last = ((end_time or start_time) + timedelta(days=1)).date()
+        while day <= last:
+            dates.add(day)
+            day += timedelta(days=1)
+    return dates
+
+
+async def aavailability_etag(business, service_id, dates, variant=''):
+    """
+    ETag de una respuesta de slots: cambia con el contenido del negocio
+    (horario, zona horaria, servicios), con la disponibilidad de cada día y,
+    si incluye el día de hoy, en cada corte de 15 minutos.
+    """
+    parts = [str(business.id), str(service_id), variant, await aget_content_version(business.id)]
+    parts += [date.isoformat() for date in dates]
+    parts += await aget_availability_versions(business.id, dates)
+    if business.get_local_today() in dates:
+        parts.append(str(int(time.time() // TODAY_BUCKET_SECONDS)))
+    return '"%s"' % hashlib.sha1(':'.join(parts).encode()).hexdigest()[:20]
+
+
+async def acatalog_etag(business):
+    """ETag del catálogo de servicios: cambia con la versión de contenido."""
+    return f'"{business.id}-{await aget_content_version(business.id)}"'
+
+
+async def acached_public_json(request, cache_key, etag, max_age, timeout, build):
+    """
+    Respuesta JSON pública y cacheable (para vistas async).
+
+    Si If-None-Match coincide responde 304 sin calcular nada; si no, usa el
+    cuerpo guardado en la caché o lo genera con la corrutina build() (un
+    dict). Agrega Cache-Control con max-age corto y stale-while-revalidate
+    para que el navegador o un proxy absorban las repeticiones.
+    """
+    if request.headers.get('If-None-Match') == etag:
+        return _patch_public_json_headers(HttpResponseNotModified(), etag, max_age)
+    content = await cache.aget(cache_key)
+    if content is None:
+        content = json.dumps(await build(), cls=DjangoJSONEncoder).encode()
+        await cache.aset(cache_key, content, timeout)
+    return _patch_public_json_headers(HttpResponse(content, content_type='application/json'), etag, max_age)
+
+
+def _patch_public_json_headers(response, etag, max_age):
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=max_age,
+        stale_while_revalidate=settings.PUBLIC_API_STALE_WHILE_REVALIDATE,
+    )
+    response['ETag'] = etag
+    return response
+
+
+def _is_cacheable_request(request):
+    return (
+        request.method == 'GET'
+        and not request.user.is_authenticated
+        and not any(param in request.GET for param in UNCACHEABLE_PARAMS)
+        and 'messages' not in request.COOKIES
+    )
+
+
+def _patch_public_headers(response, etag):
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=settings.PAGE_CACHE_MAX_AGE,
+        s_maxage=settings.PAGE_CACHE_SHARED_MAX_AGE,
+        stale_while_revalidate=settings.PAGE_CACHE_MAX_AGE,
+    )
+    patch_vary_headers(response, ('Cookie', 'Accept-Encoding'))
+    response['ETag'] = etag
+    return response
+
+
+def cache_public_page(view_func):
+    """
+    Cachea la página completa de un negocio para visitantes anónimos (GET sin
+    parámetros de reserva). La clave incluye la versión de contenido y la fecha
+    local del negocio, porque la página muestra los próximos días disponibles.
+    Agrega Cache-Control/Vary/ETag para que un CDN o proxy también pueda servirla.
+    """
+    @wraps(view_func)
+    def wrapper(request, business_slug, *args, **kwargs):
+        if not _is_cacheable_request(request):
+            response = view_func(request, business_slug, *args, **kwargs)
+            patch_cache_control(response, private=True)
+            patch_vary_headers(response, ('Cookie',))
+            return response
+
+        business = get_request_business(request, business_slug)
+        if business is None:
+            return view_func(request, business_slug, *args, **kwargs)
+
+        version = get_content_version(business.id)
+        today = business.get_local_today().isoformat()
+        etag = f'"{business.id}-{version}-{today}"'
+        if request.headers.get('If-None-Match') == etag:
+            return _patch_public_headers(HttpResponseNotModified(), etag)
+
+        key = f'page:business:{business.id}:{version}:{today}'
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            return _patch_public_headers(HttpResponse(content, content_type=content_type), etag)
+
+        response = view_func(request, business_slug, *args, **kwargs)
+        if response.status_code == 200 and not response.streaming:
+            cache.set(key, (response.content, response['Content-Type']), settings.PAGE_CACHE_TIMEOUT)
+            _patch_public_headers(response, etag)
+        return response
+    return wrapper
@@ -0,0 +1,123 @@
+"""
+Utilidades de base de datos: ajustes de SQLite y transacciones de reserva.
+"""
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """
+    Aplica los PRAGMA de concurrencia a cada conexión SQLite nueva
+    (conectado a `connection_created` cuando SQLITE_TUNING=True).
+
+    - journal_mode=WAL: lectores y un escritor no se bloquean entre sí
+    - synchronous=NORMAL: fsync solo en checkpoints (seguro con WAL)
+    - busy_timeout: espera el lock en lugar de fallar de inmediato
+    - mmap_size / cache_size: lecturas desde memoria en vez de read()
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute(f'PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}')
+        cursor.execute(f'PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}')
+        # Valor negativo = tamaño en KiB en lugar de número de páginas
+        cursor.execute(f'PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}')
+        cursor.execute('PRAGMA temp_store=MEMORY')
+
+
+@contextmanager
+def immediate_atomic(using=None):
+    """
+    transaction.atomic que en SQLite (con SQLITE_TUNING) abre la transacción
+    con BEGIN IMMEDIATE: el lock de escritura se toma al inicio, en lugar de
+    intentar promoverlo después de leer (lo que falla con "database is locked"
+    si otro proceso escribió mientras tanto). En otros motores es un atomic normal.
+    """
+    using = using or DEFAULT_DB_ALIAS
+    connection = connections[using]
+    immediate = hasattr(connection, 'begin_immediate') and not connection.in_atomic_block
+    if immediate:
+        connection.begin_immediate = True
+    try:
+        with transaction.atomic(using=using):
+            if immediate:
+                # El BEGIN IMMEDIATE ya se ejecutó; los atomic anidados usan savepoints
+                connection.begin_immediate = False
+            yield
+    finally:
+        if immediate:
+            connection.begin_immediate = False
+
+
+@contextmanager
+def booking_atomic(business=None, using=None):
+    """
+    Transacción para escrituras de reservas (verificar disponibilidad + insertar).
+
+    - SQLite: usa immediate_atomic, así la verificación y la inserción ocurren
+      con el lock de escritura tomado.
+    - PostgreSQL: bloquea la fila del negocio con SELECT ... FOR UPDATE para
+      serializar las reservas concurrentes de un mismo negocio.
+
+    Args:
+        business: Business cuyas reservas se serializan (opcional)
+        using: Alias de la base de datos
+    """
+    using = using or DEFAULT_DB_ALIAS
+    with immediate_atomic(using=using):
+        if business is not None and connections[using].features.has_select_for_update:
+            from .models import Business
+            list(Business.objects.using(using).select_for_update().filter(pk=business.pk).values_list('pk'))
+        yield
+
+
+def estimate_row_count(model, using=None):
+    """
+    Número aproximado de filas de la tabla de `model` sin hacer COUNT(*).
+
+    - PostgreSQL: estadísticas del planner (pg_class.reltuples), actualizadas
+      por autovacuum/ANALYZE.
+    - SQLite: estadísticas de ANALYZE (sqlite_stat1): el primer número de cada
+      índice es el número de filas que tenía la tabla al analizarla.
+
+    Retorna None si no hay estimación disponible (el llamador debe contar).
+    """
+    using = using or DEFAULT_DB_ALIAS
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)',
+                [connection.ops.quote_name(model._meta.db_table)],
+            )
+            row = cursor.fetchone()
+        # reltuples es -1 (o 0) si la tabla nunca se analizó
+        return row[0] if row and row[0] > 0 else None
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s', [model._meta.db_table])
+            # Los índices parciales cuentan menos filas: se toma el mayor
+            counts = [int(stat.split()[0]) for (stat,) in cursor.fetchall() if stat]
+        return max(counts) if counts else None
+    return None
+
+
+def analyze_tables(models, using=None):
+    """
+    Actualiza las estadísticas del planner (ANALYZE) de las tablas de
+    `models`, p. ej. después de mover muchas filas de una tabla a otra.
+    También refresca lo que usa estimate_row_count.
+    """
+    using = using or DEFAULT_DB_ALIAS
+    connection = connections[using]
+    if connection.vendor not in ('postgresql', 'sqlite'):
+        return
+    with connection.cursor() as cursor:
+        for model in models:
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
@@ -0,0 +1,57 @@
+"""
+Decoradores reutilizables para las vistas por negocio.
+"""
+from functools import wraps
+from asgiref.sync import iscoroutinefunction
+from django.contrib import messages
+from django.http import Http404, JsonResponse
+from django.shortcuts import redirect
+from .tenancy import aget_request_business, get_request_business
+
+
+def business_required(view_func):
+    """
+    Garantiza que `request.business` contenga el negocio activo del slug de la URL.
+    Responde 404 si el negocio no existe o está inactivo. Acepta vistas async.
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            business_slug = kwargs.get('business_slug')
+            if business_slug and await aget_request_business(request, business_slug) is None:
+                raise Http404('Negocio no encontrado.')
+            return await view_func(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        business_slug = kwargs.get('business_slug')
+        if business_slug and get_request_business(request, business_slug) is None:
+            raise Http404('Negocio no encontrado.')
+        return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+def owner_required(json_response=False, message='No tienes permiso para acceder a esta página.'):
+    """
+    Verifica que el usuario autenticado sea el dueño de `request.business`.
+    Usar debajo de @login_required.
+
+    Args:
+        json_response: bool - Si es True responde 403 en JSON (endpoints de API),
+            si no, muestra un mensaje y redirige al admin.
+        message: str - Mensaje a mostrar al usuario cuando no tiene permiso
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        @business_required
+        def wrapper(request, *args, **kwargs):
+            business = getattr(request, 'business', None)
+            if kwargs.get('business_slug') and business.owner_id != request.user.pk:
+                if json_response:
+                    return JsonResponse({'success': False, 'error': 'No autorizado'}, status=403)
+                messages.error(request, message)
+                return redirect('admin:index')
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,149 @@
+"""
+Exportación de citas en CSV o JSONL como respuesta en streaming.
+
+Las filas se leen con values_list + iterator(chunk_size), con los datos del
+servicio y del cliente en la misma consulta (JOIN), y se escriben a medida
+que se envían: la memoria no crece con el número de filas. Opcionalmente el
+archivo se comprime con gzip al vuelo.
+"""
+import csv
+import json
+import zlib
+from datetime import datetime
+from decimal import Decimal
+from heapq import merge
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from .models import Appointment, ArchivedAppointment
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+}
+
+# (encabezado, campo en Appointment, campo en ArchivedAppointment)
+EXPORT_COLUMNS = (
+    ('id', 'id', 'original_id'),
+    ('negocio', 'business__slug', 'business__slug'),
+    ('inicio', 'start_time', 'start_time'),
+    ('fin', 'end_time', 'end_time'),
+    ('estado', 'status', 'status'),
+    ('bloqueo', 'is_block', 'is_block'),
+    ('servicio', 'service__name', 'service_name'),
+    ('precio', 'service__price', 'service_price'),
+    ('cliente_nombre', 'client__first_name', 'client__first_name'),
+    ('cliente_apellido', 'client__last_name', 'client__last_name'),
+    ('cliente_email', 'client__email', 'client__email'),
+    ('cliente_telefono', 'client__phone', 'client__phone'),
+    ('notas', 'notes', 'notes'),
+    ('creada', 'created_at', 'created_at'),
+)
+EXPORT_HEADERS = [column[0] for column in EXPORT_COLUMNS] + ['archivada']
+START_TIME_INDEX = 2
+
+# Tamaño aproximado de cada bloque enviado al cliente
+STREAM_BUFFER_SIZE = 64 * 1024
+
+
+def appointment_rows(queryset, archived=False, chunk_size=None):
+    """Tuplas con las columnas de EXPORT_HEADERS, leídas por bloques."""
+    fields = [column[2] if archived else column[1] for column in EXPORT_COLUMNS]
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    for row in queryset.order_by('start_time', 'id').values_list(*fields).iterator(chunk_size=chunk_size):
+        yield row + (archived,)
+
+
+def business_export_rows(business, start=None, end=None, include_archived=True):
+    """
+    Citas del negocio en [start, end), de la tabla activa y, opcionalmente,
+    del archivo, ordenadas por fecha de inicio.
+    """
+    filters = {'business': business}
+    if start:
+        filters['start_time__gte'] = start
+    if end:
+        filters['start_time__lt'] = end
+    rows = appointment_rows(Appointment.objects.filter(**filters))
+    if not include_archived:
+        return rows
+    archived_rows = appointment_rows(ArchivedAppointment.objects.filter(**filters), archived=True)
+    # Ambas secuencias ya vienen ordenadas: se intercalan sin cargarlas en memoria
+    return merge(archived_rows, rows, key=lambda row: row[START_TIME_INDEX])
+
+
+def _format_value(value, tz):
+    """Fechas en la zona horaria indicada (ISO 8601) y decimales como texto."""
+    if isinstance(value, datetime):
+        return timezone.localtime(value, tz).isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class _Echo:
+    """Pseudo-archivo para csv.writer: retorna la línea en vez de escribirla."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(rows, tz):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_HEADERS)
+    for row in rows:
+        yield writer.writerow(['' if value is None else _format_value(value, tz) for value in row])
+
+
+def _jsonl_lines(rows, tz):
+    for row in rows:
+        record = dict(zip(EXPORT_HEADERS, (_format_value(value, tz) for value in row)))
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def _buffered(lines):
+    """Agrupa las líneas en bloques de ~STREAM_BUFFER_SIZE bytes."""
+    buffer, size = [], 0
+    for line in lines:
+        data = line.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= STREAM_BUFFER_SIZE:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def _gzipped(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: formato gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_response(rows, filename, export_format='csv', compress=False, tz=None):
+    """
+    StreamingHttpResponse con las filas en CSV o JSONL (opcionalmente .gz).
+
+    Args:
+        rows: iterable de tuplas en el orden de EXPORT_HEADERS
+        filename: nombre del archivo sin extensión
+        export_format: 'csv' o 'jsonl'
+        compress: bool - comprimir con gzip
+        tz: zona horaria para las fechas (por defecto la actual)
+    """
+    content_type, extension = EXPORT_FORMATS[export_format]
+    lines = _csv_lines(rows, tz) if export_format == 'csv' else _jsonl_lines(rows, tz)
+    content = _buffered(lines)
+    filename = f'{filename}.{extension}'
+    if compress:
+        content = _gzipped(content)
+        content_type = 'application/gzip'
+        filename += '.gz'
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'no-store'
+    return response
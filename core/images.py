@@ -0,0 +1,144 @@
+"""
+Procesamiento de imágenes de la galería.
+
+Después de subir una imagen se generan, en segundo plano, versiones
+redimensionadas en WebP y JPEG sin metadatos EXIF, para que la landing page
+sirva imágenes del tamaño adecuado (srcset) en lugar del archivo original.
+"""
+import io
+import logging
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+from .models import GalleryImage
+from .tasks import run_in_background
+
+logger = logging.getLogger(__name__)
+
+# Nombre de variante -> ancho máximo en píxeles
+VARIANT_WIDTHS = {
+    'thumbnail': 320,
+    'medium': 768,
+    'large': 1600,
+}
+
+# Extensión -> (formato de Pillow, opciones de guardado)
+VARIANT_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def _load_image(file, max_width):
+    """Abre la imagen aplicando la orientación EXIF y la convierte a RGB."""
+    img = Image.open(file)
+    # Para JPEG, decodificar directamente a una escala reducida (mucho más rápido)
+    img.draft('RGB', (max_width, max_width))
+    img = ImageOps.exif_transpose(img)
+
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel('A'))
+        return background
+    return img.convert('RGB')
+
+
+def _encode(img, fmt):
+    """Codifica la imagen sin metadatos (Pillow no copia EXIF si no se le pasa)."""
+    pil_format, options = VARIANT_FORMATS[fmt]
+    buffer = io.BytesIO()
+    img.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def generate_variants(gallery_image):
+    """
+    Genera las variantes de una imagen y las guarda en el storage de la imagen.
+
+    Returns:
+        dict: Variantes en el formato de GalleryImage.variants
+    """
+    storage = gallery_image.image.storage
+    with gallery_image.image.open('rb') as file:
+        source = _load_image(file, max(VARIANT_WIDTHS.values()))
+
+    variants = {}
+    saved_paths = []
+    previous = None
+    try:
+        for name, max_width in sorted(VARIANT_WIDTHS.items(), key=lambda item: item[1]):
+            width = min(max_width, source.width)
+            # Si la original es más chica que esta variante, reutilizar la anterior
+            if previous and previous['width'] == width:
+                variants[name] = previous
+                continue
+
+            resized = source.copy()
+            resized.thumbnail((width, source.height), Image.LANCZOS)
+            variant = {'width': resized.width, 'height': resized.height}
+            for fmt in VARIANT_FORMATS:
+                path = f"gallery/variants/{gallery_image.id}/{name}.{fmt}"
+                variant[fmt] = storage.save(path, ContentFile(_encode(resized, fmt)))
+                saved_paths.append(variant[fmt])
+            variants[name] = previous = variant
+    except Exception:
+        # No dejar archivos (o referencias) huérfanos si falla a la mitad
+        delete_variants(gallery_image, saved_paths)
+        raise
+
+    return variants
+
+
+def _variant_paths(variants):
+    return {
+        variant[fmt]
+        for variant in (variants or {}).values()
+        for fmt in VARIANT_FORMATS
+        if variant.get(fmt)
+    }
+
+
+def delete_variants(gallery_image, paths=None):
+    """Elimina los archivos de variantes de una imagen (o solo las rutas indicadas)."""
+    storage = gallery_image.image.storage
+    for path in paths if paths is not None else _variant_paths(gallery_image.variants):
+        try:
+            storage.delete(path)
+        except Exception as e:
+            logger.warning(f"No se pudo eliminar la variante {path}: {str(e)}")
+
+
+def process_gallery_image(image_id):
+    """
+    Genera las variantes de una GalleryImage y marca su estado de procesamiento.
+
+    Returns:
+        bool: True si se procesó exitosamente
+    """
+    try:
+        gallery_image = GalleryImage.objects.get(id=image_id)
+    except GalleryImage.DoesNotExist:
+        logger.info(f"Imagen de galería {image_id} ya no existe, no se procesa")
+        return False
+
+    old_variants = gallery_image.variants
+    try:
+        gallery_image.variants = generate_variants(gallery_image)
+        gallery_image.processing_status = 'ready'
+    except Exception as e:
+        logger.error(f"Error al procesar imagen de galería {image_id}: {str(e)}")
+        gallery_image.processing_status = 'failed'
+        gallery_image.save(update_fields=['processing_status'])
+        return False
+
+    gallery_image.save(update_fields=['variants', 'processing_status'])
+    # Reprocesamiento: liberar las variantes anteriores (con el storage
+    # deduplicado, una variante idéntica solo pierde la referencia extra)
+    if old_variants:
+        delete_variants(gallery_image, _variant_paths(old_variants))
+    return True
+
+
+def schedule_gallery_image_processing(image_id):
+    """Programa el procesamiento de la imagen fuera de la petición."""
+    return run_in_background(process_gallery_image, image_id)
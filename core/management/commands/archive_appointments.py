@@ -0,0 +1,63 @@
+"""
+Mueve las citas antiguas a la tabla de archivo.
+
+Cada lote se copia y se borra en una sola transacción, así que el comando se
+puede interrumpir (Ctrl+C, timeout de cron) y volver a ejecutar: continúa con
+las citas que faltan. Al terminar actualiza las estadísticas (ANALYZE) de
+ambas tablas: el conteo estimado del admin y el planner ven el nuevo tamaño.
+
+Uso:
+    python manage.py archive_appointments                 # APPOINTMENT_ARCHIVE_AFTER_DAYS
+    python manage.py archive_appointments --days 180 --batch-size 1000
+    python manage.py archive_appointments --dry-run
+"""
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.archive import archive_appointments, archivable_appointments, get_archive_cutoff
+from core.db import analyze_tables
+from core.models import Appointment, ArchivedAppointment
+
+
+class Command(BaseCommand):
+    help = 'Archiva (en lotes) las citas que terminaron hace más de N días.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Antigüedad mínima en días (por defecto APPOINTMENT_ARCHIVE_AFTER_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=None, help='Citas por transacción')
+        parser.add_argument('--max-batches', type=int, default=None, help='Detenerse después de N lotes')
+        parser.add_argument('--sleep', type=float, default=0, help='Segundos de pausa entre lotes')
+        parser.add_argument('--dry-run', action='store_true', help='Solo contar las citas a archivar')
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else settings.APPOINTMENT_ARCHIVE_AFTER_DAYS
+        cutoff = get_archive_cutoff(days)
+        pending = archivable_appointments(cutoff).count()
+        self.stdout.write(f"Citas anteriores a {cutoff:%Y-%m-%d %H:%M}: {pending}")
+        if options['dry_run'] or not pending:
+            return
+
+        started = time.monotonic()
+        archived = 0
+        try:
+            for moved, archived, remaining in archive_appointments(
+                cutoff, batch_size=options['batch_size'], max_batches=options['max_batches']
+            ):
+                done = pending - remaining
+                rate = archived / max(time.monotonic() - started, 1e-6)
+                self.stdout.write(
+                    f"  +{moved} | {done}/{pending} ({done * 100 // pending}%) | {rate:,.0f} citas/s"
+                )
+                if options['sleep']:
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING(
+                f"Interrumpido después de {archived} citas; vuelve a ejecutar el comando para continuar."
+            ))
+            return
+        finally:
+            if archived:
+                analyze_tables([Appointment, ArchivedAppointment])
+
+        self.stdout.write(self.style.SUCCESS(f"{archived} citas archivadas."))
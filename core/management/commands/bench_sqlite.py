@@ -0,0 +1,197 @@
+"""
+Benchmark de lecturas/escrituras concurrentes en SQLite.
+
+Compara la configuración por defecto (rollback journal, BEGIN diferido) con el
+modo SQLITE_TUNING (WAL, synchronous=NORMAL, busy_timeout, mmap y BEGIN
+IMMEDIATE) sobre una base temporal con la misma forma que core_appointment:
+hilos "dashboard" consultan las citas del día mientras hilos "reserva"
+verifican disponibilidad e insertan citas.
+
+Uso:
+    python manage.py bench_sqlite --seconds 10 --readers 8 --writers 4
+"""
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from django.core.management.base import BaseCommand
+
+SCHEMA = """
+CREATE TABLE appointment (
+    id INTEGER PRIMARY KEY,
+    business_id INTEGER NOT NULL,
+    start_time INTEGER NOT NULL,
+    end_time INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    is_block INTEGER NOT NULL DEFAULT 0,
+    notes TEXT
+);
+CREATE INDEX appointment_business_start ON appointment (business_id, start_time);
+"""
+
+MODES = {
+    'default': {
+        'pragmas': [],
+        'begin': 'BEGIN',
+        'timeout': 5.0,
+    },
+    'tuned': {
+        'pragmas': [
+            'PRAGMA journal_mode=WAL',
+            'PRAGMA synchronous=NORMAL',
+            'PRAGMA busy_timeout=10000',
+            'PRAGMA mmap_size=268435456',
+            'PRAGMA cache_size=-65536',
+            'PRAGMA temp_store=MEMORY',
+        ],
+        'begin': 'BEGIN IMMEDIATE',
+        'timeout': 10.0,
+    },
+}
+
+DAY = 24 * 3600
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+class Command(BaseCommand):
+    help = 'Compara el throughput de SQLite por defecto vs. SQLITE_TUNING con lecturas y reservas concurrentes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=5.0, help='Duración de cada escenario')
+        parser.add_argument('--readers', type=int, default=8, help='Hilos que simulan el polling del dashboard')
+        parser.add_argument('--writers', type=int, default=4, help='Hilos que simulan reservas')
+        parser.add_argument('--businesses', type=int, default=20)
+        parser.add_argument('--rows', type=int, default=50000, help='Citas precargadas')
+        parser.add_argument('--mode', choices=['default', 'tuned', 'both'], default='both')
+
+    def handle(self, *args, **options):
+        modes = ['default', 'tuned'] if options['mode'] == 'both' else [options['mode']]
+        results = {}
+        for mode in modes:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'bench.sqlite3')
+                self._prepare(path, MODES[mode], options)
+                results[mode] = self._run(path, MODES[mode], options)
+            self._print(mode, results[mode], options['seconds'])
+
+        if len(results) == 2:
+            base, tuned = results['default'], results['tuned']
+            for key in ('reads', 'writes'):
+                if base[key]:
+                    self.stdout.write(f"Mejora en {key}: x{tuned[key] / base[key]:.1f}")
+
+    def _connect(self, path, config):
+        conn = sqlite3.connect(path, timeout=config['timeout'], isolation_level=None, check_same_thread=False)
+        for pragma in config['pragmas']:
+            conn.execute(pragma)
+        return conn
+
+    def _prepare(self, path, config, options):
+        conn = self._connect(path, config)
+        conn.executescript(SCHEMA)
+        rng = random.Random(42)
+        now = int(time.time())
+        rows = []
+        for _ in range(options['rows']):
+            start = now + rng.randint(-30, 30) * DAY + rng.randint(9 * 4, 19 * 4) * 900
+            rows.append((rng.randint(1, options['businesses']), start, start + 1800,
+                         rng.choice(['pending', 'confirmed', 'completed', 'cancelled']), 0, ''))
+        conn.execute('BEGIN')
+        conn.executemany(
+            'INSERT INTO appointment (business_id, start_time, end_time, status, is_block, notes) VALUES (?, ?, ?, ?, ?, ?)',
+            rows,
+        )
+        conn.execute('COMMIT')
+        conn.close()
+
+    def _run(self, path, config, options):
+        stop_at = time.monotonic() + options['seconds']
+        lock = threading.Lock()
+        stats = {'reads': 0, 'writes': 0, 'rejected': 0, 'locked': 0, 'read_ms': [], 'write_ms': []}
+        now = int(time.time())
+
+        def reader(seed):
+            rng = random.Random(seed)
+            conn = self._connect(path, config)
+            while time.monotonic() < stop_at:
+                business_id = rng.randint(1, options['businesses'])
+                day_start = now - now % DAY + rng.randint(0, 6) * DAY
+                t0 = time.perf_counter()
+                try:
+                    conn.execute(
+                        'SELECT id, start_time, end_time, status FROM appointment '
+                        'WHERE business_id = ? AND start_time >= ? AND start_time < ? ORDER BY start_time',
+                        (business_id, day_start, day_start + DAY),
+                    ).fetchall()
+                except sqlite3.OperationalError:
+                    with lock:
+                        stats['locked'] += 1
+                    continue
+                elapsed = (time.perf_counter() - t0) * 1000
+                with lock:
+                    stats['reads'] += 1
+                    stats['read_ms'].append(elapsed)
+            conn.close()
+
+        def writer(seed):
+            rng = random.Random(seed)
+            conn = self._connect(path, config)
+            while time.monotonic() < stop_at:
+                business_id = rng.randint(1, options['businesses'])
+                start = now + rng.randint(1, 14) * DAY + rng.randint(9 * 4, 19 * 4) * 900
+                t0 = time.perf_counter()
+                try:
+                    conn.execute(config['begin'])
+                    overlapping = conn.execute(
+                        "SELECT COUNT(*) FROM appointment WHERE business_id = ? AND start_time < ? "
+                        "AND end_time > ? AND (status IN ('pending', 'confirmed') OR is_block)",
+                        (business_id, start + 1800, start),
+                    ).fetchone()[0]
+                    if overlapping < 2:
+                        conn.execute(
+                            'INSERT INTO appointment (business_id, start_time, end_time, status, is_block, notes) '
+                            "VALUES (?, ?, ?, 'pending', 0, '')",
+                            (business_id, start, start + 1800),
+                        )
+                    conn.execute('COMMIT')
+                except sqlite3.OperationalError:
+                    if conn.in_transaction:
+                        conn.execute('ROLLBACK')
+                    with lock:
+                        stats['locked'] += 1
+                    continue
+                elapsed = (time.perf_counter() - t0) * 1000
+                with lock:
+                    stats['writes' if overlapping < 2 else 'rejected'] += 1
+                    stats['write_ms'].append(elapsed)
+            conn.close()
+
+        threads = [threading.Thread(target=reader, args=(i,)) for i in range(options['readers'])]
+        threads += [threading.Thread(target=writer, args=(1000 + i,)) for i in range(options['writers'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return stats
+
+    def _print(self, mode, stats, seconds):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\nModo: {mode}"))
+        self.stdout.write(
+            f"  Lecturas: {stats['reads'] / seconds:,.0f}/s "
+            f"(p50 {statistics.median(stats['read_ms'] or [0]):.2f} ms, p95 {percentile(stats['read_ms'], 95):.2f} ms)"
+        )
+        self.stdout.write(
+            f"  Reservas: {stats['writes'] / seconds:,.0f}/s, rechazadas por capacidad: {stats['rejected']} "
+            f"(p50 {statistics.median(stats['write_ms'] or [0]):.2f} ms, p95 {percentile(stats['write_ms'], 95):.2f} ms)"
+        )
+        self.stdout.write(f"  Errores 'database is locked': {stats['locked']}")
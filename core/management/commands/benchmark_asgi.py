@@ -0,0 +1,262 @@
+"""
+Compara el throughput concurrente de las vistas públicas async (slots y
+catálogo) servidas por WSGI y por ASGI (saasBarber/asgi.py).
+
+Ambos handlers se ejecutan en el mismo proceso, sin servidor HTTP de por
+medio: WSGI con un pool de --concurrency hilos (como gunicorn con threads) y
+ASGI con --concurrency tareas en un event loop (como uvicorn). Así se compara
+solo el costo de Django en cada modo: bajo WSGI las vistas async se ejecutan
+con async_to_sync en cada hilo; bajo ASGI la caché y el ORM async esperan sin
+bloquear el loop.
+
+--db-latency-ms agrega una espera a cada consulta SQL para simular una base
+de datos en red (en SQLite local las consultas tardan microsegundos) y --cold
+desactiva la caché compartida para que cada petición llegue a la base de datos.
+
+Uso:
+    python manage.py benchmark_asgi --requests 500 --concurrency 20
+    python manage.py benchmark_asgi --cold --db-latency-ms 5
+    python manage.py benchmark_asgi --url /mi-barberia/api/servicios/
+"""
+import asyncio
+import contextlib
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urlsplit
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from django.urls import reverse
+from core.models import Business, Service
+from core.tenancy import _local_cache as tenant_local_cache
+from .loadtest import percentile
+
+COLD_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class SimulatedLatency:
+    """execute_wrapper que espera `seconds` antes de cada consulta."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def __call__(self, execute, sql, params, many, context):
+        time.sleep(self.seconds)
+        return execute(sql, params, many, context)
+
+
+def _request_host():
+    for host in settings.ALLOWED_HOSTS:
+        if host and '*' not in host and not host.startswith('.'):
+            return host
+    return 'localhost'
+
+
+class Command(BaseCommand):
+    help = 'Compara el throughput concurrente de las vistas de slots y catálogo bajo WSGI y ASGI.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=300, help='Peticiones por modo')
+        parser.add_argument('--concurrency', type=int, default=20, help='Peticiones simultáneas')
+        parser.add_argument('--business', default=None, help='Slug del negocio (por defecto el primero con servicios)')
+        parser.add_argument('--url', action='append', default=[],
+                            help='Ruta a probar (se puede repetir; por defecto slots, slots compactos y catálogo)')
+        parser.add_argument('--db-latency-ms', type=float, default=0.0,
+                            help='Espera agregada a cada consulta SQL (simula una base de datos en red)')
+        parser.add_argument('--cold', action='store_true', help='Sin caché compartida (cada petición consulta la BD)')
+        parser.add_argument('--warmup', type=int, default=10, help='Peticiones de calentamiento por modo')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests y --concurrency deben ser mayores que cero.')
+        paths = options['url'] or self._default_paths(options['business'])
+        self.host = _request_host()
+
+        latency = SimulatedLatency(options['db_latency_ms'] / 1000) if options['db_latency_ms'] > 0 else None
+        if latency:
+            self._install_latency(latency)
+
+        self.stdout.write(
+            f"{options['requests']} peticiones por modo, concurrencia {options['concurrency']}, "
+            f"caché {'desactivada' if options['cold'] else 'activa'}, "
+            f"latencia SQL simulada {options['db_latency_ms']:g} ms"
+        )
+        for path in paths:
+            self.stdout.write(f'  {path}')
+
+        results = {}
+        try:
+            with override_settings(CACHES=COLD_CACHES) if options['cold'] else contextlib.nullcontext():
+                for mode, run in (('wsgi', self._run_wsgi), ('asgi', self._run_asgi)):
+                    tenant_local_cache.clear()
+                    run(paths, options['warmup'], options['concurrency'])
+                    results[mode] = run(paths, options['requests'], options['concurrency'])
+        finally:
+            if latency:
+                connection_created.disconnect(self._add_latency_wrapper)
+
+        self._print_results(results)
+
+    # --- Preparación ---
+
+    def _default_paths(self, slug):
+        businesses = Business.objects.filter(is_active=True, services__is_active=True).distinct()
+        if slug:
+            businesses = businesses.filter(slug=slug)
+        business = businesses.order_by('id').first()
+        if business is None:
+            raise CommandError('No hay un negocio activo con servicios (usa --business o --url).')
+        service = Service.objects.filter(business=business, is_active=True).order_by('id').first()
+        date = (business.get_local_today() + timedelta(days=1)).isoformat()
+        slots = reverse('core:available_slots', kwargs={
+            'business_slug': business.slug, 'service_id': service.pk, 'date': date,
+        })
+        return [
+            slots,
+            f'{slots}?format=compact&days=7',
+            reverse('core:service_catalog_api', kwargs={'business_slug': business.slug}),
+        ]
+
+    def _install_latency(self, latency):
+        self._latency = latency
+        # Cada hilo abre su propia conexión: se instala al crearla
+        connection_created.connect(self._add_latency_wrapper)
+        for connection in connections.all(initialized_only=True):
+            connection.execute_wrappers.append(latency)
+
+    def _add_latency_wrapper(self, sender, connection, **kwargs):
+        if self._latency not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self._latency)
+
+    # --- Ejecución ---
+
+    def _run_wsgi(self, paths, total, concurrency):
+        handler = WSGIHandler()
+
+        def request(index):
+            path, _, query = paths[index % len(paths)].partition('?')
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'SCRIPT_NAME': '',
+                'PATH_INFO': path,
+                'QUERY_STRING': query,
+                'SERVER_NAME': self.host,
+                'SERVER_PORT': '80',
+                'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': self.host,
+                'REMOTE_ADDR': '127.0.0.1',
+                'wsgi.version': (1, 0),
+                'wsgi.url_scheme': 'http',
+                'wsgi.input': io.BytesIO(b''),
+                'wsgi.errors': sys.stderr,
+                'wsgi.multithread': True,
+                'wsgi.multiprocess': False,
+                'wsgi.run_once': False,
+            }
+            status = []
+            start = time.perf_counter()
+            response = handler(environ, lambda code, headers, exc_info=None: status.append(int(code.split()[0])))
+            try:
+                for _chunk in response:
+                    pass
+            finally:
+                response.close()
+            return time.perf_counter() - start, status[0]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(request, range(total)))
+        return self._summarize(samples, time.perf_counter() - start)
+
+    def _run_asgi(self, paths, total, concurrency):
+        handler = ASGIHandler()
+        host = self.host.encode()
+
+        async def request(index):
+            target = urlsplit(paths[index % len(paths)])
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': target.path,
+                'raw_path': target.path.encode(),
+                'query_string': target.query.encode(),
+                'root_path': '',
+                'headers': [(b'host', host)],
+                'client': ('127.0.0.1', 50000),
+                'server': (self.host, 80),
+            }
+            done = asyncio.Event()
+            status = []
+            body_sent = False
+
+            async def receive():
+                nonlocal body_sent
+                if not body_sent:
+                    body_sent = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                # Django escucha la desconexión mientras responde
+                await done.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+                elif message['type'] == 'http.response.body' and not message.get('more_body'):
+                    done.set()
+
+            start = time.perf_counter()
+            await handler(scope, receive, send)
+            return time.perf_counter() - start, status[0]
+
+        async def run():
+            pending = iter(range(total))
+            samples = []
+
+            async def worker():
+                for index in pending:
+                    samples.append(await request(index))
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            return samples
+
+        start = time.perf_counter()
+        samples = asyncio.run(run())
+        return self._summarize(samples, time.perf_counter() - start)
+
+    # --- Resultados ---
+
+    def _summarize(self, samples, elapsed):
+        latencies = [latency * 1000 for latency, _status in samples]
+        return {
+            'requests': len(samples),
+            'elapsed': elapsed,
+            'rps': len(samples) / elapsed if elapsed else 0.0,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'errors': sum(1 for _latency, status in samples if status >= 400),
+        }
+
+    def _print_results(self, results):
+        self.stdout.write('')
+        self.stdout.write(f"{'modo':<6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errores':>8}")
+        for mode, result in results.items():
+            self.stdout.write(
+                f"{mode:<6} {result['rps']:>9.1f} {result['p50']:>9.1f} {result['p95']:>9.1f} "
+                f"{result['p99']:>9.1f} {result['errors']:>8}"
+            )
+        if results['wsgi']['rps']:
+            self.stdout.write(f"\nASGI/WSGI throughput: {results['asgi']['rps'] / results['wsgi']['rps']:.2f}x")
+        if any(result['errors'] for result in results.values()):
+            self.stderr.write(self.style.WARNING('Hubo respuestas con error (status >= 400).'))
+
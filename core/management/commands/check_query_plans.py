@@ -0,0 +1,95 @@
+"""
+Verifica con EXPLAIN que las consultas críticas de citas usen índices.
+
+Falla (código de salida 1) si alguna consulta recorre completa la tabla de
+citas, para usarlo en CI o después de cambiar índices o consultas.
+core/tests/test_query_plans.py hace la misma verificación en `manage.py test`.
+
+Uso:
+    python manage.py check_query_plans
+    python manage.py check_query_plans --verbose     # mostrar los planes
+"""
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.utils import timezone
+from core.models import Appointment
+from core.services import active_bookings, filter_overlapping, local_day_range
+
+
+def hot_queries(business_id):
+    """Consultas de la ruta crítica, construidas igual que en services/views."""
+    now = timezone.now()
+    day_start, day_end = local_day_range(timezone.localdate())
+    appointments = Appointment.objects.filter(business_id=business_id)
+    return {
+        'disponibilidad del día': filter_overlapping(
+            active_bookings(appointments), day_start, day_end
+        ).only('start_time', 'end_time').order_by('start_time'),
+        'verificación de slot': filter_overlapping(
+            active_bookings(appointments), now, now + timedelta(minutes=30)
+        ).only('start_time', 'end_time'),
+        'solapamiento de bloqueo': filter_overlapping(
+            active_bookings(appointments).filter(is_block=False), now, now + timedelta(hours=1)
+        ),
+        'citas del dashboard': appointments.filter(
+            start_time__gte=day_start, start_time__lt=day_end
+        ).select_related('client', 'service').order_by('start_time'),
+    }
+
+
+def disable_seqscan(connection):
+    """
+    En PostgreSQL, con tablas chicas el planner prefiere el seq scan aunque
+    exista un índice; se desactiva (hasta el fin de la transacción) para ver
+    si el índice es utilizable.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+
+def is_full_scan(vendor, plan, table):
+    """True si el plan de EXPLAIN recorre completa la tabla `table`."""
+    for line in plan.splitlines():
+        if vendor == 'sqlite':
+            # "SCAN tabla" (o "SCAN tabla USING COVERING INDEX") recorre todo;
+            # las búsquedas por índice aparecen como "SEARCH tabla USING ..."
+            if line.split(' ', 3)[-1].startswith(f'SCAN {table}'):
+                return True
+        elif vendor == 'postgresql':
+            if f'Seq Scan on {table}' in line:
+                return True
+    return False
+
+
+class Command(BaseCommand):
+    help = 'Falla si alguna consulta crítica de citas hace un recorrido completo de la tabla.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--business-id', type=int, default=1)
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--verbose', action='store_true', help='Mostrar el plan de cada consulta')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        table = Appointment._meta.db_table
+        failures = []
+
+        with transaction.atomic(using=options['database']):
+            disable_seqscan(connection)
+
+            for name, queryset in hot_queries(options['business_id']).items():
+                plan = queryset.using(options['database']).explain()
+                full_scan = is_full_scan(connection.vendor, plan, table)
+                if full_scan:
+                    failures.append(name)
+                    self.stdout.write(self.style.ERROR(f"✗ {name}: recorrido completo de {table}"))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f"✓ {name}"))
+                if options['verbose'] or full_scan:
+                    for line in plan.splitlines():
+                        self.stdout.write(f"    {line}")
+
+        if failures:
+            raise CommandError(f"{len(failures)} consulta(s) sin índice: {', '.join(failures)}")
@@ -0,0 +1,382 @@
+"""
+Presupuestos de consultas SQL y de latencia para cada URL de core/urls.py.
+
+Crea una base de datos de prueba (como `manage.py test`), genera los mismos
+datos a varias escalas (por defecto 10 y 1,000 citas) y ejecuta cada vista con
+el cliente de pruebas de Django. Falla si una vista:
+
+- ejecuta más consultas que su presupuesto,
+- ejecuta más consultas con más datos (N+1),
+- tarda más que su presupuesto de latencia (mediana de --repeat ejecuciones),
+- tarda mucho más con más datos (más de LATENCY_GROWTH_FACTOR veces).
+
+Cada petición corre en una transacción que se revierte y con la caché vacía,
+así todas las ejecuciones parten del mismo estado (caché fría).
+core/tests/test_view_budgets.py comprueba la misma tabla en `manage.py test`.
+
+Uso:
+    python manage.py check_view_budgets
+    python manage.py check_view_budgets --report               # tabla con todos los resultados
+    python manage.py check_view_budgets --scales 10 1000 5000 --latency-factor 2
+"""
+import contextlib
+import io
+import json
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, time as dt_time
+from zoneinfo import ZoneInfo
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_databases, setup_test_environment,
+    teardown_databases, teardown_test_environment,
+)
+from django.urls import reverse
+from core.models import Appointment, Business, CustomUser, GalleryImage, Service
+from core.tenancy import _local_cache as tenant_local_cache
+
+# Presupuesto por vista: consultas máximas y latencia máxima (ms, en SQLite local).
+# Los presupuestos de consultas son los valores actuales y el test los exige
+# exactos: si una vista necesita más, hay que justificarlo y subirlo aquí (y
+# bajarlo si una optimización ahorra consultas).
+# `user` indica con qué usuario se hace la petición (None = anónimo), `global`
+# marca las URLs que no llevan el slug del negocio y `scales_with_data` las que
+# por diseño tardan más con más datos (la exportación recorre todas las citas).
+# `row_lock_queries` son las consultas de más donde booking_atomic bloquea la
+# fila del negocio con SELECT ... FOR UPDATE (PostgreSQL; SQLite no lo admite).
+VIEW_BUDGETS = [
+    {'name': 'home', 'url': 'core:home', 'user': None, 'global': True, 'max_queries': 0, 'max_ms': 50},
+    {'name': 'login_redirect', 'url': 'core:login_redirect', 'user': 'owner', 'global': True,
+     'max_queries': 3, 'max_ms': 50},
+    {'name': 'business_home', 'url': 'core:business_home', 'user': None, 'max_queries': 3, 'max_ms': 100},
+    {'name': 'business_home (slots)', 'url': 'core:business_home', 'user': None, 'max_queries': 6, 'max_ms': 150,
+     'query': lambda f: {'service': f['service'].pk, 'date': f['booking_date'].isoformat()}},
+    {'name': 'client_booking (legacy)', 'url': 'core:client_booking', 'user': None, 'max_queries': 3, 'max_ms': 100},
+    {'name': 'create_appointment', 'url': 'core:create_appointment', 'user': 'client', 'method': 'post',
+     'max_queries': 15, 'row_lock_queries': 1, 'max_ms': 150,
+     'data': lambda f: {'service_id': f['service'].pk, 'start_time': f['booking_start']}},
+    {'name': 'slots_api', 'url': 'core:get_available_slots_api', 'user': None, 'method': 'post', 'json': True,
+     'max_queries': 4, 'max_ms': 100,
+     'data': lambda f: {'service_id': f['service'].pk, 'date': f['booking_date'].isoformat()}},
+    {'name': 'slots_api (compact)', 'url': 'core:get_available_slots_api', 'user': None, 'method': 'post',
+     'json': True, 'max_queries': 4, 'max_ms': 100,
+     'data': lambda f: {'service_id': f['service'].pk, 'date': f['booking_date'].isoformat(),
+                        'format': 'compact', 'days': 14}},
+    {'name': 'available_slots (GET)', 'url': 'core:available_slots', 'user': None, 'max_queries': 4, 'max_ms': 100,
+     'kwargs': lambda f: {'service_id': f['service'].pk, 'date': f['booking_date'].isoformat()}},
+    {'name': 'service_catalog_api', 'url': 'core:service_catalog_api', 'user': None, 'max_queries': 2,
+     'max_ms': 100},
+    {'name': 'dashboard', 'url': 'core:dashboard', 'user': 'owner', 'max_queries': 8, 'max_ms': 250},
+    {'name': 'dashboard_api', 'url': 'core:dashboard_appointments_api', 'user': 'owner', 'max_queries': 9,
+     'max_ms': 200},
+    {'name': 'update_appointment_status', 'url': 'core:update_appointment_status', 'user': 'owner',
+     'method': 'post', 'max_queries': 9, 'max_ms': 100,
+     'kwargs': lambda f: {'appointment_id': f['appointment'].pk}, 'data': lambda f: {'status': 'confirmed'}},
+    {'name': 'block_time', 'url': 'core:block_time', 'user': 'owner', 'max_queries': 3, 'max_ms': 100},
+    {'name': 'block_time (POST)', 'url': 'core:block_time', 'user': 'owner', 'method': 'post',
+     'max_queries': 9, 'row_lock_queries': 1, 'max_ms': 150,
+     'data': lambda f: {'date': f['booking_date'].isoformat(), 'start_time': '12:00', 'end_time': '13:00'}},
+    {'name': 'create_appointment_manual', 'url': 'core:create_appointment_manual', 'user': 'owner',
+     'max_queries': 4, 'max_ms': 100},
+    {'name': 'edit_site', 'url': 'core:edit_site', 'user': 'owner', 'max_queries': 4, 'max_ms': 100},
+    {'name': 'export_appointments', 'url': 'core:export_appointments', 'user': 'owner', 'max_queries': 5,
+     'max_ms': 300, 'scales_with_data': True,
+     'query': lambda f: {'desde': '2000-01-01', 'hasta': f['booking_date'].isoformat()}},
+    {'name': 'update_business_field_api', 'url': 'core:update_business_field_api', 'user': 'owner',
+     'method': 'post', 'json': True, 'max_queries': 4, 'max_ms': 100,
+     'data': lambda f: {'field_name': 'description', 'field_value': 'Presupuesto'}},
+    {'name': 'upload_gallery_image', 'url': 'core:upload_gallery_image', 'user': 'owner', 'method': 'post',
+     'max_queries': 10, 'max_ms': 300,
+     'data': lambda f: {'image': _png_upload(), 'caption': 'Presupuesto'}},
+    {'name': 'delete_gallery_image', 'url': 'core:delete_gallery_image', 'user': 'owner', 'method': 'post',
+     'max_queries': 8, 'max_ms': 100,
+     'kwargs': lambda f: {'image_id': f['gallery_image'].pk}},
+    {'name': 'my_appointments', 'url': 'core:my_appointments', 'user': 'client', 'global': True,
+     'max_queries': 8, 'max_ms': 100},
+    {'name': 'api_business', 'url': 'v1:business-detail', 'user': None, 'global': True,
+     'max_queries': 2, 'max_ms': 100, 'kwargs': lambda f: {'slug': f['business'].slug}},
+    {'name': 'api_appointments (owner)', 'url': 'v1:appointment-list', 'user': 'owner', 'global': True,
+     'max_queries': 4, 'max_ms': 200, 'query': lambda f: {'business': f['business'].slug}},
+    {'name': 'api_appointments (client)', 'url': 'v1:appointment-list', 'user': 'client', 'global': True,
+     'max_queries': 3, 'max_ms': 200},
+    {'name': 'api_batch_status', 'url': 'v1:appointment-batch-status', 'user': 'owner', 'global': True,
+     'method': 'post', 'json': True, 'max_queries': 8, 'max_ms': 150,
+     'data': lambda f: {'business': f['business'].slug, 'operations': [
+         {'id': appointment.pk, 'status': 'completed' if i % 3 else 'no_show'}
+         for i, appointment in enumerate(f['today_appointments'][:10])
+     ]}},
+    {'name': 'api_availability', 'url': 'v1:availability-list', 'user': None, 'global': True,
+     'max_queries': 4, 'max_ms': 150,
+     'query': lambda f: {'business': f['business'].slug, 'service': f['service'].pk,
+                         'date': f['booking_date'].isoformat()}},
+    {'name': 'metrics', 'url': 'metrics', 'user': None, 'global': True, 'max_queries': 0, 'max_ms': 50},
+]
+
+BUSINESS_SLUG = 'presupuesto'
+FIXTURE_DAYS = 14
+
+# Entre la escala menor y la mayor, la latencia de una vista puede crecer como
+# mucho este factor (más un margen para el ruido de las vistas muy rápidas).
+# Atrapa las vistas que recorren o renderizan todas las filas aunque su número
+# de consultas no cambie.
+LATENCY_GROWTH_FACTOR = 4
+LATENCY_GROWTH_SLACK_MS = 10
+
+
+def _png_upload():
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), (200, 40, 40)).save(buffer, format='PNG')
+    return SimpleUploadedFile('presupuesto.png', buffer.getvalue(), content_type='image/png')
+
+
+def build_fixture(appointment_count):
+    """
+    Negocio con servicios, galería, un owner y un cliente con `appointment_count`
+    citas (historial, hoy y próximos días). El volumen crece con la escala y la
+    forma de los datos se mantiene, así las consultas por vista deberían ser las mismas.
+    """
+    owner = CustomUser.objects.create_user(email='owner@presupuesto.invalid', password='x', is_owner=True)
+    client = CustomUser.objects.create_user(email='cliente@presupuesto.invalid', password='x')
+    # Con descanso de 14:00 a 15:00: las vistas de slots recorren días de varios tramos
+    schedule = {
+        day: {'enabled': True, 'intervals': [{'open': '08:00', 'close': '14:00'}, {'open': '15:00', 'close': '20:00'}]}
+        for day in ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+    }
+    business = Business.objects.create(
+        owner=owner, name='Presupuesto', slug=BUSINESS_SLUG, schedule_config=schedule, capacity=4,
+    )
+    services = [
+        Service.objects.create(business=business, name=f'Servicio {i}', duration_minutes=30, price=100 + i)
+        for i in range(5)
+    ]
+    gallery_image = GalleryImage.objects.create(business=business, image='gallery/presupuesto.png')
+
+    tz = ZoneInfo(business.timezone)
+    today = business.get_local_today()
+    slots_per_day = 12 * 4  # 08:00 a 20:00 en intervalos de 15 minutos
+    today_count = max(2, appointment_count // 20)
+    past_count = (appointment_count - today_count) * 2 // 5
+    appointments = []
+    for i in range(appointment_count):
+        if i < today_count:
+            day = today
+            status = 'confirmed'
+        elif i < today_count + past_count:
+            day = today - timedelta(days=1 + i % 365)
+            status = 'completed' if i % 5 else 'cancelled'
+        else:
+            day = today + timedelta(days=1 + i % FIXTURE_DAYS)
+            status = 'pending' if i % 2 else 'confirmed'
+        start = datetime.combine(day, dt_time(8, 0), tzinfo=tz) + timedelta(minutes=15 * (i % slots_per_day))
+        service = services[i % len(services)]
+        appointments.append(Appointment(
+            business=business, client=client, service=service, status=status,
+            start_time=start, end_time=start + timedelta(minutes=service.duration_minutes),
+            is_block=(i % 50 == 49),
+        ))
+    Appointment.objects.bulk_create(appointments, batch_size=500)
+
+    # Día sin citas para reservar y bloquear
+    booking_date = today + timedelta(days=FIXTURE_DAYS + 2)
+    return {
+        'owner': owner,
+        'client': client,
+        'business': business,
+        'service': services[0],
+        'appointment': appointments[0],
+        'today_appointments': appointments[:today_count],
+        'gallery_image': gallery_image,
+        'booking_date': booking_date,
+        'booking_start': f'{booking_date.isoformat()} 10:00',
+    }
+
+
+def budget_settings(media_root):
+    """Ajustes con los que se miden las vistas: caché local, sin métricas ni perfiles."""
+    return override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                            'LOCATION': 'view-budgets'}},
+        MEDIA_ROOT=media_root,
+        METRICS_DIR='',
+        METRICS_TOKEN='',
+        # /metrics/ anónimo, como con DEBUG (manage.py test corre con DEBUG=False)
+        METRICS_PUBLIC=True,
+        REQUEST_PROFILING=False,
+    )
+
+
+def budget_clients(fixture):
+    """Un cliente de pruebas por valor de `user` (None = anónimo)."""
+    clients = {None: Client()}
+    for role in ('owner', 'client'):
+        clients[role] = Client()
+        clients[role].force_login(fixture[role])
+    return clients
+
+
+def request_view(budget, fixture, client):
+    """
+    Hace la petición de `budget` con la caché vacía. Las respuestas en
+    streaming se consumen: sus consultas ocurren al leerlas.
+    """
+    kwargs = budget['kwargs'](fixture) if 'kwargs' in budget else {}
+    if not budget.get('global'):
+        kwargs['business_slug'] = fixture['business'].slug
+    url = reverse(budget['url'], kwargs=kwargs)
+    data = budget['data'](fixture) if 'data' in budget else budget['query'](fixture) if 'query' in budget else {}
+    method = budget.get('method', 'get')
+    request_kwargs = {}
+    if budget.get('json'):
+        data = json.dumps(data)
+        request_kwargs['content_type'] = 'application/json'
+
+    cache.clear()
+    tenant_local_cache.clear()
+    # Los recordatorios se "programan" con print(); no ensuciar la salida
+    with contextlib.redirect_stdout(io.StringIO()):
+        response = getattr(client, method)(url, data, **request_kwargs)
+        if response.streaming:
+            b''.join(response.streaming_content)
+    return response
+
+
+def query_budget(budget, connection):
+    """Consultas máximas de la vista en el motor de `connection`."""
+    if connection.features.has_select_for_update:
+        return budget['max_queries'] + budget.get('row_lock_queries', 0)
+    return budget['max_queries']
+
+
+def latency_growth_exceeded(budget, few_ms, many_ms):
+    """True si la vista tarda demasiado más en la escala mayor que en la menor."""
+    if budget.get('scales_with_data'):
+        return False
+    return many_ms > few_ms * LATENCY_GROWTH_FACTOR + LATENCY_GROWTH_SLACK_MS
+
+
+class Command(BaseCommand):
+    help = 'Verifica los presupuestos de consultas SQL y latencia de cada vista a varias escalas de datos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', type=int, nargs='+', default=[10, 1000],
+                            help='Número de citas del fixture en cada escala')
+        parser.add_argument('--repeat', type=int, default=5, help='Ejecuciones por vista (se usa la mediana)')
+        parser.add_argument('--latency-factor', type=float, default=1.0,
+                            help='Multiplicador de los presupuestos de latencia (máquinas lentas, CI)')
+        parser.add_argument('--report', action='store_true', help='Mostrar la tabla con todos los resultados')
+        parser.add_argument('--view', action='append', dest='views', help='Solo estas vistas (repetible)')
+
+    def handle(self, *args, **options):
+        budgets = [b for b in VIEW_BUDGETS if not options['views'] or b['name'] in options['views']]
+        if not budgets:
+            raise CommandError('Ninguna vista coincide con --view.')
+        scales = sorted(set(options['scales']))
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        media_root = tempfile.mkdtemp(prefix='budgets-media-')
+        results = {}
+        try:
+            with budget_settings(media_root):
+                for scale in scales:
+                    results[scale] = self._run_scale(scale, budgets, options['repeat'])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+            shutil.rmtree(media_root, ignore_errors=True)
+
+        failures = self._check(budgets, scales, results, options['latency_factor'])
+        if options['report']:
+            self._print_report(budgets, scales, results, options['latency_factor'])
+        if failures:
+            for failure in failures:
+                self.stdout.write(self.style.ERROR(f"✗ {failure}"))
+            raise CommandError(f"{len(failures)} presupuesto(s) excedido(s).")
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {len(budgets)} vistas dentro de presupuesto (escalas: {', '.join(map(str, scales))})"
+        ))
+
+    def _run_scale(self, scale, budgets, repeat):
+        results = {}
+        with transaction.atomic():
+            fixture = build_fixture(scale)
+            clients = budget_clients(fixture)
+
+            for budget in budgets:
+                queries, durations, status = [], [], None
+                for _ in range(repeat):
+                    count, elapsed, status = self._measure(budget, fixture, clients[budget['user']])
+                    queries.append(count)
+                    durations.append(elapsed)
+                results[budget['name']] = {
+                    'queries': max(queries),
+                    'ms': statistics.median(durations),
+                    'status': status,
+                }
+            transaction.set_rollback(True)
+        return results
+
+    def _measure(self, budget, fixture, client):
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = request_view(budget, fixture, client)
+                elapsed = (time.perf_counter() - start) * 1000
+            transaction.set_rollback(True)
+        if response.status_code >= 400:
+            request = response.request
+            raise CommandError(
+                f"{budget['name']}: {request['REQUEST_METHOD']} {request['PATH_INFO']} respondió {response.status_code}"
+            )
+        return len(captured), elapsed, response.status_code
+
+    def _check(self, budgets, scales, results, latency_factor):
+        failures = []
+        smallest, largest = scales[0], scales[-1]
+        for budget in budgets:
+            name = budget['name']
+            for scale in scales:
+                result = results[scale][name]
+                max_queries = query_budget(budget, connection)
+                if result['queries'] > max_queries:
+                    failures.append(f"{name} @ {scale}: {result['queries']} consultas (máx. {max_queries})")
+                max_ms = budget['max_ms'] * latency_factor
+                if result['ms'] > max_ms:
+                    failures.append(f"{name} @ {scale}: {result['ms']:.0f} ms (máx. {max_ms:.0f} ms)")
+            few, many = results[smallest][name]['queries'], results[largest][name]['queries']
+            if many > few:
+                failures.append(
+                    f"{name}: las consultas crecen con los datos ({few} @ {smallest} → {many} @ {largest}), posible N+1"
+                )
+            few_ms, many_ms = results[smallest][name]['ms'], results[largest][name]['ms']
+            if smallest != largest and latency_growth_exceeded(budget, few_ms, many_ms):
+                failures.append(
+                    f"{name}: la latencia crece con los datos ({few_ms:.0f} ms @ {smallest} → "
+                    f"{many_ms:.0f} ms @ {largest}, máx. ×{LATENCY_GROWTH_FACTOR})"
+                )
+        return failures
+
+    def _print_report(self, budgets, scales, results, latency_factor):
+        header = f"{'Vista':<28}{'Estado':>7}"
+        for scale in scales:
+            header += f"{f'Q@{scale}':>9}{f'ms@{scale}':>11}"
+        header += f"{'Q máx':>7}{'ms máx':>8}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for budget in budgets:
+            name = budget['name']
+            row = f"{name:<28}{results[scales[-1]][name]['status']:>7}"
+            for scale in scales:
+                result = results[scale][name]
+                row += f"{result['queries']:>9}{result['ms']:>11.1f}"
+            row += f"{query_budget(budget, connection):>7}{budget['max_ms'] * latency_factor:>8.0f}"
+            self.stdout.write(row)
+        self.stdout.write('')
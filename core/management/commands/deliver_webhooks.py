@@ -0,0 +1,33 @@
+"""
+Worker de entrega de webhooks.
+
+Uso:
+    python manage.py deliver_webhooks            # bucle continuo
+    python manage.py deliver_webhooks --once     # una sola pasada (cron)
+"""
+import time
+from django.core.management.base import BaseCommand
+from core.webhooks import deliver_pending_events
+
+
+class Command(BaseCommand):
+    help = 'Entrega los eventos de webhook pendientes en lotes por endpoint.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Procesar una sola pasada y salir')
+        parser.add_argument('--interval', type=float, default=2.0, help='Segundos entre pasadas cuando no hay eventos')
+        parser.add_argument('--limit', type=int, default=500, help='Máximo de eventos por pasada')
+        parser.add_argument('--batch-size', type=int, default=None, help='Máximo de eventos por petición HTTP')
+
+    def handle(self, *args, **options):
+        while True:
+            stats = deliver_pending_events(limit=options['limit'], batch_size=options['batch_size'])
+            processed = sum(stats.values())
+            if processed:
+                self.stdout.write(
+                    f"Entregados: {stats['delivered']} | Reintentos: {stats['retried']} | Fallidos: {stats['dead']}"
+                )
+            if options['once']:
+                break
+            if not processed:
+                time.sleep(options['interval'])
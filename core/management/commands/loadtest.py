@@ -0,0 +1,372 @@
+"""
+Prueba de carga de punta a punta del flujo de reservas.
+
+Levanta el servidor local (o usa uno existente con --url) y simula tráfico:
+visitantes que cargan la landing del negocio, consultan slots y reservan, y
+owners que hacen polling de la API del dashboard. Al final reporta
+throughput, latencias p50/p95/p99 y errores por endpoint, verifica que no haya
+sobre-reservas (más citas simultáneas que la capacidad del negocio) y puede
+escribir un resumen JSON para comparar entre versiones.
+
+Los clientes y sesiones de la prueba se crean directamente en la base de datos
+(el servidor debe usar la misma), para no medir el hash de contraseñas.
+
+Uso:
+    python manage.py loadtest --duration 30 --concurrency 20
+    python manage.py loadtest --mix browse=40,slots=40,book=10,dashboard=10 --output carga.json
+    python manage.py loadtest --url http://127.0.0.1:8000 --businesses mi-barberia
+"""
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from importlib import import_module
+from urllib.parse import urlencode
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from core.models import Appointment, Business, CustomUser, Service
+from core.services import active_bookings, delete_appointments
+
+LOADTEST_EMAIL_DOMAIN = 'loadtest.invalid'
+DEFAULT_MIX = 'browse=40,slots=35,book=10,dashboard=15'
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in ('browse', 'slots', 'book', 'dashboard'):
+            raise CommandError(f"Escenario desconocido en --mix: {name}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+class Stats:
+    """Latencias y errores por endpoint, seguros entre hilos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_samples = defaultdict(list)
+        self.bookings = defaultdict(int)
+
+    def record(self, endpoint, latency, error=None):
+        with self._lock:
+            self.latencies[endpoint].append(latency)
+            if error:
+                self.errors[endpoint] += 1
+                if len(self.error_samples[endpoint]) < 5:
+                    self.error_samples[endpoint].append(error)
+
+    def booking(self, result):
+        with self._lock:
+            self.bookings[result] += 1
+
+
+class Command(BaseCommand):
+    help = 'Genera tráfico realista contra el flujo de reservas y reporta latencias, errores y sobre-reservas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default=None, help='Servidor a probar (por defecto levanta runserver)')
+        parser.add_argument('--port', type=int, default=8765, help='Puerto para el runserver local')
+        parser.add_argument('--duration', type=float, default=20.0, help='Segundos de carga')
+        parser.add_argument('--concurrency', type=int, default=10, help='Usuarios virtuales simultáneos')
+        parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Pesos de cada escenario (por defecto {DEFAULT_MIX})')
+        parser.add_argument('--businesses', default='', help='Slugs separados por coma (por defecto hasta 5 negocios activos)')
+        parser.add_argument('--clients', type=int, default=50, help='Clientes de prueba con sesión iniciada')
+        parser.add_argument('--days', type=int, default=7, help='Días hacia adelante en que se buscan slots')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--output', default=None, help='Archivo JSON con el resumen')
+        parser.add_argument('--cleanup', action='store_true', help='Eliminar clientes y reservas de prueba al terminar')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.mix = parse_mix(options['mix'])
+        self.days = options['days']
+        self.targets = self._prepare_targets(options['businesses'])
+        self.client_cookies = self._prepare_client_sessions(options['clients'])
+        for target in self.targets:
+            target['cookie'] = self._session_cookie(target['owner'])
+
+        server = None
+        base_url = options['url']
+        if not base_url:
+            server, base_url = self._start_server(options['port'])
+        self.base_url = base_url.rstrip('/')
+
+        started_at = timezone.now()
+        self.stdout.write(
+            f"Carga contra {self.base_url}: {options['concurrency']} usuarios, {options['duration']}s, "
+            f"negocios: {', '.join(t['slug'] for t in self.targets)}"
+        )
+        stats = Stats()
+        try:
+            self._run(stats, options['concurrency'], options['duration'])
+        finally:
+            if server:
+                server.terminate()
+                server.wait(timeout=10)
+
+        summary = self._summarize(stats, options, started_at)
+        self._print_summary(summary)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(summary, file, indent=2, default=str)
+            self.stdout.write(f"Resumen escrito en {options['output']}")
+        if options['cleanup']:
+            # Citas de prueba con DELETE directo (invalida la disponibilidad por negocio)
+            deleted = delete_appointments(
+                Appointment.objects.filter(client__email__endswith=f'@{LOADTEST_EMAIL_DOMAIN}')
+            )
+            deleted += CustomUser.objects.filter(email__endswith=f'@{LOADTEST_EMAIL_DOMAIN}').delete()[0]
+            self.stdout.write(f"Eliminados {deleted} registros de prueba")
+        if summary['overbooking']['violations']:
+            raise CommandError(f"Sobre-reservas detectadas: {summary['overbooking']['violations']}")
+
+    # --- Preparación ---
+
+    def _prepare_targets(self, slugs):
+        queryset = Business.objects.filter(is_active=True).select_related('owner')
+        if slugs:
+            queryset = queryset.filter(slug__in=[s.strip() for s in slugs.split(',') if s.strip()])
+        else:
+            queryset = queryset.filter(services__is_active=True).distinct()[:5]
+        targets = []
+        for business in queryset:
+            service_ids = list(Service.objects.filter(business=business, is_active=True).values_list('id', flat=True))
+            if service_ids:
+                targets.append({'slug': business.slug, 'id': business.id, 'owner': business.owner,
+                                'services': service_ids, 'capacity': business.capacity or 1})
+        if not targets:
+            raise CommandError('No hay negocios activos con servicios para la prueba.')
+        return targets
+
+    def _prepare_client_sessions(self, count):
+        emails = [f'cliente{i}@{LOADTEST_EMAIL_DOMAIN}' for i in range(count)]
+        existing = set(CustomUser.objects.filter(email__in=emails).values_list('email', flat=True))
+        new_users = []
+        for email in emails:
+            if email not in existing:
+                user = CustomUser(email=email, first_name='Carga')
+                user.set_unusable_password()
+                new_users.append(user)
+        CustomUser.objects.bulk_create(new_users)
+        return [self._session_cookie(user) for user in CustomUser.objects.filter(email__in=emails)]
+
+    def _session_cookie(self, user):
+        """Crea una sesión autenticada directamente en el backend de sesiones."""
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        return f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+
+    def _start_server(self, port):
+        with socket.socket() as sock:
+            if sock.connect_ex(('127.0.0.1', port)) == 0:
+                raise CommandError(f"El puerto {port} ya está en uso; usa --port o --url.")
+        manage_py = os.path.join(settings.BASE_DIR, 'manage.py')
+        server = subprocess.Popen(
+            [sys.executable, manage_py, 'runserver', '--noreload', f'127.0.0.1:{port}'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        base_url = f'http://127.0.0.1:{port}'
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                urllib.request.urlopen(f'{base_url}/', timeout=2).close()
+                return server, base_url
+            except urllib.error.HTTPError:
+                return server, base_url
+            except OSError:
+                time.sleep(0.3)
+        server.terminate()
+        raise CommandError('El servidor local no respondió en 30 segundos.')
+
+    # --- Tráfico ---
+
+    def _request(self, stats, endpoint, path, data=None, json_body=None, cookie=None):
+        headers = {'User-Agent': 'saasbarber-loadtest'}
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        elif data is not None:
+            body = urlencode(data).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if cookie:
+            headers['Cookie'] = cookie
+        request = urllib.request.Request(self.base_url + path, data=body, headers=headers)
+
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                content = response.read()
+                status = response.status
+            error = None if status < 400 else f'HTTP {status}'
+        except urllib.error.HTTPError as e:
+            content, status, error = e.read(), e.code, f'HTTP {e.code}'
+        except OSError as e:
+            content, status, error = b'', 0, str(e)
+        stats.record(endpoint, (time.perf_counter() - start) * 1000, error)
+        return status, content
+
+    def _random_date(self, rng):
+        return (timezone.localdate() + timedelta(days=rng.randint(0, self.days - 1))).isoformat()
+
+    def _scenario_browse(self, stats, rng, target):
+        self._request(stats, 'landing', f"/{target['slug']}/")
+
+    def _fetch_slots(self, stats, rng, target, service_id):
+        status, content = self._request(
+            stats, 'slots', f"/{target['slug']}/api/slots/",
+            json_body={'service_id': service_id, 'date': self._random_date(rng)},
+        )
+        if status != 200:
+            return []
+        try:
+            return json.loads(content).get('slots', [])
+        except ValueError:
+            return []
+
+    def _scenario_slots(self, stats, rng, target):
+        self._fetch_slots(stats, rng, target, rng.choice(target['services']))
+
+    def _scenario_book(self, stats, rng, target):
+        service_id = rng.choice(target['services'])
+        slots = self._fetch_slots(stats, rng, target, service_id)
+        if not slots:
+            stats.booking('no_slots')
+            return
+        # Preferir los primeros slots aumenta la contención, que es lo que se quiere probar
+        slot = slots[min(int(rng.expovariate(0.5)), len(slots) - 1)]
+        status, content = self._request(
+            stats, 'book', f"/{target['slug']}/crear/",
+            data={'service_id': service_id, 'start_time': slot['datetime'], 'notes': 'loadtest'},
+            cookie=rng.choice(self.client_cookies),
+        )
+        try:
+            result = json.loads(content)
+        except ValueError:
+            stats.booking('error')
+            return
+        if result.get('success'):
+            stats.booking('created')
+        elif 'disponible' in result.get('error', ''):
+            stats.booking('unavailable')
+        else:
+            stats.booking('error')
+
+    def _scenario_dashboard(self, stats, rng, target):
+        self._request(
+            stats, 'dashboard_api', f"/{target['slug']}/dashboard/api/appointments/?date={self._random_date(rng)}",
+            cookie=target['cookie'],
+        )
+
+    def _run(self, stats, concurrency, duration):
+        scenarios = list(self.mix)
+        weights = [self.mix[name] for name in scenarios]
+        deadline = time.monotonic() + duration
+        seeds = [self.rng.random() for _ in range(concurrency)]
+
+        def virtual_user(seed):
+            rng = random.Random(seed)
+            while time.monotonic() < deadline:
+                scenario = rng.choices(scenarios, weights)[0]
+                target = rng.choice(self.targets)
+                getattr(self, f'_scenario_{scenario}')(stats, rng, target)
+
+        self.run_started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(virtual_user, seeds))
+        self.run_seconds = time.monotonic() - self.run_started
+
+    # --- Resultados ---
+
+    def _check_overbooking(self):
+        """Busca instantes con más citas activas simultáneas que la capacidad."""
+        now = timezone.now()
+        violations = []
+        for target in self.targets:
+            rows = active_bookings(Appointment.objects.filter(business_id=target['id'])).filter(
+                end_time__gt=now, start_time__lt=now + timedelta(days=self.days + 1)
+            ).values_list('start_time', 'end_time')
+            events = sorted(
+                [(start, 1) for start, _ in rows] + [(end, -1) for _, end in rows],
+                key=lambda event: (event[0], event[1]),
+            )
+            concurrent = 0
+            for moment, delta in events:
+                concurrent += delta
+                if concurrent > target['capacity']:
+                    violations.append({'business': target['slug'], 'at': moment.isoformat(),
+                                       'concurrent': concurrent, 'capacity': target['capacity']})
+        return violations
+
+    def _summarize(self, stats, options, started_at):
+        elapsed = max(self.run_seconds, 1e-6)
+        endpoints = {}
+        for endpoint, latencies in sorted(stats.latencies.items()):
+            errors = stats.errors[endpoint]
+            endpoints[endpoint] = {
+                'requests': len(latencies),
+                'rps': round(len(latencies) / elapsed, 2),
+                'errors': errors,
+                'error_rate': round(errors / len(latencies), 4) if latencies else 0,
+                'mean_ms': round(statistics.fmean(latencies), 2) if latencies else 0,
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'error_samples': stats.error_samples[endpoint],
+            }
+        total_requests = sum(e['requests'] for e in endpoints.values())
+        violations = self._check_overbooking()
+        return {
+            'started_at': started_at,
+            'target': self.base_url,
+            'config': {key: options[key] for key in ('duration', 'concurrency', 'mix', 'clients', 'days', 'seed')},
+            'businesses': [t['slug'] for t in self.targets],
+            'duration_s': round(elapsed, 2),
+            'total_requests': total_requests,
+            'total_rps': round(total_requests / elapsed, 2),
+            'endpoints': endpoints,
+            'bookings': dict(stats.bookings),
+            'overbooking': {'violations': len(violations), 'samples': violations[:20]},
+        }
+
+    def _print_summary(self, summary):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\n{summary['total_requests']} peticiones en {summary['duration_s']}s ({summary['total_rps']} req/s)"
+        ))
+        self.stdout.write(f"{'endpoint':<15}{'req':>8}{'req/s':>9}{'err%':>8}{'p50':>9}{'p95':>9}{'p99':>9}")
+        for name, data in summary['endpoints'].items():
+            self.stdout.write(
+                f"{name:<15}{data['requests']:>8}{data['rps']:>9.1f}{data['error_rate'] * 100:>7.1f}%"
+                f"{data['p50_ms']:>9.1f}{data['p95_ms']:>9.1f}{data['p99_ms']:>9.1f}"
+            )
+        self.stdout.write(f"Reservas: {summary['bookings']}")
+        violations = summary['overbooking']['violations']
+        style = self.style.ERROR if violations else self.style.SUCCESS
+        self.stdout.write(style(f"Sobre-reservas: {violations}"))
@@ -0,0 +1,34 @@
+"""
+Procesa imágenes de galería pendientes (o todas con --all).
+
+Uso:
+    python manage.py process_gallery_images
+    python manage.py process_gallery_images --all --business barber-paco
+"""
+from django.core.management.base import BaseCommand
+from core.images import process_gallery_image
+from core.models import GalleryImage
+
+
+class Command(BaseCommand):
+    help = 'Genera las variantes redimensionadas de las imágenes de galería pendientes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Reprocesar también las imágenes ya procesadas')
+        parser.add_argument('--business', help='Slug del negocio a procesar')
+
+    def handle(self, *args, **options):
+        images = GalleryImage.objects.all()
+        if not options['all']:
+            images = images.exclude(processing_status='ready')
+        if options['business']:
+            images = images.filter(business__slug=options['business'])
+
+        image_ids = list(images.values_list('id', flat=True))
+        ok = 0
+        for i, image_id in enumerate(image_ids, start=1):
+            if process_gallery_image(image_id):
+                ok += 1
+            self.stdout.write(f"[{i}/{len(image_ids)}] imagen {image_id}")
+
+        self.stdout.write(self.style.SUCCESS(f"Procesadas: {ok} | Con error: {len(image_ids) - ok}"))
@@ -0,0 +1,300 @@
+"""
+Cambios de horario y zona horaria para muchos negocios a la vez.
+
+Reemplaza los scripts de un solo negocio (actualizar_horario_*.py,
+actualizar_timezone_*.py): selecciona negocios por slug, filtro o CSV, valida
+los cambios y los escribe con bulk_update en lotes transaccionales. Al final
+de cada lote invalida en bloque la caché de tenant y las páginas públicas.
+
+Selección (se pueden combinar):
+    --slug barber-paco --slug otra       negocios concretos
+    --filter timezone=America/Tijuana    lookups del ORM sobre Business
+    --all                                todos los negocios
+    --csv cambios.csv                    columnas: slug y opcionalmente timezone,
+                                         monday..sunday ("09:00-20:00", "09:00-14:00,15:00-20:00",
+                                         "cerrado" o vacío = sin cambio)
+
+Cambios (se aplican a todos los seleccionados, después de los del CSV):
+    --timezone America/Monterrey
+    --day sunday=cerrado --day saturday=10:00-14:00
+    --day monday=09:00-14:00,15:00-20:00     varios tramos (descanso de comida)
+    --close 20:00 [--days monday,tuesday]    cambiar solo apertura (primer tramo) o cierre
+                                             (último tramo) de los días abiertos
+
+Los días que se modifican quedan en el formato {"enabled", "intervals"}.
+
+Ejemplos:
+    python manage.py schedules --slug barber-paco --close 20:00 --dry-run
+    python manage.py schedules --filter timezone=America/Mexico_City --timezone America/Monterrey
+    python manage.py schedules --csv horarios.csv --batch-size 2000
+"""
+import copy
+import csv
+import time
+from django.core.exceptions import FieldError, ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from core.caching import bump_content_versions
+from core.models import (
+    SCHEDULE_DAYS, SCHEDULE_TIME_RE, Business, schedule_day_intervals, validate_schedule_config, validate_timezone,
+)
+from core.tenancy import invalidate_business
+
+CLOSED_VALUES = ('cerrado', 'closed', 'off')
+
+
+def parse_day_value(value):
+    """
+    "09:00-20:00"             -> {'enabled': True, 'intervals': [{'open': '09:00', 'close': '20:00'}]}
+    "09:00-14:00,15:00-20:00" -> dos tramos
+    "cerrado"                 -> {'enabled': False}
+    """
+    value = value.strip().lower()
+    if value in CLOSED_VALUES:
+        return {'enabled': False}
+    intervals = []
+    for part in value.split(','):
+        open_time, sep, close_time = part.partition('-')
+        if not sep:
+            raise ValueError(f'"{value}": usa HH:MM-HH:MM[,HH:MM-HH:MM] o "cerrado"')
+        intervals.append({'open': open_time.strip(), 'close': close_time.strip()})
+    return {'enabled': True, 'intervals': intervals}
+
+
+def normalize_day(config):
+    """Día en formato {"enabled", "intervals"} (convierte el par open/close anterior)."""
+    config = config or {}
+    if 'intervals' in config:
+        return {'enabled': config.get('enabled', False), 'intervals': config['intervals']}
+    return {
+        'enabled': config.get('enabled', False),
+        'intervals': [{'open': config.get('open', '09:00'), 'close': config.get('close', '18:00')}],
+    }
+
+
+def format_day(config):
+    """"09:00-14:00, 15:00-20:00", "cerrado" o None si el día no está configurado."""
+    if not config:
+        return None
+    intervals = schedule_day_intervals(config)
+    if not intervals:
+        return 'cerrado'
+    return ', '.join(f'{open_time}-{close_time}' for open_time, close_time in intervals)
+
+
+def apply_changes(business, changes):
+    """
+    Retorna (schedule_config, timezone) nuevos de `business` con los cambios
+    aplicados. No modifica la instancia.
+    """
+    schedule = copy.deepcopy(business.schedule_config or business.get_default_schedule())
+    for day, day_change in changes.get('days', {}).items():
+        day_config = normalize_day(schedule.get(day))
+        day_config.update(day_change)
+        schedule[day] = day_config
+    for day in changes.get('hours_days') or SCHEDULE_DAYS:
+        config = schedule.get(day)
+        if not config or not config.get('enabled', False):
+            continue
+        if not (changes.get('open') or changes.get('close')):
+            continue
+        config = schedule[day] = normalize_day(config)
+        if not config['intervals']:
+            continue
+        if changes.get('open'):
+            config['intervals'][0]['open'] = changes['open']
+        if changes.get('close'):
+            config['intervals'][-1]['close'] = changes['close']
+    return schedule, changes.get('timezone') or business.timezone
+
+
+def describe_diff(old_schedule, new_schedule, old_timezone, new_timezone):
+    """
+    Lista legible de diferencias, p. ej. ['monday: 09:00-19:00 → 09:00-14:00, 15:00-20:00'].
+    Se comparan los tramos efectivos: convertir un día al formato de tramos sin
+    cambiar sus horas no cuenta como cambio.
+    """
+    diff = []
+    if old_timezone != new_timezone:
+        diff.append(f'timezone: {old_timezone} → {new_timezone}')
+    for day in SCHEDULE_DAYS:
+        old, new = format_day(old_schedule.get(day)), format_day(new_schedule.get(day))
+        if old != new:
+            diff.append(f'{day}: {old} → {new}')
+    return diff
+
+
+class Command(BaseCommand):
+    help = 'Aplica cambios de horario o zona horaria a muchos negocios (bulk_update por lotes, con --dry-run).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--slug', action='append', default=[], help='Slug del negocio (repetible)')
+        parser.add_argument('--filter', action='append', default=[], dest='filters',
+                            help='Lookup del ORM campo=valor sobre Business (repetible)')
+        parser.add_argument('--all', action='store_true', help='Seleccionar todos los negocios')
+        parser.add_argument('--include-inactive', action='store_true', help='Incluir negocios inactivos')
+        parser.add_argument('--csv', help='CSV con columnas slug, timezone y monday..sunday')
+        parser.add_argument('--timezone', help='Nueva zona horaria')
+        parser.add_argument('--day', action='append', default=[],
+                            help='día=HH:MM-HH:MM[,HH:MM-HH:MM] o día=cerrado (repetible)')
+        parser.add_argument('--open', help='Nueva hora de apertura (primer tramo) de los días abiertos')
+        parser.add_argument('--close', help='Nueva hora de cierre (último tramo) de los días abiertos')
+        parser.add_argument('--days', help='Días a los que aplican --open/--close (ej: monday,friday)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Negocios por transacción')
+        parser.add_argument('--dry-run', action='store_true', help='Mostrar las diferencias sin guardar')
+        parser.add_argument('--skip-invalid', action='store_true',
+                            help='Omitir los negocios con cambios inválidos en lugar de abortar')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        changes = self._parse_changes(options)
+        csv_changes = self._read_csv(options['csv']) if options['csv'] else {}
+        if not changes and not csv_changes:
+            raise CommandError('No hay cambios: usa --timezone, --day, --open/--close o --csv.')
+
+        queryset = self._select(options, csv_changes)
+        updates, errors, unchanged = [], [], 0
+        for business in queryset.iterator(chunk_size=options['batch_size']):
+            business_changes = self._merge(csv_changes.get(business.slug, {}), changes)
+            new_schedule, new_timezone = apply_changes(business, business_changes)
+            try:
+                validate_schedule_config(new_schedule)
+                validate_timezone(new_timezone)
+            except ValidationError as e:
+                errors.append(f"{business.slug}: {'; '.join(e.messages)}")
+                continue
+
+            old_schedule = business.schedule_config or {}
+            diff = describe_diff(old_schedule, new_schedule, business.timezone, new_timezone)
+            if not diff:
+                unchanged += 1
+                continue
+            if options['dry_run'] or options['verbosity'] >= 2:
+                self.stdout.write(f"{business.slug}:")
+                for line in diff:
+                    self.stdout.write(f"    {line}")
+            business.schedule_config = new_schedule
+            business.timezone = new_timezone
+            updates.append(business)
+
+        for slug in sorted(self._requested_slugs - self._slugs_seen):
+            errors.append(f"{slug}: negocio no encontrado")
+        if errors:
+            for error in errors:
+                self.stdout.write(self.style.ERROR(f"✗ {error}"))
+            if not options['skip_invalid']:
+                raise CommandError(f"{len(errors)} negocio(s) con errores; no se guardó nada (usa --skip-invalid).")
+
+        summary = f"{len(updates)} negocio(s) con cambios, {unchanged} sin cambios, {len(errors)} con errores"
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"[dry-run] {summary}"))
+            return
+
+        now = timezone.now()
+        for start in range(0, len(updates), options['batch_size']):
+            batch = updates[start:start + options['batch_size']]
+            for business in batch:
+                business.updated_at = now  # bulk_update no aplica auto_now
+            with transaction.atomic():
+                Business.objects.bulk_update(batch, ['schedule_config', 'timezone', 'updated_at'])
+            # bulk_update no emite post_save: invalidar las cachés del lote aquí
+            invalidate_business(
+                slugs={business.slug for business in batch},
+                owner_ids={business.owner_id for business in batch},
+            )
+            # La versión de contenido también forma parte del ETag de los slots
+            bump_content_versions([business.id for business in batch])
+            self.stdout.write(f"  {start + len(batch)}/{len(updates)} guardados")
+
+        self.stdout.write(self.style.SUCCESS(f"{summary} ({time.monotonic() - started:.1f}s)"))
+
+    def _parse_changes(self, options):
+        changes = {}
+        if options['timezone']:
+            changes['timezone'] = options['timezone']
+        days = {}
+        for item in options['day']:
+            day, sep, value = item.partition('=')
+            if not sep or day not in SCHEDULE_DAYS:
+                raise CommandError(f'--day inválido: "{item}" (usa día=HH:MM-HH:MM[,HH:MM-HH:MM] o día=cerrado)')
+            try:
+                days[day] = parse_day_value(value)
+            except ValueError as e:
+                raise CommandError(f'--day {day}: {e}')
+        if days:
+            changes['days'] = days
+        for field in ('open', 'close'):
+            if options[field]:
+                if not SCHEDULE_TIME_RE.match(options[field]):
+                    raise CommandError(f'--{field} debe tener formato HH:MM.')
+                changes[field] = options[field]
+        if options['days']:
+            hours_days = [day.strip() for day in options['days'].split(',') if day.strip()]
+            unknown = set(hours_days) - set(SCHEDULE_DAYS)
+            if unknown:
+                raise CommandError(f"--days: días desconocidos: {', '.join(sorted(unknown))}")
+            changes['hours_days'] = hours_days
+        return changes
+
+    def _read_csv(self, path):
+        """{slug: cambios} a partir del CSV."""
+        csv_changes = {}
+        try:
+            with open(path, newline='', encoding='utf-8-sig') as file:
+                reader = csv.DictReader(file)
+                if 'slug' not in (reader.fieldnames or []):
+                    raise CommandError('El CSV debe tener una columna "slug".')
+                for line, row in enumerate(reader, start=2):
+                    slug = (row.get('slug') or '').strip()
+                    if not slug:
+                        continue
+                    changes = {}
+                    if (row.get('timezone') or '').strip():
+                        changes['timezone'] = row['timezone'].strip()
+                    days = {}
+                    for day in SCHEDULE_DAYS:
+                        value = (row.get(day) or '').strip()
+                        if value:
+                            try:
+                                days[day] = parse_day_value(value)
+                            except ValueError as e:
+                                raise CommandError(f'{path}:{line} {day}: {e}')
+                    if days:
+                        changes['days'] = days
+                    csv_changes[slug] = changes
+        except OSError as e:
+            raise CommandError(f'No se pudo leer {path}: {e}')
+        return csv_changes
+
+    def _select(self, options, csv_changes):
+        if not (options['slug'] or options['filters'] or options['all'] or csv_changes):
+            raise CommandError('Indica los negocios con --slug, --filter, --all o --csv.')
+        queryset = Business.objects.only('id', 'slug', 'owner_id', 'schedule_config', 'timezone')
+        if not options['include_inactive']:
+            queryset = queryset.filter(is_active=True)
+        slugs = set(options['slug']) | set(csv_changes)
+        if slugs:
+            queryset = queryset.filter(slug__in=slugs)
+        for item in options['filters']:
+            lookup, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f'--filter inválido: "{item}" (usa campo=valor)')
+            if value.lower() in ('true', 'false'):
+                value = value.lower() == 'true'
+            try:
+                queryset = queryset.filter(**{lookup: value})
+            except FieldError as e:
+                raise CommandError(f'--filter {lookup}: {e}')
+        # Slugs pedidos explícitamente que existen (para reportar los que no)
+        self._requested_slugs = slugs
+        self._slugs_seen = set(queryset.filter(slug__in=slugs).values_list('slug', flat=True)) if slugs else set()
+        return queryset.order_by('id')
+
+    def _merge(self, row_changes, changes):
+        """Cambios del CSV para el negocio con los de la línea de comandos encima."""
+        merged = {**row_changes, **{key: value for key, value in changes.items() if key != 'days'}}
+        days = {**row_changes.get('days', {}), **changes.get('days', {})}
+        if days:
+            merged['days'] = days
+        return merged
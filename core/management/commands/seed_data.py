@@ -0,0 +1,296 @@
+"""
+Generador de datos sintéticos para benchmarks.
+
+Crea negocios con horarios, zonas horarias y capacidades variadas, sus
+servicios, clientes y citas/bloqueos pasados y futuros. Todo se inserta con
+bulk_create en bloques (sin Appointment.save/full_clean ni señales, así que
+tampoco se programan recordatorios ni webhooks).
+
+Es determinista: con la misma --seed se generan los mismos datos sin importar
+el número de procesos, porque cada negocio usa su propio generador aleatorio
+derivado de la semilla. Las citas se generan en paralelo (--workers), un
+subconjunto de negocios por proceso.
+
+Uso:
+    python manage.py seed_data --businesses 1000 --appointments 1000000 --workers 8
+    python manage.py seed_data --clear      # eliminar los datos sintéticos
+"""
+import multiprocessing
+import random
+import time
+from datetime import datetime, timedelta, time as dt_time
+from zoneinfo import ZoneInfo
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from core.models import Appointment, Business, CustomUser, Service
+from core.services import delete_appointments
+
+SEED_EMAIL_DOMAIN = 'seed.invalid'
+SEED_SLUG_PREFIX = 'seed-'
+
+TIMEZONES = [
+    'America/Monterrey', 'America/Mexico_City', 'America/Tijuana', 'America/Cancun',
+    'America/Bogota', 'America/Lima', 'America/Santiago', 'America/Argentina/Buenos_Aires',
+    'Europe/Madrid', 'America/New_York',
+]
+SERVICE_NAMES = [
+    ('Corte Clásico', 30, 150), ('Fade', 45, 200), ('Barba', 20, 100), ('Corte + Barba', 60, 280),
+    ('Afeitado con Navaja', 30, 180), ('Corte Infantil', 25, 120), ('Diseño de Ceja', 15, 60),
+    ('Tinte', 90, 450), ('Mascarilla', 20, 90), ('Peinado', 30, 130),
+]
+DAY_KEYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+PAST_STATUSES = (['completed'] * 80) + (['cancelled'] * 12) + (['no_show'] * 8)
+FUTURE_STATUSES = (['confirmed'] * 60) + (['pending'] * 40)
+SLOT_MINUTES = 15
+
+
+def business_rng(seed, index, stream='business'):
+    """Generador propio de cada negocio: el resultado no depende del reparto entre procesos."""
+    return random.Random(f'{seed}:{stream}:{index}')
+
+
+def random_schedule(rng):
+    """Horario semanal variado (aperturas, cierres y días libres)."""
+    open_hour = rng.choice([7, 8, 9, 10])
+    close_hour = rng.choice([17, 18, 19, 20, 21])
+    schedule = {}
+    for i, day in enumerate(DAY_KEYS):
+        enabled = i < 5 or (i == 5 and rng.random() < 0.85) or (i == 6 and rng.random() < 0.2)
+        day_open = open_hour + (1 if i >= 5 else 0)
+        day_close = close_hour - (3 if i >= 5 else 0)
+        schedule[day] = {
+            'enabled': enabled,
+            'intervals': [{'open': f'{day_open:02d}:00', 'close': f'{day_close:02d}:00'}],
+        }
+    return schedule
+
+
+def generate_appointments(job):
+    """
+    Genera e inserta las citas de un grupo de negocios. Se ejecuta en un
+    proceso del pool; retorna el número de filas insertadas.
+    """
+    seed, businesses, client_ids, options = job
+    now = timezone.now()
+    created = 0
+    batch = []
+
+    def flush():
+        nonlocal created
+        Appointment.objects.bulk_create(batch, batch_size=options['chunk_size'])
+        created += len(batch)
+        batch.clear()
+
+    for business in businesses:
+        rng = business_rng(seed, business['index'], stream='appointments')
+        tz = ZoneInfo(business['timezone'])
+        occupancy = {}
+        first_day = (now - timedelta(days=options['days_back'])).astimezone(tz).date()
+        total_days = options['days_back'] + options['days_forward']
+        open_days = [
+            first_day + timedelta(days=offset) for offset in range(total_days)
+            if business['schedule'][DAY_KEYS[(first_day + timedelta(days=offset)).weekday()]]['enabled']
+        ]
+        if not open_days:
+            continue
+
+        for _ in range(business['appointments']):
+            day = rng.choice(open_days)
+            intervals = business['schedule'][DAY_KEYS[day.weekday()]]['intervals']
+            open_minute = int(intervals[0]['open'][:2]) * 60
+            close_minute = int(intervals[-1]['close'][:2]) * 60
+            is_block = rng.random() < options['block_ratio']
+            if is_block:
+                service_id, duration = None, rng.choice([30, 60, 120])
+            else:
+                service_id, duration = rng.choice(business['services'])
+
+            slots_needed = -(-duration // SLOT_MINUTES)
+            last_start = (close_minute - duration - open_minute) // SLOT_MINUTES
+            if last_start < 0:
+                continue
+            # Varios intentos para encontrar un horario con capacidad libre
+            for _attempt in range(5):
+                start_slot = rng.randint(0, last_start)
+                keys = [(day, start_slot + i) for i in range(slots_needed)]
+                if all(occupancy.get(key, 0) < business['capacity'] for key in keys):
+                    break
+            else:
+                continue
+            for key in keys:
+                occupancy[key] = occupancy.get(key, 0) + 1
+
+            start_time = datetime.combine(
+                day, dt_time(0, 0)
+            ).replace(tzinfo=tz) + timedelta(minutes=open_minute + start_slot * SLOT_MINUTES)
+            end_time = start_time + timedelta(minutes=duration)
+            if is_block:
+                status = 'confirmed'
+                client_id = business['owner_id']
+            else:
+                status = rng.choice(PAST_STATUSES if end_time < now else FUTURE_STATUSES)
+                client_id = rng.choice(client_ids)
+            batch.append(Appointment(
+                business_id=business['id'],
+                client_id=client_id,
+                service_id=service_id,
+                start_time=start_time,
+                end_time=end_time,
+                status=status,
+                is_block=is_block,
+                notes='Bloqueo sintético' if is_block else '',
+            ))
+            if len(batch) >= options['chunk_size']:
+                flush()
+    if batch:
+        flush()
+    connections.close_all()
+    return created
+
+
+class Command(BaseCommand):
+    help = 'Genera negocios, servicios, clientes y citas sintéticas (determinista, en paralelo).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--businesses', type=int, default=100)
+        parser.add_argument('--clients', type=int, default=5000)
+        parser.add_argument('--appointments', type=int, default=100000, help='Total aproximado de citas y bloqueos')
+        parser.add_argument('--days-back', type=int, default=180, help='Días de historial')
+        parser.add_argument('--days-forward', type=int, default=30, help='Días de citas futuras')
+        parser.add_argument('--block-ratio', type=float, default=0.03, help='Proporción de bloqueos')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--workers', type=int, default=1, help='Procesos para generar citas')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Filas por bulk_create')
+        parser.add_argument('--clear', action='store_true', help='Eliminar los datos sintéticos existentes y salir')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self._clear()
+            return
+        if Business.objects.filter(slug__startswith=SEED_SLUG_PREFIX).exists():
+            raise CommandError('Ya existen datos sintéticos; ejecuta primero con --clear.')
+
+        started = time.monotonic()
+        rng = random.Random(options['seed'])
+        # Una sola contraseña hasheada para todos ("seed"): hashear por usuario tomaría minutos
+        password = make_password('seed')
+
+        with transaction.atomic():
+            client_ids = self._create_clients(options, password)
+            businesses = self._create_businesses(options, password, rng)
+        self.stdout.write(
+            f"{len(businesses)} negocios y {len(client_ids)} clientes creados "
+            f"({time.monotonic() - started:.1f}s)"
+        )
+
+        # Reparto determinista de citas por negocio (algunos negocios mucho más activos)
+        weights = [rng.paretovariate(1.5) for _ in businesses]
+        total_weight = sum(weights)
+        for business, weight in zip(businesses, weights):
+            business['appointments'] = round(options['appointments'] * weight / total_weight)
+
+        workers = max(1, options['workers'])
+        jobs = [
+            (options['seed'], businesses[i::workers], client_ids, options)
+            for i in range(workers)
+        ]
+        appointment_started = time.monotonic()
+        if workers == 1:
+            created = generate_appointments(jobs[0])
+        else:
+            # Los procesos hijos no deben compartir las conexiones del padre
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            with context.Pool(workers) as pool:
+                created = 0
+                for count in pool.imap_unordered(generate_appointments, jobs):
+                    created += count
+                    self.stdout.write(f"  +{count} citas")
+
+        elapsed = time.monotonic() - appointment_started
+        self.stdout.write(self.style.SUCCESS(
+            f"{created} citas creadas en {elapsed:.1f}s ({created / max(elapsed, 1e-6):,.0f}/s); "
+            f"total {time.monotonic() - started:.1f}s"
+        ))
+
+    def _create_clients(self, options, password):
+        clients = [
+            CustomUser(
+                email=f'cliente{i}@{SEED_EMAIL_DOMAIN}',
+                first_name=f'Cliente{i}',
+                phone=f'81{i:08d}',
+                password=password,
+            )
+            for i in range(options['clients'])
+        ]
+        created = CustomUser.objects.bulk_create(clients, batch_size=options['chunk_size'])
+        return [client.pk for client in created]
+
+    def _create_businesses(self, options, password, rng):
+        count = options['businesses']
+        owners = CustomUser.objects.bulk_create(
+            [
+                CustomUser(email=f'owner{i}@{SEED_EMAIL_DOMAIN}', first_name=f'Owner{i}',
+                           is_owner=True, password=password)
+                for i in range(count)
+            ],
+            batch_size=options['chunk_size'],
+        )
+        specs = []
+        business_objs = []
+        for i, owner in enumerate(owners):
+            b_rng = business_rng(options['seed'], i)
+            spec = {
+                'index': i,
+                'owner_id': owner.pk,
+                'timezone': b_rng.choice(TIMEZONES),
+                'capacity': b_rng.choice([1, 1, 2, 2, 3, 4, 6]),
+                'schedule': random_schedule(b_rng),
+                'service_defs': b_rng.sample(SERVICE_NAMES, b_rng.randint(2, 6)),
+            }
+            specs.append(spec)
+            business_objs.append(Business(
+                owner_id=owner.pk,
+                name=f'Barbería Sintética {i}',
+                slug=f'{SEED_SLUG_PREFIX}{i}',
+                timezone=spec['timezone'],
+                capacity=spec['capacity'],
+                schedule_config=spec['schedule'],
+            ))
+        created = Business.objects.bulk_create(business_objs, batch_size=options['chunk_size'])
+
+        services = []
+        for spec, business in zip(specs, created):
+            spec['id'] = business.pk
+            for name, duration, price in spec.pop('service_defs'):
+                services.append(Service(business_id=business.pk, name=name,
+                                        duration_minutes=duration, price=price))
+        created_services = Service.objects.bulk_create(services, batch_size=options['chunk_size'])
+
+        by_business = {}
+        for service in created_services:
+            by_business.setdefault(service.business_id, []).append((service.pk, service.duration_minutes))
+        for spec in specs:
+            spec['services'] = by_business[spec['id']]
+        return specs
+
+    def _clear(self):
+        started = time.monotonic()
+        business_ids = list(Business.objects.filter(slug__startswith=SEED_SLUG_PREFIX).values_list('id', flat=True))
+        # Las citas (de los negocios y de los clientes sintéticos) se borran con un
+        # DELETE directo, sin cargarlas ni emitir post_delete por fila; así la
+        # cascada de los usuarios ya no las encuentra. Los negocios se borran
+        # después: no hace falta invalidar su disponibilidad día por día.
+        deleted = delete_appointments(
+            Appointment.objects.filter(
+                Q(business_id__in=business_ids) | Q(client__email__endswith=f'@{SEED_EMAIL_DOMAIN}')
+            ),
+            bookings=(),
+        )
+        deleted += CustomUser.objects.filter(email__endswith=f'@{SEED_EMAIL_DOMAIN}').delete()[0]
+        self.stdout.write(self.style.SUCCESS(
+            f"{deleted} registros sintéticos eliminados ({time.monotonic() - started:.1f}s)"
+        ))
@@ -0,0 +1,55 @@
+"""
+Receptor local de webhooks para pruebas.
+
+Uso:
+    python manage.py webhook_receiver --port 9000 --secret <secreto del endpoint>
+
+Configura un WebhookEndpoint con URL http://127.0.0.1:9000/ y ejecuta
+`python manage.py deliver_webhooks --once` para ver los lotes recibidos.
+"""
+import json
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from django.core.management.base import BaseCommand
+from core.webhooks import SIGNATURE_HEADER, TIMESTAMP_HEADER, verify_signature
+
+
+class Command(BaseCommand):
+    help = 'Levanta un servidor HTTP local que imprime y verifica los webhooks recibidos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=9000)
+        parser.add_argument('--secret', default='', help='Secreto para verificar la firma HMAC')
+        parser.add_argument('--fail', action='store_true', help='Responder 500 para probar reintentos')
+
+    def handle(self, *args, **options):
+        command = self
+        secret = options['secret']
+        fail = options['fail']
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                timestamp = self.headers.get(TIMESTAMP_HEADER, '')
+                signature = self.headers.get(SIGNATURE_HEADER, '')
+                valid = verify_signature(secret, timestamp, body, signature) if secret else None
+
+                events = json.loads(body or b'{}').get('events', [])
+                command.stdout.write(f"Lote recibido: {len(events)} eventos | firma válida: {valid}")
+                for event in events:
+                    command.stdout.write(f"  #{event['id']} {event['type']} cita={event['data'].get('id')}")
+
+                self.send_response(500 if fail or valid is False else 200)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        server = HTTPServer((options['host'], options['port']), Handler)
+        self.stdout.write(f"Escuchando webhooks en http://{options['host']}:{options['port']}/")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,317 @@
+"""
+Métricas en proceso (contadores e histogramas) en formato Prometheus.
+
+Registrar un valor solo toma un lock y suma en memoria, así que se puede
+dejar activo en la ruta crítica. Con varios workers (gunicorn), cada proceso
+escribe periódicamente una foto de sus métricas en METRICS_DIR y el endpoint
+`/metrics/` suma las fotos de todos los procesos. Los archivos llevan el pid
+y un token por proceso, así que los de workers reiniciados se siguen sumando
+(los contadores no retroceden); conviene vaciar METRICS_DIR en cada deploy.
+Sin METRICS_DIR solo se reportan las métricas del proceso que atiende.
+"""
+import atexit
+import json
+import logging
+import os
+import secrets
+import tempfile
+import threading
+import time
+from functools import wraps
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Metric:
+    """Base de Counter e Histogram: valores por combinación de etiquetas."""
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def labels(self, **labels):
+        return _BoundMetric(self, tuple(str(labels[name]) for name in self.labelnames))
+
+    def reset(self):
+        with self._lock:
+            self._values = {}
+
+    def snapshot(self):
+        with self._lock:
+            return {json.dumps(key): self._copy(value) for key, value in self._values.items()}
+
+    def _copy(self, value):
+        return value
+
+
+class _BoundMetric:
+    __slots__ = ('metric', 'key')
+
+    def __init__(self, metric, key):
+        self.metric = metric
+        self.key = key
+
+    def inc(self, amount=1):
+        self.metric._inc(self.key, amount)
+
+    def observe(self, value):
+        self.metric._observe(self.key, value)
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1):
+        self._inc((), amount)
+
+    def _inc(self, key, amount):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    @staticmethod
+    def merge(total, value):
+        return (total or 0) + value
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value):
+        self._observe((), value)
+
+    def _observe(self, key, value):
+        # Índice del primer bucket >= value (el último es +Inf)
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0}
+            entry['counts'][index] += 1
+            entry['sum'] += value
+
+    def time(self):
+        """Decorador que observa la duración (en segundos) de cada llamada (también funciones async)."""
+        def decorator(func):
+            if iscoroutinefunction(func):
+                @wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    start = time.perf_counter()
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        self._observe((), time.perf_counter() - start)
+                return async_wrapper
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self._observe((), time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def _copy(self, value):
+        return {'counts': list(value['counts']), 'sum': value['sum']}
+
+    @staticmethod
+    def merge(total, value):
+        if total is None:
+            return {'counts': list(value['counts']), 'sum': value['sum']}
+        total['counts'] = [a + b for a, b in zip(total['counts'], value['counts'])]
+        total['sum'] += value['sum']
+        return total
+
+
+class Registry:
+    """Conjunto de métricas del proceso, con exportación y agregación entre procesos."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._process_token = None
+        self._process_pid = None
+        self._flusher = None
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def reset(self):
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def snapshot(self):
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    # --- Agregación entre procesos ---
+
+    def _snapshot_path(self):
+        if self._process_pid != os.getpid():
+            self._process_pid = os.getpid()
+            self._process_token = secrets.token_hex(4)
+        return os.path.join(settings.METRICS_DIR, f'{self._process_pid}-{self._process_token}.json')
+
+    def flush(self):
+        """Escribe la foto de este proceso en METRICS_DIR (escritura atómica)."""
+        if not settings.METRICS_DIR:
+            return
+        snapshot = self.snapshot()
+        if not any(snapshot.values()):
+            # Procesos que no registraron nada (p. ej. comandos) no dejan archivo
+            return
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        path = self._snapshot_path()
+        fd, tmp_path = tempfile.mkstemp(dir=settings.METRICS_DIR, suffix='.tmp')
+        with os.fdopen(fd, 'w') as tmp:
+            json.dump(snapshot, tmp)
+        os.replace(tmp_path, path)
+
+    def start_flusher(self):
+        """Inicia (una vez por proceso) el hilo que escribe la foto periódicamente."""
+        if not settings.METRICS_DIR:
+            return
+        with self._lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+
+            def run():
+                while True:
+                    time.sleep(settings.METRICS_FLUSH_INTERVAL)
+                    try:
+                        self.flush()
+                    except OSError as e:
+                        logger.warning(f"No se pudieron escribir las métricas: {str(e)}")
+
+            self._flusher = threading.Thread(target=run, name='metrics-flusher', daemon=True)
+            self._flusher.start()
+            atexit.register(self.flush)
+
+    def after_fork(self):
+        # Los locks se recrean: el fork pudo ocurrir con alguno tomado
+        for metric in self._metrics.values():
+            metric._lock = threading.Lock()
+            metric._values = {}
+        self._flusher = None
+        self._lock = threading.Lock()
+        if settings.configured:
+            self.start_flusher()
+
+    def collect(self):
+        """Suma las métricas de todos los procesos (o solo las de este)."""
+        snapshots = []
+        own_path = None
+        if settings.METRICS_DIR:
+            own_path = self._snapshot_path()
+            if os.path.isdir(settings.METRICS_DIR):
+                for filename in os.listdir(settings.METRICS_DIR):
+                    path = os.path.join(settings.METRICS_DIR, filename)
+                    if not filename.endswith('.json') or path == own_path:
+                        continue
+                    try:
+                        with open(path) as file:
+                            snapshots.append(json.load(file))
+                    except (OSError, ValueError):
+                        continue
+        # Los valores de este proceso se toman en vivo, no de su archivo
+        snapshots.append(self.snapshot())
+
+        totals = {}
+        for snapshot in snapshots:
+            for name, values in snapshot.items():
+                metric = self._metrics.get(name)
+                if metric is None:
+                    continue
+                merged = totals.setdefault(name, {})
+                for key, value in values.items():
+                    merged[key] = metric.merge(merged.get(key), value)
+        return totals
+
+    def render(self):
+        """Exporta las métricas en el formato de texto de Prometheus."""
+        totals = self.collect()
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            for key, value in sorted(totals.get(name, {}).items()):
+                labels = dict(zip(metric.labelnames, json.loads(key)))
+                if metric.type == 'counter':
+                    lines.append(f'{name}{_format_labels(labels)} {value}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float('inf'),), value['counts']):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(float(bound))
+                    lines.append(f'{name}_bucket{_format_labels({**labels, "le": le})} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {value["sum"]}')
+                lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+REGISTRY = Registry()
+
+# Un proceso hijo (fork de gunicorn con --preload) no hereda los valores del
+# padre y necesita su propio hilo de escritura
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=REGISTRY.after_fork)
+
+
+# --- Métricas de la aplicación ---
+
+AVAILABILITY_LATENCY = REGISTRY.histogram(
+    'saasbarber_availability_seconds',
+    'Duración del cálculo de slots disponibles (AvailabilityService.get_slot_grids)',
+)
+AVAILABILITY_SLOTS = REGISTRY.histogram(
+    'saasbarber_availability_slots',
+    'Slots disponibles retornados por día calculado',
+    buckets=(0, 1, 5, 10, 20, 40, 80),
+)
+BOOKINGS = REGISTRY.counter(
+    'saasbarber_bookings_total',
+    'Reservas desde la página pública por resultado (created, unavailable, invalid, error)',
+    labelnames=('result',),
+)
+DASHBOARD_API_LATENCY = REGISTRY.histogram(
+    'saasbarber_dashboard_api_seconds',
+    'Duración de la API de citas del dashboard',
+)
+REMINDERS = REGISTRY.counter(
+    'saasbarber_reminders_total',
+    'Recordatorios de WhatsApp por resultado (sent, scheduled, skipped, cancelled = cita inactiva al enviar, error)',
+    labelnames=('outcome',),
+)
@@ -1,41 +1,276 @@
 """
-Middleware para redirigir automáticamente a los owners a su dashboard.
+Middleware para redirigir automáticamente a los owners a su dashboard,
+para resolver el negocio (tenant) de cada petición, para instrumentar
+las consultas SQL y tiempos de cada petición y para perfilar peticiones
+bajo demanda.
+
+Salvo QueryInstrumentationMiddleware, todos funcionan en modo síncrono (WSGI)
+y asíncrono (ASGI): bajo ASGI las vistas async no se envían a un hilo solo
+porque un middleware de la cadena sea síncrono.
 """
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
 from django.shortcuts import redirect
-from django.urls import reverse
-from .models import Business
+from .tenancy import aget_business_by_slug, get_business_by_slug, get_owner_business_slug
+
+logger = logging.getLogger(__name__)
+instrumentation_logger = logging.getLogger('core.instrumentation')
+
+
+class TenantMiddleware:
+    """
+    Resuelve una sola vez por petición el negocio del slug de la URL
+    y lo deja disponible en `request.business` (None si no existe).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django toma process_view de la instancia al armar la cadena
+            self.process_view = self._aprocess_view
+
+    def __call__(self, request):
+        request.business = None
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        business_slug = view_kwargs.get('business_slug')
+        if business_slug:
+            request.business = get_business_by_slug(business_slug)
+        return None
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        business_slug = view_kwargs.get('business_slug')
+        if business_slug:
+            request.business = await aget_business_by_slug(business_slug)
+        return None
 
 
 class OwnerRedirectMiddleware:
     """
     Redirige automáticamente a los owners a su dashboard después del login.
     """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
         response = self.get_response(request)
-        
+
         # Si el usuario está autenticado, es owner, y está en el admin (después del login)
-        if (request.user.is_authenticated and 
+        if (request.user.is_authenticated and
             hasattr(request.user, 'is_owner') and
-            request.user.is_owner and 
+            request.user.is_owner and
             request.path == '/admin/' and
             not request.GET.get('next')):
-            
-            # Intentar obtener el negocio del usuario
-            try:
-                business = Business.objects.get(owner=request.user, is_active=True)
-                # Redirigir al dashboard del negocio
-                from django.shortcuts import redirect
-                from django.urls import reverse
-                return redirect('core:dashboard', business_slug=business.slug)
-            except Business.DoesNotExist:
-                pass
-            except Business.MultipleObjectsReturned:
-                business = Business.objects.filter(owner=request.user, is_active=True).first()
-                if business:
-                    from django.shortcuts import redirect
-                    return redirect('core:dashboard', business_slug=business.slug)
-        
+
+            # Obtener el negocio del usuario (cacheado por owner)
+            business_slug = get_owner_business_slug(request.user)
+            if business_slug:
+                return redirect('core:dashboard', business_slug=business_slug)
+
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+
+        # Se revisa la ruta antes de cargar al usuario (request.auser consulta la sesión)
+        if request.path != '/admin/' or request.GET.get('next'):
+            return response
+        user = await request.auser()
+        if user.is_authenticated and getattr(user, 'is_owner', False):
+            business_slug = await sync_to_async(get_owner_business_slug)(user)
+            if business_slug:
+                return redirect('core:dashboard', business_slug=business_slug)
+        return response
+
+
+class QueryRecorder:
+    """
+    execute_wrapper que mide cada consulta SQL y guarda desde qué línea del
+    proyecto se ejecutó (el primer frame fuera de Django y de las librerías).
+    """
+    def __init__(self):
+        self.queries = []
+        self._project_dir = str(settings.BASE_DIR) + os.sep
+        self._this_file = os.path.abspath(__file__)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            self.queries.append({
+                'sql': sql,
+                'ms': round(duration, 2),
+                'alias': context['connection'].alias,
+                'site': self._call_site(),
+            })
+
+    def _call_site(self):
+        frame = sys._getframe(2)
+        while frame is not None:
+            filename = os.path.abspath(frame.f_code.co_filename)
+            if (filename.startswith(self._project_dir) and filename != self._this_file
+                    and 'site-packages' not in filename):
+                return f"{os.path.relpath(filename, self._project_dir)}:{frame.f_lineno} in {frame.f_code.co_name}"
+            frame = frame.f_back
+        return ''
+
+    @property
+    def db_time(self):
+        return sum(query['ms'] for query in self.queries)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Registra por petición el número de consultas SQL, el tiempo total en la
+    base de datos, las consultas más lentas (con la línea que las ejecutó),
+    las repetidas (N+1) y el tiempo total de la vista.
+
+    Los datos se envían en el header `Server-Timing` (visible en las DevTools
+    del navegador) y en una línea JSON del logger `core.instrumentation`. Las
+    peticiones más lentas que REQUEST_SLOW_THRESHOLD_MS se registran como
+    warning con la lista completa de consultas.
+
+    Se activa con REQUEST_INSTRUMENTATION=True. Es solo síncrono: bajo ASGI
+    hace que toda la petición se ejecute en un hilo, así que no conviene
+    dejarlo activo en producción con ASGI.
+    """
+    def __init__(self, get_response):
+        if not settings.REQUEST_INSTRUMENTATION:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.slow_threshold = settings.REQUEST_SLOW_THRESHOLD_MS
+        self.top_queries = settings.REQUEST_INSTRUMENTATION_TOP_QUERIES
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        total = (time.perf_counter() - start) * 1000
+
+        db_time = recorder.db_time
+        response['Server-Timing'] = ', '.join([
+            f'db;desc="SQL ({len(recorder.queries)})";dur={db_time:.1f}',
+            f'app;dur={max(total - db_time, 0):.1f}',
+            f'total;dur={total:.1f}',
+        ])
+        self._log(request, response, recorder, total)
+        return response
+
+    def _log(self, request, response, recorder, total):
+        match = request.resolver_match
+        slow = total >= self.slow_threshold
+        repeated = Counter(query['sql'] for query in recorder.queries)
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total, 1),
+            'db_ms': round(recorder.db_time, 1),
+            'queries': len(recorder.queries),
+            'slowest': sorted(recorder.queries, key=lambda q: q['ms'], reverse=True)[:self.top_queries],
+            'repeated': [
+                {'sql': sql, 'count': count}
+                for sql, count in repeated.most_common(self.top_queries) if count > 1
+            ],
+        }
+        if slow:
+            record['all_queries'] = recorder.queries
+            instrumentation_logger.warning(json.dumps(record, default=str))
+        else:
+            instrumentation_logger.info(json.dumps(record, default=str))
+
+
+class ProfilingMiddleware:
+    """
+    Perfila la petición cuando un usuario staff agrega `?_profile=1` o el
+    header `X-Profile` (ver core/profiling.py). El perfil se guarda como
+    RequestProfile y su id se devuelve en el header `X-Profile-Id`.
+
+    Para el resto de las peticiones solo se revisa si existe el parámetro o
+    el header, sin cargar al usuario. Se desactiva con REQUEST_PROFILING=False.
+
+    Bajo ASGI las consultas del ORM async se ejecutan en otro hilo, así que el
+    perfil solo registra las que la vista hace de forma síncrona.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        from .profiling import wants_profile
+
+        if not wants_profile(request) or not request.user.is_staff:
+            return self.get_response(request)
+
+        from .profiling import RequestProfiler, save_profile
+
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            with RequestProfiler() as profiler:
+                response = self.get_response(request)
+
+        try:
+            profile = save_profile(request, response, profiler, recorder)
+            response['X-Profile-Id'] = str(profile.pk)
+        except Exception as e:
+            logger.error(f"No se pudo guardar el perfil de {request.path}: {str(e)}")
+        return response
+
+    async def __acall__(self, request):
+        from .profiling import wants_profile
+
+        if not wants_profile(request) or not (await request.auser()).is_staff:
+            return await self.get_response(request)
+
+        from .profiling import RequestProfiler, save_profile
+
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            with RequestProfiler() as profiler:
+                response = await self.get_response(request)
+
+        try:
+            profile = await sync_to_async(save_profile)(request, response, profiler, recorder)
+            response['X-Profile-Id'] = str(profile.pk)
+        except Exception as e:
+            logger.error(f"No se pudo guardar el perfil de {request.path}: {str(e)}")
         return response
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-19 02:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_webhooks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='galleryimage',
+            name='processing_status',
+            field=models.CharField(choices=[('pending', 'Pendiente'), ('ready', 'Lista'), ('failed', 'Fallida')], default='pending', max_length=20, verbose_name='Estado de Procesamiento'),
+        ),
+        migrations.AddField(
+            model_name='galleryimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, help_text='Versiones redimensionadas de la imagen (thumbnail, medium, large)', verbose_name='Variantes'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.1 on 2026-10-19 02:51
+
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_galleryimage_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='galleryimage',
+            name='image',
+            field=models.ImageField(help_text='Imagen de trabajo realizado', storage=core.models.get_gallery_storage, upload_to='gallery/%Y/%m/%d/', verbose_name='Imagen'),
+        ),
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('name', models.CharField(max_length=255, verbose_name='Ruta')),
+                ('size', models.PositiveBigIntegerField(default=0, verbose_name='Tamaño (bytes)')),
+                ('ref_count', models.PositiveIntegerField(default=0, verbose_name='Referencias')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+            ],
+            options={
+                'verbose_name': 'Blob de Media',
+                'verbose_name_plural': 'Blobs de Media',
+                'indexes': [models.Index(fields=['name'], name='core_mediab_name_c0fd09_idx')],
+            },
+        ),
+    ]
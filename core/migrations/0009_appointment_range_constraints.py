@@ -0,0 +1,57 @@
+# Generated by Django 5.0.1 on 2026-10-19 02:52
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DatabaseError, migrations, models
+
+
+# Índice GiST (solo PostgreSQL) para el operador && de filter_overlapping
+# (core/services.py). btree_gist permite incluir business_id en el mismo índice.
+# Requisito: la extensión debe estar disponible en el servidor (paquete contrib)
+# y el usuario de Django debe poder crearla, o alguien ya la creó en la base.
+CREATE_EXTENSION = "CREATE EXTENSION IF NOT EXISTS btree_gist;"
+
+BTREE_GIST_MISSING = (
+    "La migración core.0009 necesita la extensión btree_gist de PostgreSQL y no "
+    "se pudo crear. Instala el paquete contrib del servidor (por ejemplo "
+    "postgresql-contrib) y ejecuta 'CREATE EXTENSION btree_gist;' en la base como "
+    "superusuario, o da al usuario de Django el privilegio CREATE sobre ella; "
+    "luego vuelve a correr migrate.\nError de PostgreSQL: {error}"
+)
+
+CREATE_RANGE_INDEX = """
+CREATE INDEX IF NOT EXISTS appt_active_range_gist
+    ON core_appointment USING gist (business_id, tstzrange(start_time, end_time))
+    WHERE status IN ('pending', 'confirmed') OR is_block;
+"""
+
+DROP_RANGE_INDEX = "DROP INDEX IF EXISTS appt_active_range_gist;"
+
+
+def create_range_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    try:
+        schema_editor.execute(CREATE_EXTENSION)
+    except DatabaseError as error:
+        raise ImproperlyConfigured(BTREE_GIST_MISSING.format(error=str(error).strip())) from error
+    schema_editor.execute(CREATE_RANGE_INDEX)
+
+
+def drop_range_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_RANGE_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_mediablob'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='appointment',
+            constraint=models.CheckConstraint(check=models.Q(('end_time__gt', models.F('start_time'))), name='appointment_end_after_start'),
+        ),
+        migrations.RunPython(create_range_index, drop_range_index),
+    ]
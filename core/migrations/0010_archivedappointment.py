@@ -0,0 +1,42 @@
+# Generated by Django 5.0.1 on 2026-10-19 02:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_appointment_range_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAppointment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.PositiveBigIntegerField(unique=True, verbose_name='ID Original')),
+                ('service_name', models.CharField(blank=True, default='', max_length=200, verbose_name='Nombre del Servicio')),
+                ('service_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Precio')),
+                ('start_time', models.DateTimeField(verbose_name='Hora de Inicio')),
+                ('end_time', models.DateTimeField(verbose_name='Hora de Fin')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('confirmed', 'Confirmada'), ('cancelled', 'Cancelada'), ('no_show', 'No se presentó'), ('completed', 'Completada')], max_length=20, verbose_name='Estado')),
+                ('notes', models.TextField(blank=True, null=True, verbose_name='Notas')),
+                ('is_block', models.BooleanField(default=False, verbose_name='Es Bloqueo')),
+                ('created_at', models.DateTimeField(verbose_name='Fecha de Creación')),
+                ('updated_at', models.DateTimeField(verbose_name='Fecha de Actualización')),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de Archivo')),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_appointments', to='core.business', verbose_name='Negocio')),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_appointments', to=settings.AUTH_USER_MODEL, verbose_name='Cliente')),
+                ('service', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_appointments', to='core.service', verbose_name='Servicio')),
+            ],
+            options={
+                'verbose_name': 'Cita Archivada',
+                'verbose_name_plural': 'Citas Archivadas',
+                'ordering': ['-start_time'],
+                'indexes': [models.Index(fields=['client', 'start_time'], name='core_archiv_client__cd938a_idx'), models.Index(fields=['business', 'start_time'], name='core_archiv_busines_82a625_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-19 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_archivedappointment'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(condition=models.Q(('status__in', ('pending', 'confirmed')), ('is_block', True), _connector='OR'), fields=['business', 'start_time', 'end_time'], name='appt_active_business_time'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.1 on 2026-10-19 03:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_appointment_active_partial_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(max_length=10, verbose_name='Método')),
+                ('path', models.CharField(max_length=500, verbose_name='Ruta')),
+                ('view_name', models.CharField(blank=True, default='', max_length=200, verbose_name='Vista')),
+                ('business_slug', models.CharField(blank=True, db_index=True, default='', max_length=200, verbose_name='Negocio')),
+                ('status_code', models.PositiveIntegerField(default=0, verbose_name='Código HTTP')),
+                ('duration_ms', models.FloatField(default=0, verbose_name='Duración (ms)')),
+                ('query_count', models.PositiveIntegerField(default=0, verbose_name='Consultas SQL')),
+                ('db_ms', models.FloatField(default=0, verbose_name='Tiempo en BD (ms)')),
+                ('pstats_file', models.FileField(blank=True, upload_to='profiles/%Y/%m/', verbose_name='Volcado pstats')),
+                ('collapsed_file', models.FileField(blank=True, upload_to='profiles/%Y/%m/', verbose_name='Pilas (collapsed)')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Fecha de Creación')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='request_profiles', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Perfil de Petición',
+                'verbose_name_plural': 'Perfiles de Peticiones',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.1 on 2026-10-19 03:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_appointment_start_time_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduleException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField(verbose_name='Fecha de Inicio')),
+                ('end_date', models.DateField(help_text='Igual a la fecha de inicio para un solo día', verbose_name='Fecha de Fin')),
+                ('is_closed', models.BooleanField(default=True, help_text='Cerrado todo el día; si no está marcado se usan los tramos de apertura', verbose_name='Cerrado')),
+                ('intervals', models.JSONField(blank=True, default=list, help_text='Hora local del negocio, ej: [{"open": "10:00", "close": "14:00"}]', verbose_name='Tramos de Apertura')),
+                ('reason', models.CharField(blank=True, default='', max_length=200, verbose_name='Motivo')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de Actualización')),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedule_exceptions', to='core.business', verbose_name='Negocio')),
+            ],
+            options={
+                'verbose_name': 'Excepción de Horario',
+                'verbose_name_plural': 'Excepciones de Horario',
+                'ordering': ['start_date'],
+                'indexes': [models.Index(fields=['business', 'end_date', 'start_date'], name='schedexc_business_dates')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='scheduleexception',
+            constraint=models.CheckConstraint(check=models.Q(('end_date__gte', models.F('start_date'))), name='schedule_exception_end_after_start'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.0.1 on 2026-10-19 18:40
+
+from django.db import migrations
+
+
+# Convierte schedule_config al formato de tramos:
+#   {"open": "09:00", "close": "20:00", "enabled": true}
+#   -> {"enabled": true, "intervals": [{"open": "09:00", "close": "20:00"}]}
+# El código sigue leyendo el formato anterior; la migración solo deja los
+# datos en el formato que escriben el admin y el comando schedules.
+SCHEDULE_DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+BATCH_SIZE = 500
+
+
+def _to_intervals(day_config):
+    if not isinstance(day_config, dict) or 'intervals' in day_config:
+        return day_config
+    return {
+        'enabled': day_config.get('enabled', False),
+        'intervals': [{'open': day_config.get('open', '09:00'), 'close': day_config.get('close', '18:00')}],
+    }
+
+
+def _to_open_close(day_config):
+    # Con varios tramos se conserva la primera apertura y el último cierre:
+    # los descansos intermedios se pierden al revertir.
+    if not isinstance(day_config, dict) or 'intervals' not in day_config:
+        return day_config
+    intervals = day_config['intervals']
+    legacy = {'enabled': day_config.get('enabled', False)}
+    if intervals:
+        legacy['open'] = intervals[0]['open']
+        legacy['close'] = intervals[-1]['close']
+    return legacy
+
+
+def _convert(apps, convert_day):
+    Business = apps.get_model('core', 'Business')
+    batch = []
+    for business in Business.objects.only('id', 'schedule_config').iterator(chunk_size=BATCH_SIZE):
+        config = business.schedule_config
+        if not isinstance(config, dict):
+            continue
+        converted = {
+            day: convert_day(value) if day in SCHEDULE_DAYS else value
+            for day, value in config.items()
+        }
+        if converted != config:
+            business.schedule_config = converted
+            batch.append(business)
+        if len(batch) >= BATCH_SIZE:
+            Business.objects.bulk_update(batch, ['schedule_config'])
+            batch = []
+    if batch:
+        Business.objects.bulk_update(batch, ['schedule_config'])
+
+
+def forwards(apps, schema_editor):
+    _convert(apps, _to_intervals)
+
+
+def backwards(apps, schema_editor):
+    _convert(apps, _to_open_close)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_scheduleexception'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.1 on 2026-10-19 03:56
+
+import datetime
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+# Antes de agregar el límite de 24 horas, las filas más largas (bloqueos de
+# varios días creados antes de ScheduleException) se dividen en tramos
+# consecutivos de hasta 24 horas con los mismos datos: ocupan exactamente el
+# mismo horario y la búsqueda de solapamientos acotada las sigue encontrando.
+MAX_DURATION = datetime.timedelta(hours=24)
+SPLIT_FIELDS = ['business_id', 'client_id', 'service_id', 'status', 'notes', 'is_block']
+
+
+def split_long_appointments(apps, schema_editor):
+    Appointment = apps.get_model('core', 'Appointment')
+    long_rows = Appointment.objects.filter(
+        end_time__gt=models.F('start_time') + MAX_DURATION,
+    ).order_by('id')
+    for appointment in long_rows:
+        end_time = appointment.end_time
+        appointment.end_time = appointment.start_time + MAX_DURATION
+        appointment.save(update_fields=['end_time'])
+        pieces = []
+        start = appointment.end_time
+        while start < end_time:
+            pieces.append(Appointment(
+                start_time=start,
+                end_time=min(start + MAX_DURATION, end_time),
+                **{field: getattr(appointment, field) for field in SPLIT_FIELDS},
+            ))
+            start += MAX_DURATION
+        Appointment.objects.bulk_create(pieces)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_schedule_config_intervals'),
+    ]
+
+    operations = [
+        # Sin reverso automático: los tramos siguen siendo válidos sin el límite
+        migrations.RunPython(split_long_appointments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='appointment',
+            constraint=models.CheckConstraint(check=models.Q(('end_time__lte', django.db.models.expressions.CombinedExpression(models.F('start_time'), '+', models.Value(datetime.timedelta(days=1))))), name='appointment_max_duration', violation_error_message='Una cita o bloqueo no puede durar más de 24 horas.'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:07
+
+import os
+import uuid
+import core.models
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import migrations, models
+
+
+# Los perfiles ya guardados en MEDIA_ROOT/profiles/ (públicos, con nombres
+# predecibles) se mueven al storage privado con nombres aleatorios.
+PROFILE_FILE_FIELDS = ('pstats_file', 'collapsed_file')
+
+
+def move_profiles_to_private_storage(apps, schema_editor):
+    RequestProfile = apps.get_model('core', 'RequestProfile')
+    public = FileSystemStorage(location=settings.MEDIA_ROOT)
+    private = FileSystemStorage(location=settings.PROFILING_STORAGE_DIR)
+    for profile in RequestProfile.objects.exclude(pstats_file='', collapsed_file=''):
+        name = uuid.uuid4().hex
+        for field in PROFILE_FILE_FIELDS:
+            old_name = getattr(profile, field).name
+            if not old_name:
+                continue
+            new_name = ''
+            if public.exists(old_name):
+                suffix = '.collapsed.txt' if old_name.endswith('.collapsed.txt') else os.path.splitext(old_name)[1]
+                with public.open(old_name, 'rb') as file:
+                    new_name = private.save(f"{profile.created_at:%Y/%m}/{name}{suffix}", file)
+                public.delete(old_name)
+            setattr(profile, field, new_name)
+        profile.save(update_fields=list(PROFILE_FILE_FIELDS))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_appointment_max_duration'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='requestprofile',
+            name='collapsed_file',
+            field=models.FileField(blank=True, storage=core.models.get_profile_storage, upload_to='%Y/%m/', verbose_name='Pilas (collapsed)'),
+        ),
+        migrations.AlterField(
+            model_name='requestprofile',
+            name='pstats_file',
+            field=models.FileField(blank=True, storage=core.models.get_profile_storage, upload_to='%Y/%m/', verbose_name='Volcado pstats'),
+        ),
+        # Sin reverso: los archivos no vuelven a la carpeta pública
+        migrations.RunPython(move_profiles_to_private_storage, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.1 on 2026-10-19 19:05
+
+from django.db import migrations, models
+
+
+# El CheckConstraint de 0016 compila en SQLite a django_format_dtdelta(...),
+# una función que Django registra en cada conexión: el CLI sqlite3 y cualquier
+# otra herramienta fallan al escribir en core_appointment. Se elimina del
+# modelo y solo PostgreSQL recibe el CHECK equivalente en SQL nativo; en SQLite
+# el límite lo comprueba Appointment.clean().
+CREATE_MAX_DURATION = """
+ALTER TABLE core_appointment
+    ADD CONSTRAINT appointment_max_duration
+    CHECK (end_time <= start_time + interval '24 hours');
+"""
+
+DROP_MAX_DURATION = "ALTER TABLE core_appointment DROP CONSTRAINT IF EXISTS appointment_max_duration;"
+
+
+def create_max_duration(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_MAX_DURATION)
+
+
+def drop_max_duration(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_MAX_DURATION)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_requestprofile_private_storage'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='appointment',
+            name='appointment_max_duration',
+        ),
+        migrations.RunPython(create_max_duration, drop_max_duration),
+    ]
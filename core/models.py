@@ -3,7 +3,9 @@ from django.db import models
 from django.utils import timezone
 from django.core.validators import MinValueValidator
 from django.utils.text import slugify
+from datetime import timedelta
 import json
+import re
 
 
 class CustomUserManager(BaseUserManager):
@@ -70,6 +72,102 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
         return self.first_name or self.email
 
 
+SCHEDULE_DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+SCHEDULE_TIME_RE = re.compile(r'^([01]\d|2[0-3]):[0-5]\d$')
+
+
+def validate_schedule_config(schedule_config):
+    """
+    Valida la estructura de schedule_config: días conocidos, `enabled`
+    booleano y los tramos de cada día (horas HH:MM, apertura antes del cierre,
+    en orden y sin solaparse). Acepta también el formato anterior con un solo
+    par "open"/"close" por día. Lanza ValidationError con todos los errores.
+    """
+    from django.core.exceptions import ValidationError
+    if not isinstance(schedule_config, dict):
+        raise ValidationError('La configuración de horarios debe ser un objeto JSON.')
+    errors = []
+    for day, config in schedule_config.items():
+        if day not in SCHEDULE_DAYS:
+            errors.append(f'Día desconocido: {day}.')
+            continue
+        if not isinstance(config, dict):
+            errors.append(f'{day}: la configuración debe ser un objeto.')
+            continue
+        enabled = config.get('enabled', False)
+        if not isinstance(enabled, bool):
+            errors.append(f'{day}: "enabled" debe ser true o false.')
+        if 'intervals' in config:
+            if 'open' in config or 'close' in config:
+                errors.append(f'{day}: usa "intervals" o "open"/"close", no ambos.')
+                continue
+            day_errors = schedule_interval_errors(config['intervals'], day)
+            if not day_errors and enabled and not config['intervals']:
+                day_errors = [f'{day}: un día abierto necesita al menos un tramo.']
+            errors.extend(day_errors)
+            continue
+        open_time, close_time = config.get('open'), config.get('close')
+        if not enabled and open_time is None and close_time is None:
+            continue
+        errors.extend(schedule_interval_errors([{'open': open_time, 'close': close_time}], day))
+    if errors:
+        raise ValidationError(errors)
+
+
+def schedule_day_intervals(day_config):
+    """
+    Tramos de apertura [(apertura, cierre), ...] (cadenas HH:MM) de la
+    configuración de un día; vacía si el día está cerrado. Lee el formato con
+    "intervals" y el anterior con un solo "open"/"close".
+    """
+    if not day_config or not day_config.get('enabled', False):
+        return []
+    if 'intervals' in day_config:
+        return [(interval['open'], interval['close']) for interval in day_config['intervals']]
+    return [(day_config.get('open', '09:00'), day_config.get('close', '18:00'))]
+
+
+def schedule_interval_errors(intervals, label):
+    """
+    Errores de una lista de tramos de apertura [{"open": "HH:MM", "close":
+    "HH:MM"}, ...]: formato de las horas, apertura antes del cierre y tramos
+    en orden sin solaparse. Retorna una lista de mensajes (vacía si es válida).
+    """
+    if not isinstance(intervals, list):
+        return [f'{label}: los tramos deben ser una lista.']
+    errors = []
+    previous_close = None
+    for position, interval in enumerate(intervals, start=1):
+        if not isinstance(interval, dict):
+            errors.append(f'{label}, tramo {position}: debe ser un objeto con "open" y "close".')
+            continue
+        open_time, close_time = interval.get('open'), interval.get('close')
+        invalid = [
+            name for name, value in (('open', open_time), ('close', close_time))
+            if not isinstance(value, str) or not SCHEDULE_TIME_RE.match(value)
+        ]
+        for name in invalid:
+            errors.append(f'{label}, tramo {position}: "{name}" debe tener formato HH:MM.')
+        if invalid:
+            continue
+        if open_time >= close_time:
+            errors.append(f'{label}, tramo {position}: la apertura ({open_time}) debe ser anterior al cierre ({close_time}).')
+        elif previous_close is not None and open_time < previous_close:
+            errors.append(f'{label}, tramo {position}: se solapa con el tramo anterior o no está en orden.')
+        previous_close = close_time
+    return errors
+
+
+def validate_timezone(value):
+    """Valida que la zona horaria exista en la base de datos IANA."""
+    from django.core.exceptions import ValidationError
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+    try:
+        ZoneInfo(value)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValidationError(f'Zona horaria desconocida: {value}.')
+
+
 class Business(models.Model):
     """
     Modelo de negocio (entidad multitenant principal).
@@ -88,8 +186,9 @@ class Business(models.Model):
     phone = models.CharField('Teléfono del Negocio', max_length=20, blank=True, null=True)
     email = models.EmailField('Email del Negocio', blank=True, null=True)
     
-    # Configuración de horarios en formato JSON
-    # Ejemplo: {"monday": {"open": "09:00", "close": "18:00", "enabled": true}, ...}
+    # Configuración de horarios en formato JSON, con uno o más tramos por día
+    # Ejemplo: {"monday": {"enabled": true, "intervals": [{"open": "09:00", "close": "14:00"},
+    #                                                    {"open": "15:00", "close": "20:00"}]}, ...}
     schedule_config = models.JSONField(
         'Configuración de Horarios',
         default=dict,
@@ -168,24 +267,54 @@ class Business(models.Model):
     def __str__(self):
         return self.name
     
+    def clean(self):
+        """Valida el horario y la zona horaria."""
+        from django.core.exceptions import ValidationError
+        errors = {}
+        for field, validator in (('schedule_config', validate_schedule_config), ('timezone', validate_timezone)):
+            value = getattr(self, field)
+            if not value:
+                continue
+            try:
+                validator(value)
+            except ValidationError as e:
+                errors[field] = e.messages
+        if errors:
+            raise ValidationError(errors)
+    
     def save(self, *args, **kwargs):
         """Genera el slug automáticamente si no existe."""
         if not self.slug:
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Recuerda slug y owner cargados para invalidar cachés si cambian."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_slug = instance.__dict__.get('slug')
+        instance._loaded_owner_id = instance.__dict__.get('owner_id')
+        return instance
+    
     def get_default_schedule(self):
-        """Retorna la configuración de horarios por defecto."""
+        """Retorna la configuración de horarios por defecto (lunes a sábado de 09:00 a 20:00)."""
         return {
-            "monday": {"open": "09:00", "close": "20:00", "enabled": True},
-            "tuesday": {"open": "09:00", "close": "20:00", "enabled": True},
-            "wednesday": {"open": "09:00", "close": "20:00", "enabled": True},
-            "thursday": {"open": "09:00", "close": "20:00", "enabled": True},
-            "friday": {"open": "09:00", "close": "20:00", "enabled": True},
-            "saturday": {"open": "09:00", "close": "20:00", "enabled": True},
-            "sunday": {"open": "09:00", "close": "20:00", "enabled": False},
+            day: {"enabled": day != "sunday", "intervals": [{"open": "09:00", "close": "20:00"}]}
+            for day in SCHEDULE_DAYS
         }
     
+    def get_weekly_hours(self):
+        """
+        Días abiertos en orden (lunes a domingo) con sus tramos, para mostrar
+        el horario: [{'day': 'monday', 'intervals': [('09:00', '14:00'), ...]}, ...].
+        """
+        schedule_config = self.schedule_config or self.get_default_schedule()
+        return [
+            {'day': day, 'intervals': intervals}
+            for day in SCHEDULE_DAYS
+            if (intervals := schedule_day_intervals(schedule_config.get(day)))
+        ]
+    
     def get_local_now(self):
         """Retorna la fecha/hora actual en la zona horaria del negocio."""
         from django.utils import timezone as tz
@@ -242,6 +371,21 @@ class Service(models.Model):
         return f"{self.business.name} - {self.name}"
 
 
+# Estados que ocupan capacidad. Una cita "activa" es una de estas o un bloqueo;
+# es la condición de las consultas de disponibilidad y de los índices parciales.
+ACTIVE_BOOKING_STATUSES = ('pending', 'confirmed')
+ACTIVE_BOOKING_Q = models.Q(status__in=ACTIVE_BOOKING_STATUSES) | models.Q(is_block=True)
+
+# Duración máxima de una cita o bloqueo. Permite acotar por abajo las búsquedas
+# de solapamiento (start_time > inicio - MAX_APPOINTMENT_DURATION) y recorrer
+# solo un tramo pequeño del índice. La comprueba Appointment.clean() y, en
+# PostgreSQL, el CHECK appointment_max_duration (migración 0018; en SQLite la
+# resta de fechas compila a una función de Django que otras herramientas no
+# conocen). Los bloqueos más largos se dividen en varias filas (migración 0016)
+# y los cierres de varios días van en ScheduleException.
+MAX_APPOINTMENT_DURATION = timedelta(hours=24)
+
+
 class Appointment(models.Model):
     """
     Modelo de cita/reserva.
@@ -301,6 +445,21 @@ class Appointment(models.Model):
             models.Index(fields=['business', 'start_time']),
             models.Index(fields=['client', 'start_time']),
             models.Index(fields=['status']),
+            # Orden del admin (-start_time, -id): paginar sin ordenar toda la tabla
+            models.Index(fields=['start_time', 'id'], name='appt_start_time_id'),
+            # Índice parcial solo con citas activas: disponibilidad y solapamientos
+            # se resuelven sin leer la tabla (cubre start_time y end_time)
+            models.Index(
+                fields=['business', 'start_time', 'end_time'],
+                condition=ACTIVE_BOOKING_Q,
+                name='appt_active_business_time',
+            ),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(end_time__gt=models.F('start_time')),
+                name='appointment_end_after_start',
+            ),
         ]
     
     def __str__(self):
@@ -314,6 +473,8 @@ class Appointment(models.Model):
         # Solo validar end_time si ya está definido
         if self.end_time and self.end_time <= self.start_time:
             raise ValidationError('La hora de fin debe ser posterior a la hora de inicio.')
+        if self.end_time and self.end_time - self.start_time > MAX_APPOINTMENT_DURATION:
+            raise ValidationError('Una cita o bloqueo no puede durar más de 24 horas.')
         if not self.is_block and not self.service:
             raise ValidationError('Las citas deben tener un servicio asignado.')
     
@@ -321,22 +482,224 @@ class Appointment(models.Model):
         """Valida y calcula end_time si no está definido."""
         # Calcular end_time ANTES de validar
         if not self.end_time:
-            from datetime import timedelta
             if self.service:
                 self.end_time = self.start_time + timedelta(minutes=self.service.duration_minutes)
             elif self.is_block:
                 # Bloqueos sin servicio duran 1 hora por defecto
                 self.end_time = self.start_time + timedelta(hours=1)
         
-        # Ahora validar con end_time ya calculado
+        # Ahora validar con end_time ya calculado. clean() ya comprueba en Python
+        # el orden y la duración máxima (la base de datos los garantiza igual): se
+        # omite validate_constraints, que haría una consulta por restricción.
+        self.full_clean(validate_constraints=False)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Recuerda el estado y el horario cargados para detectar cambios al
+        guardar (webhooks de estado, caché de disponibilidad).
+        """
+        instance = super().from_db(db, field_names, values)
+        if 'status' in field_names:
+            instance._loaded_status = instance.status
+        if 'start_time' in field_names and 'end_time' in field_names:
+            instance._loaded_times = (instance.start_time, instance.end_time)
+        return instance
+
+
+# Rango máximo de una excepción de horario (cada día del rango invalida su caché de slots)
+MAX_SCHEDULE_EXCEPTION_DAYS = 366
+
+
+class ScheduleException(models.Model):
+    """
+    Excepción al horario semanal de un negocio para una fecha o un rango de
+    fechas (ambas inclusive): cerrado todo el día (festivos, vacaciones) o con
+    tramos de apertura propios (horario especial). En esas fechas reemplaza a
+    schedule_config, sin crear bloqueos en la tabla de citas.
+    
+    Si varias excepciones cubren la misma fecha se aplica la de rango más
+    corto (la más específica) y, entre iguales, la más reciente.
+    """
+    business = models.ForeignKey(
+        Business,
+        on_delete=models.CASCADE,
+        related_name='schedule_exceptions',
+        verbose_name='Negocio'
+    )
+    start_date = models.DateField('Fecha de Inicio')
+    end_date = models.DateField('Fecha de Fin', help_text='Igual a la fecha de inicio para un solo día')
+    is_closed = models.BooleanField(
+        'Cerrado',
+        default=True,
+        help_text='Cerrado todo el día; si no está marcado se usan los tramos de apertura'
+    )
+    intervals = models.JSONField(
+        'Tramos de Apertura',
+        default=list,
+        blank=True,
+        help_text='Hora local del negocio, ej: [{"open": "10:00", "close": "14:00"}]'
+    )
+    reason = models.CharField('Motivo', max_length=200, blank=True, default='')
+    created_at = models.DateTimeField('Fecha de Creación', auto_now_add=True)
+    updated_at = models.DateTimeField('Fecha de Actualización', auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Excepción de Horario'
+        verbose_name_plural = 'Excepciones de Horario'
+        ordering = ['start_date']
+        indexes = [
+            # Excepciones que cubren un rango: business = X AND end_date >= inicio
+            # AND start_date <= fin; las pasadas quedan fuera del tramo recorrido
+            models.Index(fields=['business', 'end_date', 'start_date'], name='schedexc_business_dates'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(end_date__gte=models.F('start_date')),
+                name='schedule_exception_end_after_start',
+            ),
+        ]
+    
+    def __str__(self):
+        dates = self.start_date.isoformat()
+        if self.end_date != self.start_date:
+            dates += f' a {self.end_date.isoformat()}'
+        return f"{dates} - {'Cerrado' if self.is_closed else 'Horario especial'}"
+    
+    def clean(self):
+        """Valida el rango de fechas y los tramos de apertura."""
+        from django.core.exceptions import ValidationError
+        errors = {}
+        if self.start_date and self.end_date:
+            if self.end_date < self.start_date:
+                errors['end_date'] = 'La fecha de fin no puede ser anterior a la de inicio.'
+            elif (self.end_date - self.start_date).days >= MAX_SCHEDULE_EXCEPTION_DAYS:
+                errors['end_date'] = f'Una excepción no puede cubrir más de {MAX_SCHEDULE_EXCEPTION_DAYS} días.'
+        if not self.is_closed:
+            interval_errors = schedule_interval_errors(self.intervals, 'Tramos')
+            if not interval_errors and not self.intervals:
+                interval_errors = ['Indica al menos un tramo de apertura o marca el día como cerrado.']
+            if interval_errors:
+                errors['intervals'] = interval_errors
+        if errors:
+            raise ValidationError(errors)
+    
+    def save(self, *args, **kwargs):
+        """Valida antes de guardar: el cálculo de disponibilidad confía en los tramos."""
+        if self.is_closed:
+            self.intervals = []
         self.full_clean()
         super().save(*args, **kwargs)
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Recuerda las fechas cargadas para invalidar también su caché si cambian."""
+        instance = super().from_db(db, field_names, values)
+        if 'start_date' in field_names and 'end_date' in field_names:
+            instance._loaded_dates = (instance.start_date, instance.end_date)
+        return instance
+    
+    def get_intervals(self):
+        """[(apertura, cierre), ...] como cadenas HH:MM; vacía si cierra."""
+        if self.is_closed:
+            return []
+        return [(interval['open'], interval['close']) for interval in self.intervals]
+    
+    def dates(self):
+        """Fechas que cubre la excepción."""
+        return [self.start_date + timedelta(days=i) for i in range((self.end_date - self.start_date).days + 1)]
+
+
+class ArchivedAppointment(models.Model):
+    """
+    Cita antigua movida fuera de la tabla de citas activas (ver core/archive.py).
+    Conserva el id original y una copia del nombre y precio del servicio, para
+    que el historial siga siendo legible aunque el servicio cambie o se elimine.
+    """
+    original_id = models.PositiveBigIntegerField('ID Original', unique=True)
+    business = models.ForeignKey(
+        Business,
+        on_delete=models.CASCADE,
+        related_name='archived_appointments',
+        verbose_name='Negocio'
+    )
+    client = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='archived_appointments',
+        verbose_name='Cliente'
+    )
+    service = models.ForeignKey(
+        Service,
+        on_delete=models.SET_NULL,
+        related_name='archived_appointments',
+        verbose_name='Servicio',
+        null=True,
+        blank=True
+    )
+    service_name = models.CharField('Nombre del Servicio', max_length=200, blank=True, default='')
+    service_price = models.DecimalField('Precio', max_digits=10, decimal_places=2, null=True, blank=True)
+    start_time = models.DateTimeField('Hora de Inicio')
+    end_time = models.DateTimeField('Hora de Fin')
+    status = models.CharField('Estado', max_length=20, choices=Appointment.STATUS_CHOICES)
+    notes = models.TextField('Notas', blank=True, null=True)
+    is_block = models.BooleanField('Es Bloqueo', default=False)
+    created_at = models.DateTimeField('Fecha de Creación')
+    updated_at = models.DateTimeField('Fecha de Actualización')
+    archived_at = models.DateTimeField('Fecha de Archivo', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Cita Archivada'
+        verbose_name_plural = 'Citas Archivadas'
+        ordering = ['-start_time']
+        indexes = [
+            models.Index(fields=['client', 'start_time']),
+            models.Index(fields=['business', 'start_time']),
+        ]
+
+    def __str__(self):
+        return f"{self.business_id} - {self.service_name or 'BLOQUEO'} - {self.start_time.strftime('%Y-%m-%d %H:%M')}"
+
+
+class MediaBlob(models.Model):
+    """
+    Archivo único guardado por contenido (SHA-256) con conteo de referencias.
+    Ver core/storage.py: varias imágenes idénticas comparten un mismo blob.
+    """
+    digest = models.CharField('SHA-256', max_length=64, unique=True)
+    name = models.CharField('Ruta', max_length=255)
+    size = models.PositiveBigIntegerField('Tamaño (bytes)', default=0)
+    ref_count = models.PositiveIntegerField('Referencias', default=0)
+    created_at = models.DateTimeField('Fecha de Creación', auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Blob de Media'
+        verbose_name_plural = 'Blobs de Media'
+        indexes = [
+            models.Index(fields=['name']),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+
+
+def get_gallery_storage():
+    """Storage de la galería: deduplicado por contenido."""
+    from .storage import ContentAddressedStorage
+    return ContentAddressedStorage()
 
 
 class GalleryImage(models.Model):
     """
     Modelo para almacenar imágenes de la galería de trabajos de un negocio.
     """
+    PROCESSING_STATUS_CHOICES = [
+        ('pending', 'Pendiente'),
+        ('ready', 'Lista'),
+        ('failed', 'Fallida'),
+    ]
+    
     business = models.ForeignKey(
         Business,
         on_delete=models.CASCADE,
@@ -346,6 +709,7 @@ class GalleryImage(models.Model):
     image = models.ImageField(
         'Imagen',
         upload_to='gallery/%Y/%m/%d/',
+        storage=get_gallery_storage,
         help_text='Imagen de trabajo realizado'
     )
     caption = models.CharField(
@@ -360,6 +724,20 @@ class GalleryImage(models.Model):
         default=0,
         help_text='Orden de visualización (menor número aparece primero)'
     )
+    # Versiones redimensionadas generadas en segundo plano (ver core/images.py)
+    # Ejemplo: {"thumbnail": {"width": 320, "height": 240, "webp": "gallery/...", "jpeg": "gallery/..."}, ...}
+    variants = models.JSONField(
+        'Variantes',
+        default=dict,
+        blank=True,
+        help_text='Versiones redimensionadas de la imagen (thumbnail, medium, large)'
+    )
+    processing_status = models.CharField(
+        'Estado de Procesamiento',
+        max_length=20,
+        choices=PROCESSING_STATUS_CHOICES,
+        default='pending'
+    )
     created_at = models.DateTimeField('Fecha de Creación', auto_now_add=True)
     
     class Meta:
@@ -369,3 +747,202 @@ class GalleryImage(models.Model):
     
     def __str__(self):
         return f"{self.business.name} - {self.image.name}"
+    
+    def get_variant_url(self, name, fmt='jpeg'):
+        """
+        Retorna la URL de una variante, o None si aún no se procesó (o falló).
+        Nunca la original: conserva los metadatos EXIF (incluida la ubicación GPS).
+        """
+        variant = self.variants.get(name)
+        if variant and variant.get(fmt):
+            return self.image.storage.url(variant[fmt])
+        return None
+    
+    def get_srcset(self, fmt='jpeg'):
+        """Retorna el atributo srcset con todas las variantes del formato indicado."""
+        entries = []
+        seen = set()
+        for variant in sorted(self.variants.values(), key=lambda v: v['width']):
+            if variant.get(fmt) and variant[fmt] not in seen:
+                seen.add(variant[fmt])
+                entries.append(f"{self.image.storage.url(variant[fmt])} {variant['width']}w")
+        return ', '.join(entries)
+    
+    @property
+    def srcset_webp(self):
+        return self.get_srcset('webp')
+    
+    @property
+    def srcset_jpeg(self):
+        return self.get_srcset('jpeg')
+    
+    @property
+    def thumbnail_url(self):
+        return self.get_variant_url('thumbnail')
+    
+    @property
+    def medium_url(self):
+        return self.get_variant_url('medium')
+
+
+def generate_webhook_secret():
+    """Genera un secreto aleatorio para firmar los webhooks."""
+    import secrets
+    return secrets.token_hex(32)
+
+
+class WebhookEndpoint(models.Model):
+    """
+    Suscripción de un negocio a eventos de citas (POS, contabilidad, etc.).
+    Los eventos se entregan en lotes firmados con HMAC-SHA256.
+    """
+    EVENT_CHOICES = [
+        ('appointment.created', 'Cita creada'),
+        ('appointment.confirmed', 'Cita confirmada'),
+        ('appointment.completed', 'Cita completada'),
+        ('appointment.cancelled', 'Cita cancelada'),
+        ('appointment.no_show', 'Cliente no se presentó'),
+    ]
+    
+    business = models.ForeignKey(
+        Business,
+        on_delete=models.CASCADE,
+        related_name='webhook_endpoints',
+        verbose_name='Negocio'
+    )
+    url = models.URLField('URL de Destino', max_length=500)
+    secret = models.CharField(
+        'Secreto',
+        max_length=128,
+        default=generate_webhook_secret,
+        help_text='Secreto compartido para verificar la firma X-SaasBarber-Signature'
+    )
+    events = models.JSONField(
+        'Eventos',
+        default=list,
+        blank=True,
+        help_text='Lista de eventos suscritos (vacío = todos los eventos)'
+    )
+    is_active = models.BooleanField('Activo', default=True)
+    created_at = models.DateTimeField('Fecha de Creación', auto_now_add=True)
+    updated_at = models.DateTimeField('Fecha de Actualización', auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Webhook'
+        verbose_name_plural = 'Webhooks'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.business.name} - {self.url}"
+    
+    def is_subscribed(self, event_type):
+        """Indica si el endpoint está suscrito al tipo de evento."""
+        return not self.events or event_type in self.events
+
+
+class WebhookEvent(models.Model):
+    """
+    Evento pendiente de entrega a un WebhookEndpoint (cola de salida).
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pendiente'),
+        ('delivered', 'Entregado'),
+    ]
+    
+    endpoint = models.ForeignKey(
+        WebhookEndpoint,
+        on_delete=models.CASCADE,
+        related_name='pending_events',
+        verbose_name='Webhook'
+    )
+    event_type = models.CharField('Tipo de Evento', max_length=50)
+    payload = models.JSONField('Contenido', default=dict)
+    status = models.CharField('Estado', max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField('Intentos', default=0)
+    next_attempt_at = models.DateTimeField('Próximo Intento', default=timezone.now)
+    last_error = models.TextField('Último Error', blank=True, default='')
+    created_at = models.DateTimeField('Fecha de Creación', auto_now_add=True)
+    delivered_at = models.DateTimeField('Fecha de Entrega', blank=True, null=True)
+    
+    class Meta:
+        verbose_name = 'Evento de Webhook'
+        verbose_name_plural = 'Eventos de Webhook'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.event_type} -> {self.endpoint_id} ({self.status})"
+
+
+class WebhookDeadLetter(models.Model):
+    """
+    Eventos que agotaron sus reintentos de entrega.
+    Se conservan para inspección y reenvío manual desde el admin.
+    """
+    endpoint = models.ForeignKey(
+        WebhookEndpoint,
+        on_delete=models.CASCADE,
+        related_name='dead_letters',
+        verbose_name='Webhook'
+    )
+    event_type = models.CharField('Tipo de Evento', max_length=50)
+    payload = models.JSONField('Contenido', default=dict)
+    attempts = models.PositiveIntegerField('Intentos', default=0)
+    last_error = models.TextField('Último Error', blank=True, default='')
+    event_created_at = models.DateTimeField('Fecha del Evento')
+    created_at = models.DateTimeField('Fecha de Fallo', auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Webhook Fallido'
+        verbose_name_plural = 'Webhooks Fallidos'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.event_type} -> {self.endpoint_id} ({self.attempts} intentos)"
+
+
+def get_profile_storage():
+    """Storage privado de los perfiles: fuera de MEDIA_ROOT, sin URL pública."""
+    from django.conf import settings
+    from .storage import PrivateFileSystemStorage
+    return PrivateFileSystemStorage(location=settings.PROFILING_STORAGE_DIR)
+
+
+class RequestProfile(models.Model):
+    """
+    Perfil de una petición ejecutada con el profiler (ver core/profiling.py).
+    Guarda el volcado de cProfile (pstats) y las pilas muestreadas en formato
+    "collapsed" (listo para flamegraph.pl o speedscope).
+    """
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.SET_NULL,
+        related_name='request_profiles',
+        verbose_name='Usuario',
+        null=True,
+        blank=True
+    )
+    method = models.CharField('Método', max_length=10)
+    path = models.CharField('Ruta', max_length=500)
+    view_name = models.CharField('Vista', max_length=200, blank=True, default='')
+    business_slug = models.CharField('Negocio', max_length=200, blank=True, default='', db_index=True)
+    status_code = models.PositiveIntegerField('Código HTTP', default=0)
+    duration_ms = models.FloatField('Duración (ms)', default=0)
+    query_count = models.PositiveIntegerField('Consultas SQL', default=0)
+    db_ms = models.FloatField('Tiempo en BD (ms)', default=0)
+    # Nombres aleatorios en un storage privado: se descargan solo desde el admin
+    pstats_file = models.FileField('Volcado pstats', upload_to='%Y/%m/', storage=get_profile_storage, blank=True)
+    collapsed_file = models.FileField(
+        'Pilas (collapsed)', upload_to='%Y/%m/', storage=get_profile_storage, blank=True
+    )
+    created_at = models.DateTimeField('Fecha de Creación', auto_now_add=True, db_index=True)
+    
+    class Meta:
+        verbose_name = 'Perfil de Petición'
+        verbose_name_plural = 'Perfiles de Peticiones'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
@@ -5,7 +5,8 @@ Por ahora simula el envío, pero está preparado para integración con Twilio.
 import logging
 from datetime import timedelta
 from django.utils import timezone
-from .models import Appointment
+from .models import Appointment, ACTIVE_BOOKING_STATUSES
+from .metrics import REMINDERS
 
 logger = logging.getLogger(__name__)
 
@@ -26,11 +27,20 @@ def send_whatsapp_reminder(appointment_id):
         # Validar que la cita no sea un bloqueo
         if appointment.is_block:
             logger.info(f"Cita {appointment_id} es un bloqueo, no se envía recordatorio")
+            REMINDERS.labels(outcome='skipped').inc()
+            return False
+        
+        # Validar que la cita siga activa (pudo cancelarse o cerrarse después de
+        # programarla): es la única cancelación real de un recordatorio
+        if appointment.status not in ACTIVE_BOOKING_STATUSES:
+            logger.info(f"Cita {appointment_id} en estado {appointment.status}, no se envía recordatorio")
+            REMINDERS.labels(outcome='cancelled').inc()
             return False
         
         # Validar que la cita tenga cliente
         if not appointment.client:
             logger.warning(f"Cita {appointment_id} no tiene cliente asociado")
+            REMINDERS.labels(outcome='skipped').inc()
             return False
         
         # Calcular tiempo hasta la cita
@@ -38,6 +48,7 @@ def send_whatsapp_reminder(appointment_id):
         
         if time_until_appointment.total_seconds() < 0:
             logger.info(f"Cita {appointment_id} ya pasó, no se envía recordatorio")
+            REMINDERS.labels(outcome='skipped').inc()
             return False
         
         # Preparar mensaje
@@ -75,14 +86,17 @@ def send_whatsapp_reminder(appointment_id):
         print(f"{'='*60}\n")
         
         logger.info(f"Recordatorio WhatsApp simulado para cita {appointment_id} - Cliente: {client_name}")
+        REMINDERS.labels(outcome='sent').inc()
         
         return True
         
     except Appointment.DoesNotExist:
         logger.error(f"Cita {appointment_id} no encontrada")
+        REMINDERS.labels(outcome='skipped').inc()
         return False
     except Exception as e:
         logger.error(f"Error al enviar recordatorio WhatsApp para cita {appointment_id}: {str(e)}")
+        REMINDERS.labels(outcome='error').inc()
         return False
 
 
@@ -134,6 +148,7 @@ def schedule_whatsapp_reminder(appointment_id, minutes_before=15):
             f"Recordatorio programado para cita {appointment_id} - "
             f"Se enviará {minutes_before} min antes de {appointment.start_time}"
         )
+        REMINDERS.labels(outcome='scheduled').inc()
         
         return True
         
@@ -142,4 +157,6 @@ def schedule_whatsapp_reminder(appointment_id, minutes_before=15):
         return False
     except Exception as e:
         logger.error(f"Error al programar recordatorio para cita {appointment_id}: {str(e)}")
+        REMINDERS.labels(outcome='error').inc()
         return False
+
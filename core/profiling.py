@@ -0,0 +1,147 @@
+"""
+Perfilado bajo demanda de peticiones individuales.
+
+Un usuario staff agrega `?_profile=1` (o el header `X-Profile: 1`) a una
+petición y esta se ejecuta bajo cProfile y, en paralelo, un muestreador de
+pilas. El resultado se guarda como RequestProfile:
+
+- `pstats_file`: volcado de cProfile (`python -m pstats archivo`, snakeviz)
+- `collapsed_file`: pilas en formato "collapsed" (`flamegraph.pl archivo`,
+  o importarlo en speedscope.app)
+
+Los archivos se guardan con nombres aleatorios en un storage privado
+(PROFILING_STORAGE_DIR, fuera de MEDIA_ROOT) y solo se descargan desde el admin.
+"""
+import cProfile
+import io
+import marshal
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from django.conf import settings
+from django.core.files.base import ContentFile
+from .models import RequestProfile
+
+PROFILE_PARAM = '_profile'
+PROFILE_HEADER = 'X-Profile'
+
+
+def wants_profile(request):
+    """True si la petición pide perfilado (se verifica antes de mirar al usuario)."""
+    return PROFILE_PARAM in request.GET or PROFILE_HEADER in request.headers
+
+
+class StackSampler:
+    """
+    Muestrea periódicamente la pila del hilo indicado y cuenta las pilas
+    iguales, en el formato "collapsed" de los flamegraphs. Las pilas se
+    cortan en `root_frame` para no incluir los frames del servidor.
+    """
+
+    def __init__(self, thread_id, interval, root_frame=None):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.root_frame = root_frame
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                if frame is self.root_frame:
+                    break
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def collapsed(self):
+        return '\n'.join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + '\n'
+
+
+class RequestProfiler:
+    """Context manager que perfila el bloque con cProfile y el muestreador."""
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.sampler = StackSampler(
+            threading.get_ident(),
+            settings.PROFILING_SAMPLE_INTERVAL_MS / 1000,
+            root_frame=sys._getframe(1),
+        )
+        self.duration_ms = 0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        self.sampler.start()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.disable()
+        self.sampler.stop()
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+        return False
+
+    def pstats_dump(self):
+        """Mismo contenido que Profile.dump_stats(), sin pasar por un archivo."""
+        self.profiler.create_stats()
+        return marshal.dumps(self.profiler.stats)
+
+
+def save_profile(request, response, profiler, recorder):
+    """Guarda el resultado del perfilado y elimina los perfiles más antiguos."""
+    match = request.resolver_match
+    business = getattr(request, 'business', None)
+    profile = RequestProfile(
+        user=request.user if request.user.is_authenticated else None,
+        method=request.method,
+        path=request.get_full_path()[:500],
+        view_name=(match.view_name if match else '')[:200],
+        business_slug=business.slug if business else (match.kwargs.get('business_slug', '') if match else ''),
+        status_code=response.status_code,
+        duration_ms=round(profiler.duration_ms, 2),
+        query_count=len(recorder.queries),
+        db_ms=round(recorder.db_time, 2),
+    )
+    name = uuid.uuid4().hex
+    profile.pstats_file.save(f'{name}.pstats', ContentFile(profiler.pstats_dump()), save=False)
+    profile.collapsed_file.save(f'{name}.collapsed.txt', ContentFile(profiler.sampler.collapsed()), save=False)
+    profile.save()
+    prune_profiles(settings.PROFILING_MAX_PROFILES)
+    return profile
+
+
+def prune_profiles(keep):
+    """Conserva solo los `keep` perfiles más recientes (sus archivos se borran en core.signals)."""
+    old_ids = list(RequestProfile.objects.order_by('-created_at', '-id').values_list('id', flat=True)[keep:])
+    if old_ids:
+        RequestProfile.objects.filter(id__in=old_ids).delete()
+
+
+def format_top_functions(profile, limit=25):
+    """Resumen legible (funciones con más tiempo acumulado) de un perfil guardado."""
+    import pstats
+
+    with profile.pstats_file.open('rb') as file:
+        stats_data = marshal.loads(file.read())
+    output = io.StringIO()
+    stats = pstats.Stats(stream=output)
+    stats.stats = stats_data
+    stats.get_top_level_stats()
+    stats.sort_stats('cumulative').print_stats(limit)
+    return output.getvalue()
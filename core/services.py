@@ -1,10 +1,330 @@
 """
 Service layer para lógica de negocio relacionada con citas y disponibilidad.
 """
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
 from datetime import datetime, timedelta, time
+from math import ceil, floor
+from zoneinfo import ZoneInfo
 from django.utils import timezone
-from django.db.models import Q
-from .models import Business, Service, Appointment
+from django.db import connections, transaction
+from django.db.models import F, Func, BooleanField
+from django.db.models.expressions import Expression
+from .models import (
+    Business, Service, Appointment, ScheduleException,
+    ACTIVE_BOOKING_Q, ACTIVE_BOOKING_STATUSES, MAX_APPOINTMENT_DURATION, schedule_day_intervals,
+)
+from .caching import booking_dates, bump_availability_versions
+from .metrics import AVAILABILITY_LATENCY, AVAILABILITY_SLOTS
+from .webhooks import STATUS_EVENTS, build_appointment_payload, emit_appointment_events
+
+
+class ActiveBookingCondition(Expression):
+    """
+    status IN ('pending', 'confirmed') OR is_block, con los estados como
+    literales SQL. Las columnas se resuelven como expresiones del queryset, así
+    que llevan el alias correcto también dentro de subconsultas (U0, ...).
+    """
+    conditional = True
+
+    def __init__(self):
+        super().__init__(output_field=BooleanField())
+        self.status = F('status')
+        self.is_block = F('is_block')
+
+    def get_source_expressions(self):
+        return [self.status, self.is_block]
+
+    def set_source_expressions(self, exprs):
+        self.status, self.is_block = exprs
+
+    def as_sql(self, compiler, connection):
+        status_sql, status_params = compiler.compile(self.status)
+        block_sql, block_params = compiler.compile(self.is_block)
+        statuses = ', '.join(f"'{status}'" for status in ACTIVE_BOOKING_STATUSES)
+        return f'({status_sql} IN ({statuses}) OR {block_sql})', (*status_params, *block_params)
+
+
+def active_bookings(queryset=None):
+    """
+    Filtra las citas que ocupan capacidad (pendientes, confirmadas o bloqueos).
+
+    La condición es la misma del índice parcial `appt_active_business_time`.
+    En SQLite se escribe con los estados como literales: el planificador solo
+    usa un índice parcial si puede demostrar que la consulta implica su
+    condición, y no puede hacerlo cuando los estados van como parámetros.
+    """
+    if queryset is None:
+        queryset = Appointment.objects.all()
+    if connections[queryset.db].vendor != 'sqlite':
+        return queryset.filter(ACTIVE_BOOKING_Q)
+
+    return queryset.filter(ActiveBookingCondition())
+
+
+def local_day_range(date, tz=None):
+    """
+    Retorna el intervalo [inicio, fin) del día `date` en la zona horaria dada
+    (por defecto la actual). Equivale a start_time__date=date, pero como rango
+    sobre la columna puede usar los índices de start_time.
+    """
+    tz = tz or timezone.get_current_timezone()
+    start = datetime.combine(date, time.min).replace(tzinfo=tz)
+    end = datetime.combine(date + timedelta(days=1), time.min).replace(tzinfo=tz)
+    return start, end
+
+
+def filter_overlapping(queryset, start_time, end_time):
+    """
+    Filtra las citas cuyo intervalo [start_time, end_time) se solapa con el dado.
+
+    En PostgreSQL usa el operador de rangos `&&` sobre tstzrange(start_time, end_time),
+    que aprovecha el índice GiST creado en la migración 0009. En otros motores
+    usa la comparación equivalente start_time < fin AND end_time > inicio, más
+    una cota inferior para start_time (ninguna cita dura más de
+    MAX_APPOINTMENT_DURATION) que limita el tramo del índice que se recorre.
+    """
+    if connections[queryset.db].vendor == 'postgresql':
+        from django.contrib.postgres.fields import DateTimeRangeField
+        return queryset.alias(
+            time_range=Func(
+                F('start_time'), F('end_time'),
+                function='tstzrange',
+                output_field=DateTimeRangeField(),
+            )
+        ).filter(time_range__overlap=(start_time, end_time))
+    return queryset.filter(
+        start_time__lt=end_time,
+        start_time__gt=start_time - MAX_APPOINTMENT_DURATION,
+        end_time__gt=start_time,
+    )
+
+
+def delete_appointments(queryset, bookings=None):
+    """
+    Borrado masivo de citas con un DELETE directo: sin cargar las filas ni
+    emitir post_delete por cada una (la señal desactiva el borrado rápido de
+    Django). Ningún modelo apunta a Appointment, así que no hay cascadas.
+
+    La disponibilidad cacheada se invalida una vez por negocio al confirmar
+    la transacción, con los días de `bookings` (tuplas business_id,
+    start_time, end_time ya leídas por el llamador; None = leerlas del
+    queryset, vacío = no invalidar).
+
+    Returns:
+        int: Filas borradas
+    """
+    if bookings is None:
+        bookings = queryset.values_list('business_id', 'start_time', 'end_time').iterator()
+    ranges_by_business = {}
+    for business_id, start_time, end_time in bookings:
+        ranges_by_business.setdefault(business_id, set()).add((start_time, end_time))
+    deleted = queryset._raw_delete(queryset.db)
+    dates_by_business = {
+        business_id: booking_dates(time_ranges) for business_id, time_ranges in ranges_by_business.items()
+    }
+    if dates_by_business:
+        def bump():
+            for business_id, dates in dates_by_business.items():
+                bump_availability_versions(business_id, dates)
+        transaction.on_commit(bump)
+    return deleted
+
+
+# Resolución de la agenda: los slots empiezan cada 15 minutos desde la apertura
+SLOT_STEP_MINUTES = 15
+# Días que se pueden pedir juntos en formato compacto
+MAX_COMPACT_DAYS = 14
+DAY_KEYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+
+class SlotGrid(namedtuple('SlotGrid', 'start step duration count free')):
+    """
+    Disponibilidad de un día en forma compacta.
+    
+    start: datetime del primer slot posible (apertura, hora local del negocio)
+        o None si el día está cerrado
+    step: minutos entre slots; duration: minutos del servicio
+    count: número de slots posibles del día
+    free: lista de [primer_slot, cantidad] con los slots libres (el slot k
+        empieza en start + k * step)
+    """
+    __slots__ = ()
+    
+    @property
+    def free_count(self):
+        return sum(length for _first, length in self.free)
+    
+    def slots(self):
+        """Los slots libres como datetimes (formato detallado)."""
+        return [
+            self.start + timedelta(minutes=index * self.step)
+            for first, length in self.free
+            for index in range(first, first + length)
+        ]
+    
+    def as_compact(self):
+        """Representación JSON compacta: inicio, paso y rangos libres."""
+        return {
+            'start': self.start.isoformat() if self.start else None,
+            'step': self.step,
+            'duration': self.duration,
+            'count': self.count,
+            'free': [list(free_range) for free_range in self.free],
+        }
+
+
+def _business_tz(business):
+    try:
+        return ZoneInfo(business.timezone)
+    except Exception:
+        return timezone.get_current_timezone()
+
+
+def _parse_time(value):
+    hour, minute = map(int, value.split(':'))
+    return time(hour, minute)
+
+
+def schedule_exceptions(business, start_date, end_date):
+    """
+    Excepciones de horario del negocio que cubren alguna fecha de
+    [start_date, end_date] (índice schedexc_business_dates).
+    """
+    return ScheduleException.objects.filter(
+        business=business, end_date__gte=start_date, start_date__lte=end_date,
+    )
+
+
+def exceptions_by_date(exceptions, dates):
+    """
+    Excepción que aplica a cada fecha: la de rango más corto y, entre
+    iguales, la más reciente. Las fechas sin excepción no aparecen.
+    """
+    by_date = {}
+    for exception in sorted(exceptions, key=lambda e: ((e.end_date - e.start_date).days, -e.pk)):
+        for date in dates:
+            if exception.start_date <= date <= exception.end_date:
+                by_date.setdefault(date, exception)
+    return by_date
+
+
+def day_intervals(schedule_config, date, tz, exception=None):
+    """
+    Tramos de apertura [(inicio, fin), ...] del día en la zona del negocio, en
+    orden; lista vacía si cierra. Una excepción de horario para la fecha
+    reemplaza al horario semanal.
+    """
+    if exception is not None:
+        pairs = exception.get_intervals()
+    else:
+        pairs = schedule_day_intervals(schedule_config.get(DAY_KEYS[date.weekday()]))
+    return [
+        (
+            datetime.combine(date, _parse_time(open_time)).replace(tzinfo=tz),
+            datetime.combine(date, _parse_time(close_time)).replace(tzinfo=tz),
+        )
+        for open_time, close_time in pairs
+    ]
+
+
+def _minutes_since(moment, day_start):
+    """Minutos (hora local) desde day_start; ambos se comparan en la zona de day_start."""
+    return (moment.astimezone(day_start.tzinfo) - day_start).total_seconds() / 60
+
+
+def _slot_grid(intervals, duration, capacity, bookings, now, is_today):
+    """
+    Slots libres de un día, con la misma regla que _check_slot_capacity: un
+    slot está ocupado si se solapa con `capacity` o más reservas. Con los
+    inicios y fines de las reservas ordenados (en minutos desde la apertura),
+    las que se solapan con [a, b) son (inicios < b) - (fines <= a): dos
+    bisect por slot. Tampoco se ofrecen slots en el pasado (hoy: que terminen
+    en el futuro; otros días: que empiecen en el futuro).
+    
+    Los slots se cuentan desde la primera apertura del día; en cada tramo se
+    ofrecen los que empiezan y terminan dentro de él (los índices entre
+    tramos quedan ocupados).
+    """
+    step = SLOT_STEP_MINUTES
+    day_start = intervals[0][0]
+    candidates = []
+    for open_at, close_at in intervals:
+        first = ceil(_minutes_since(open_at, day_start) / step)
+        if candidates:
+            first = max(first, candidates[-1] + 1)
+        last = floor((_minutes_since(close_at, day_start) - duration) / step)
+        candidates.extend(range(first, last + 1))
+    count = candidates[-1] + 1 if candidates else 0
+    starts = sorted(_minutes_since(start, day_start) for start, _end in bookings)
+    ends = sorted(_minutes_since(end, day_start) for _start, end in bookings)
+    
+    # Primer slot que no está en el pasado
+    now_minutes = _minutes_since(now, day_start)
+    if is_today:
+        first_slot = max(0, floor((now_minutes - duration) / step) + 1)
+    else:
+        first_slot = max(0, floor(now_minutes / step) + 1)
+    
+    free = []
+    for index in candidates:
+        if index < first_slot:
+            continue
+        slot_start = index * step
+        if starts and bisect_left(starts, slot_start + duration) - bisect_right(ends, slot_start) >= capacity:
+            continue
+        if free and free[-1][0] + free[-1][1] == index:
+            free[-1][1] += 1
+        else:
+            free.append([index, 1])
+    return SlotGrid(day_start, step, duration, count, free)
+
+
+def _opening_intervals(business, dates, exceptions):
+    """Tramos de apertura de cada fecha (lista vacía en los días cerrados)."""
+    tz = _business_tz(business)
+    schedule_config = business.schedule_config or business.get_default_schedule()
+    by_date = exceptions_by_date(exceptions, dates)
+    return [day_intervals(schedule_config, date, tz, by_date.get(date)) for date in dates]
+
+
+def _bookings_queryset(business, day_intervals):
+    """
+    (start_time, end_time) de las citas activas y bloqueos que se solapan con
+    el tramo completo de los días abiertos (índice parcial), o None si todas
+    las fechas están cerradas.
+    """
+    open_days = [intervals for intervals in day_intervals if intervals]
+    if not open_days:
+        return None
+    return filter_overlapping(
+        active_bookings(Appointment.objects.filter(business=business)),
+        min(intervals[0][0] for intervals in open_days),
+        max(intervals[-1][1] for intervals in open_days),
+    ).order_by('start_time').values_list('start_time', 'end_time')
+
+
+def _build_slot_grids(business, service, dates, day_intervals, bookings):
+    """Un SlotGrid por fecha a partir de las reservas ya leídas (sin consultas)."""
+    booking_starts = [start for start, _end in bookings]
+    capacity = business.capacity or 1
+    now = timezone.now().astimezone(_business_tz(business))
+    today = now.date()
+    grids = []
+    for date, intervals in zip(dates, day_intervals):
+        if not intervals:
+            grids.append(SlotGrid(None, SLOT_STEP_MINUTES, service.duration_minutes, 0, []))
+            AVAILABILITY_SLOTS.observe(0)
+            continue
+        first = bisect_left(booking_starts, intervals[0][0] - MAX_APPOINTMENT_DURATION)
+        last = bisect_left(booking_starts, intervals[-1][1])
+        grid = _slot_grid(
+            intervals, service.duration_minutes, capacity,
+            bookings[first:last], now, is_today=(date == today),
+        )
+        AVAILABILITY_SLOTS.observe(grid.free_count)
+        grids.append(grid)
+    return grids
 
 
 class AvailabilityService:
@@ -25,91 +345,49 @@ class AvailabilityService:
         Returns:
             list: Lista de datetime.datetime con los slots disponibles
         """
-        # Obtener configuración de horarios del negocio
-        schedule_config = business.schedule_config or business.get_default_schedule()
-        
-        # Obtener el día de la semana (0=lunes, 6=domingo)
-        weekday = date.weekday()
-        day_names = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
-        day_key = day_names[weekday]
-        
-        # Verificar si el día está habilitado
-        day_config = schedule_config.get(day_key, {})
-        if not day_config.get('enabled', False):
-            return []
-        
-        # Obtener horarios de apertura y cierre
-        open_time_str = day_config.get('open', '09:00')
-        close_time_str = day_config.get('close', '18:00')
-        
-        # Parsear horarios
-        open_hour, open_minute = map(int, open_time_str.split(':'))
-        close_hour, close_minute = map(int, close_time_str.split(':'))
-        
-        open_time = time(open_hour, open_minute)
-        close_time = time(close_hour, close_minute)
-        
-        # Obtener la zona horaria del negocio
-        from zoneinfo import ZoneInfo
-        try:
-            business_tz = ZoneInfo(business.timezone)
-        except Exception:
-            business_tz = timezone.get_current_timezone()
-        
-        # Crear datetime para inicio y fin del día en la zona horaria del negocio
-        start_datetime_naive = datetime.combine(date, open_time)
-        end_datetime_naive = datetime.combine(date, close_time)
-        
-        # Asignar zona horaria del negocio
-        start_datetime = start_datetime_naive.replace(tzinfo=business_tz)
-        end_datetime = end_datetime_naive.replace(tzinfo=business_tz)
-        
-        # Obtener la hora actual en la zona horaria del negocio
-        now_in_business_tz = timezone.now().astimezone(business_tz)
-        today_in_business_tz = now_in_business_tz.date()
-        
-        # Obtener citas existentes y bloqueos para ese día y negocio
-        # Optimización: usar select_related y solo campos necesarios
-        existing_appointments = Appointment.objects.filter(
-            business=business,
-            start_time__date=date
-        ).filter(
-            Q(status__in=['pending', 'confirmed']) | Q(is_block=True)
-        ).only('start_time', 'end_time', 'is_block').order_by('start_time')
-        
-        # Generar todos los posibles slots (cada 15 minutos)
-        slot_duration = timedelta(minutes=15)
-        service_duration = timedelta(minutes=service.duration_minutes)
-        
-        # Obtener capacidad del negocio
-        capacity = business.capacity or 1
+        grid = AvailabilityService.get_slot_grids(business, service, [date])[0]
+        return grid.slots()
+    
+    @staticmethod
+    @AVAILABILITY_LATENCY.time()
+    def get_slot_grids(business, service, dates):
+        """
+        Disponibilidad de un servicio en varias fechas, como rangos de slots
+        libres (sin crear un datetime por slot).
         
-        available_slots = []
-        current_slot = start_datetime
+        Las excepciones de horario del rango y las citas y bloqueos de todas
+        las fechas se leen en una consulta cada una; cada día toma su tramo con
+        bisect y se resuelve en minutos desde la apertura (ver _slot_grid).
         
-        while current_slot + service_duration <= end_datetime:
-            slot_end = current_slot + service_duration
-            
-            # Verificar capacidad: contar citas simultáneas en el intervalo del slot
-            is_available = AvailabilityService._check_slot_capacity(
-                current_slot, slot_end, existing_appointments, capacity
-            )
-            
-            # Verificar que no sea en el pasado
-            # Si es el día de hoy, solo mostrar horas futuras (verificar que el slot completo termine en el futuro)
-            if date == today_in_business_tz:
-                # Para hoy, verificar que el slot completo (incluyendo duración) esté en el futuro
-                # slot_end ya está en la zona horaria del negocio porque current_slot la tiene
-                if is_available and slot_end > now_in_business_tz:
-                    available_slots.append(current_slot)
-            else:
-                # Para días futuros, verificar que el inicio del slot esté en el futuro
-                if is_available and current_slot > now_in_business_tz:
-                    available_slots.append(current_slot)
-            
-            current_slot += slot_duration
+        Args:
+            business: Instancia de Business
+            service: Instancia de Service
+            dates: lista de datetime.date
         
-        return available_slots
+        Returns:
+            list: un SlotGrid por fecha, en el mismo orden
+        """
+        exceptions = list(schedule_exceptions(business, min(dates), max(dates))) if dates else []
+        intervals = _opening_intervals(business, dates, exceptions)
+        queryset = _bookings_queryset(business, intervals)
+        bookings = list(queryset) if queryset is not None else []
+        return _build_slot_grids(business, service, dates, intervals, bookings)
+    
+    @staticmethod
+    @AVAILABILITY_LATENCY.time()
+    async def aget_slot_grids(business, service, dates):
+        """
+        Igual que get_slot_grids, con el ORM asíncrono: las dos consultas se
+        recorren con `async for` y el cálculo (puro, sin E/S) es el mismo.
+        """
+        exceptions = (
+            [exception async for exception in schedule_exceptions(business, min(dates), max(dates))]
+            if dates else []
+        )
+        intervals = _opening_intervals(business, dates, exceptions)
+        queryset = _bookings_queryset(business, intervals)
+        bookings = [booking async for booking in queryset] if queryset is not None else []
+        return _build_slot_grids(business, service, dates, intervals, bookings)
     
     @staticmethod
     def _check_slot_capacity(slot_start, slot_end, existing_appointments, capacity):
@@ -182,57 +460,116 @@ class AvailabilityService:
         """
         end_time = start_time + timedelta(minutes=service.duration_minutes)
         
-        # Obtener capacidad del negocio
-        capacity = business.capacity or 1
-        
-        # Obtener citas que se solapan con el slot
-        overlapping_appointments = Appointment.objects.filter(
-            business=business,
-            start_time__lt=end_time,
-            end_time__gt=start_time
-        ).filter(
-            Q(status__in=['pending', 'confirmed']) | Q(is_block=True)
-        ).only('start_time', 'end_time', 'is_block')
-        
-        # Verificar capacidad usando el mismo algoritmo
-        if not AvailabilityService._check_slot_capacity(
-            start_time, end_time, list(overlapping_appointments), capacity
-        ):
+        # Verificar que no sea en el pasado
+        if start_time <= timezone.now():
             return False
         
-        # Verificar que esté dentro del horario de atención
+        # Verificar que quepa completo en un tramo de apertura del día (en la
+        # zona horaria del negocio), con la excepción de horario de esa fecha
+        tz = _business_tz(business)
+        local_start = start_time.astimezone(tz)
+        local_end = end_time.astimezone(tz)
+        date = local_start.date()
+        exception = exceptions_by_date(schedule_exceptions(business, date, date), [date]).get(date)
         schedule_config = business.schedule_config or business.get_default_schedule()
-        weekday = start_time.weekday()
-        day_names = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
-        day_key = day_names[weekday]
-        
-        day_config = schedule_config.get(day_key, {})
-        if not day_config.get('enabled', False):
-            return False
-        
-        open_time_str = day_config.get('open', '09:00')
-        close_time_str = day_config.get('close', '18:00')
-        
-        open_hour, open_minute = map(int, open_time_str.split(':'))
-        close_hour, close_minute = map(int, close_time_str.split(':'))
-        
-        slot_time = start_time.time()
-        open_time = time(open_hour, open_minute)
-        close_time = time(close_hour, close_minute)
-        
-        if slot_time < open_time or slot_time >= close_time:
+        if not any(
+            open_at <= local_start and local_end <= close_at
+            for open_at, close_at in day_intervals(schedule_config, date, tz, exception)
+        ):
             return False
         
-        # Obtener la zona horaria del negocio
-        from zoneinfo import ZoneInfo
-        try:
-            business_tz = ZoneInfo(business.timezone)
-        except Exception:
-            business_tz = timezone.get_current_timezone()
+        # Obtener capacidad del negocio
+        capacity = business.capacity or 1
         
-        # Verificar que no sea en el pasado (en la zona horaria del negocio)
-        now_in_business_tz = timezone.now().astimezone(business_tz)
-        if start_time <= now_in_business_tz:
-            return False
+        # Obtener citas que se solapan con el slot
+        overlapping_appointments = filter_overlapping(
+            active_bookings(Appointment.objects.filter(business=business)),
+            start_time, end_time
+        ).only('start_time', 'end_time')
         
-        return True
+        # Verificar capacidad usando el mismo algoritmo
+        return AvailabilityService._check_slot_capacity(
+            start_time, end_time, list(overlapping_appointments), capacity
+        )
+
+
+class AppointmentStatusService:
+    """
+    Cambios de estado en lote (p. ej. marcar las citas del día como completadas
+    o no-asistió al cierre).
+    """
+    MAX_OPERATIONS = 200
+
+    @staticmethod
+    def apply_batch(business, operations):
+        """
+        Aplica una lista de (appointment_id, nuevo_estado) a citas del negocio.
+
+        La pertenencia al negocio se valida con una sola consulta y los cambios
+        se escriben en una transacción con un UPDATE por estado destino. Los
+        efectos secundarios (webhooks, caché de disponibilidad) se disparan una
+        vez por lote, después del commit. Los recordatorios de las citas que
+        dejan de estar activas no se envían: send_whatsapp_reminder revisa el
+        estado al momento de enviar.
+
+        Args:
+            business: Instancia de Business (del dueño autenticado)
+            operations: lista de tuplas (appointment_id, status)
+
+        Returns:
+            list: un dict por operación, en el mismo orden:
+                {'id', 'ok': True, 'status', 'changed'} o {'id', 'ok': False, 'error'}
+        """
+        valid_statuses = {key for key, _label in Appointment.STATUS_CHOICES}
+        results = [None] * len(operations)
+        pending = {}
+        for index, (appointment_id, status) in enumerate(operations):
+            if status not in valid_statuses:
+                results[index] = {'id': appointment_id, 'ok': False, 'error': 'Estado inválido'}
+            elif appointment_id in pending:
+                results[index] = {'id': appointment_id, 'ok': False, 'error': 'Cita repetida en el lote'}
+            else:
+                pending[appointment_id] = (index, status)
+        if not pending:
+            return results
+
+        now = timezone.now()
+        events, time_ranges = [], set()
+        with transaction.atomic():
+            appointments = {
+                appointment.id: appointment
+                for appointment in Appointment.objects.select_for_update(of=('self',))
+                .select_related('service')
+                .filter(business_id=business.pk, id__in=list(pending))
+            }
+            by_status = {}
+            for appointment_id, (index, status) in pending.items():
+                appointment = appointments.get(appointment_id)
+                if appointment is None:
+                    # No existe o es de otro negocio: misma respuesta en ambos casos
+                    results[index] = {'id': appointment_id, 'ok': False, 'error': 'Cita no encontrada'}
+                    continue
+                changed = appointment.status != status
+                results[index] = {'id': appointment_id, 'ok': True, 'status': status, 'changed': changed}
+                if not changed:
+                    continue
+                by_status.setdefault(status, []).append(appointment_id)
+                time_ranges.add((appointment.start_time, appointment.end_time))
+
+                appointment.status = status
+                appointment.updated_at = now
+                appointment.business = business
+                if appointment.is_block:
+                    continue
+                event_type = STATUS_EVENTS.get(status)
+                if event_type:
+                    events.append((event_type, build_appointment_payload(appointment)))
+
+            for status, ids in by_status.items():
+                Appointment.objects.filter(id__in=ids).update(status=status, updated_at=now)
+
+            emit_appointment_events(business.pk, events)
+            if time_ranges:
+                dates = booking_dates(time_ranges)
+                transaction.on_commit(lambda: bump_availability_versions(business.pk, dates))
+        return results
@@ -1,10 +1,16 @@
 """
-Señales de Django para el modelo Appointment.
+Señales de Django para los modelos del core.
 """
-from django.db.models.signals import post_save
+from datetime import timedelta
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import Appointment
+from .models import Appointment, Business, Service, GalleryImage, RequestProfile, ScheduleException
+from .tenancy import invalidate_business
+from .caching import booking_dates, bump_availability_versions, bump_content_version
+from .images import schedule_gallery_image_processing, delete_variants
 from .notifications import schedule_whatsapp_reminder
+from .webhooks import emit_appointment_event, STATUS_EVENTS
 
 
 @receiver(post_save, sender=Appointment)
@@ -17,3 +23,119 @@ def appointment_created_handler(sender, instance, created, **kwargs):
         # Solo programar recordatorios para citas reales (no bloqueos)
         if instance.client and instance.service:
             schedule_whatsapp_reminder(instance.id, minutes_before=15)
+
+
+@receiver(post_save, sender=Appointment)
+def appointment_webhook_handler(sender, instance, created, **kwargs):
+    """
+    Emite eventos de webhook al crear una cita o al cambiar su estado.
+    La entrega es asíncrona (ver core.webhooks), nunca bloquea la vista.
+    """
+    previous_status = getattr(instance, '_loaded_status', None)
+    instance._loaded_status = instance.status
+    
+    if instance.is_block:
+        return
+    
+    if created:
+        emit_appointment_event(instance, 'appointment.created')
+    elif previous_status is not None and previous_status != instance.status:
+        event_type = STATUS_EVENTS.get(instance.status)
+        if event_type:
+            emit_appointment_event(instance, event_type)
+
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+def appointment_availability_handler(sender, instance, **kwargs):
+    """
+    Invalida la disponibilidad cacheada de los días de la cita (y de los que
+    ocupaba antes si se movió). Después del commit, para que ninguna petición
+    guarde en caché los datos anteriores con la versión nueva.
+    """
+    time_ranges = {(instance.start_time, instance.end_time)}
+    loaded_times = getattr(instance, '_loaded_times', None)
+    if loaded_times:
+        time_ranges.add(loaded_times)
+    instance._loaded_times = (instance.start_time, instance.end_time)
+    business_id = instance.business_id
+    dates = booking_dates(time_ranges)
+    transaction.on_commit(lambda: bump_availability_versions(business_id, dates))
+
+
+@receiver(post_save, sender=ScheduleException)
+@receiver(post_delete, sender=ScheduleException)
+def schedule_exception_availability_handler(sender, instance, **kwargs):
+    """
+    Invalida la disponibilidad cacheada de las fechas de la excepción (y de
+    las que cubría antes si cambió el rango), después del commit.
+    """
+    dates = set(instance.dates())
+    loaded_dates = getattr(instance, '_loaded_dates', None)
+    if loaded_dates and loaded_dates != (instance.start_date, instance.end_date):
+        start_date, end_date = loaded_dates
+        dates.update(start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1))
+    instance._loaded_dates = (instance.start_date, instance.end_date)
+    business_id = instance.business_id
+    transaction.on_commit(lambda: bump_availability_versions(business_id, dates))
+
+
+@receiver(post_save, sender=Business)
+@receiver(post_delete, sender=Business)
+def business_cache_handler(sender, instance, **kwargs):
+    """
+    Invalida la caché de resolución de tenant al guardar o eliminar un negocio,
+    incluyendo el slug y owner anteriores si cambiaron.
+
+    Todo se invalida después del commit (como la disponibilidad): antes, una
+    petición concurrente podría volver a cachear el negocio o la página con
+    los datos anteriores. Los valores se toman ahora: delete() deja el id en
+    None y los _loaded_* se actualizan enseguida.
+    """
+    slugs = {instance.slug, getattr(instance, '_loaded_slug', None)}
+    owner_ids = {instance.owner_id, getattr(instance, '_loaded_owner_id', None)}
+    business_id = instance.id
+    instance._loaded_slug = instance.slug
+    instance._loaded_owner_id = instance.owner_id
+
+    def invalidate():
+        invalidate_business(slugs=slugs, owner_ids=owner_ids)
+        bump_content_version(business_id)
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+@receiver(post_save, sender=GalleryImage)
+@receiver(post_delete, sender=GalleryImage)
+def landing_content_handler(sender, instance, **kwargs):
+    """Invalida la landing page cacheada cuando cambian servicios o la galería (después del commit)."""
+    business_id = instance.business_id
+    transaction.on_commit(lambda: bump_content_version(business_id))
+
+
+@receiver(post_save, sender=GalleryImage)
+def gallery_image_created_handler(sender, instance, created, **kwargs):
+    """Programa la generación de variantes (thumbnail, medium, large) al subir una imagen."""
+    if created:
+        schedule_gallery_image_processing(instance.id)
+
+
+@receiver(post_delete, sender=GalleryImage)
+def gallery_image_deleted_handler(sender, instance, **kwargs):
+    """
+    Libera el archivo original y las variantes de la imagen eliminada.
+    Con el storage deduplicado el archivo solo se borra al liberar la última referencia.
+    """
+    if instance.variants:
+        delete_variants(instance)
+    if instance.image:
+        instance.image.storage.delete(instance.image.name)
+
+
+@receiver(post_delete, sender=RequestProfile)
+def request_profile_deleted_handler(sender, instance, **kwargs):
+    """Elimina los archivos del perfil (pstats y collapsed) junto con el registro."""
+    for field in (instance.pstats_file, instance.collapsed_file):
+        if field:
+            field.delete(save=False)
@@ -0,0 +1,114 @@
+"""
+Storages de archivos: deduplicado por contenido para la galería y privado
+(sin URL pública) para los perfiles de peticiones.
+
+Cada archivo se guarda una sola vez bajo su hash SHA-256
+(`gallery/blobs/ab/cd/abcd....jpg`) y la tabla MediaBlob lleva la cuenta de
+cuántas referencias tiene. `delete()` libera una referencia y solo elimina el
+archivo cuando se libera la última.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+from django.core.files.storage import FileSystemStorage
+from django.db.models import F
+from .db import immediate_atomic
+
+logger = logging.getLogger(__name__)
+
+
+class PrivateFileSystemStorage(FileSystemStorage):
+    """
+    FileSystemStorage fuera de MEDIA_ROOT y sin URL: los archivos solo se
+    entregan desde vistas que verifican permisos (ver RequestProfileAdmin).
+    """
+
+    def url(self, name):
+        raise ValueError('Los archivos privados no tienen URL pública.')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage que nombra los archivos por su hash y cuenta referencias.
+    El archivo se recorre en bloques (hash + copia a un temporal) para no
+    cargarlo completo en memoria.
+    """
+    blob_prefix = 'gallery/blobs'
+    chunk_size = 64 * 1024
+
+    def get_available_name(self, name, max_length=None):
+        # El nombre definitivo se calcula en _save a partir del contenido
+        return name
+
+    def _blob_name(self, digest, ext):
+        return f"{self.blob_prefix}/{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+    def _save(self, name, content):
+        from .models import MediaBlob
+
+        ext = os.path.splitext(name)[1].lower()
+        tmp_dir = self.path(f"{self.blob_prefix}/tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        hasher = hashlib.sha256()
+        size = 0
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        tmp = tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False)
+        try:
+            with tmp:
+                for chunk in content.chunks(self.chunk_size):
+                    hasher.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+            digest = hasher.hexdigest()
+
+            with immediate_atomic():
+                blob, created = MediaBlob.objects.select_for_update().get_or_create(
+                    digest=digest,
+                    defaults={'name': self._blob_name(digest, ext), 'size': size, 'ref_count': 1},
+                )
+                if not created:
+                    MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+
+                full_path = self.path(blob.name)
+                if os.path.exists(full_path):
+                    os.remove(tmp.name)
+                else:
+                    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                    os.replace(tmp.name, full_path)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(full_path, self.file_permissions_mode)
+        finally:
+            # Si la lectura del archivo o la base de datos fallan, el temporal
+            # no queda en blobs/tmp (si todo salió bien ya se movió o eliminó)
+            if os.path.exists(tmp.name):
+                os.remove(tmp.name)
+
+        return blob.name
+
+    def delete(self, name):
+        """
+        Libera una referencia al archivo. El archivo solo se elimina del disco
+        cuando no quedan referencias. Los archivos anteriores a la deduplicación
+        (sin MediaBlob) se eliminan directamente.
+        """
+        from .models import MediaBlob
+
+        if not name:
+            raise ValueError("The name must be given to delete().")
+
+        with immediate_atomic():
+            blob = MediaBlob.objects.select_for_update().filter(name=name).first()
+            if blob is None:
+                super().delete(name)
+                return
+            if blob.ref_count > 1:
+                MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - 1)
+                return
+            blob.delete()
+            # Eliminar el archivo mientras se mantiene el bloqueo de la fila,
+            # para que un guardado concurrente del mismo contenido no lo pierda
+            super().delete(name)
+        logger.info(f"Blob {name} eliminado (última referencia)")
@@ -0,0 +1,57 @@
+"""
+Ejecución de tareas en segundo plano dentro del proceso web.
+
+Por ahora usa un pool de hilos; está preparado para reemplazarse por Celery
+o similar sin cambiar a quienes encolan tareas. Modos (BACKGROUND_TASKS_MODE):
+    - 'thread': ejecuta la tarea en un pool de hilos después del commit
+    - 'sync':   ejecuta la tarea en línea después del commit (desarrollo)
+    - 'worker': no ejecuta nada; un comando de gestión procesa lo pendiente
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.BACKGROUND_TASKS_WORKERS,
+                thread_name_prefix='saasbarber-task',
+            )
+        return _executor
+
+
+def _run(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception as e:
+        logger.error(f"Error en tarea en segundo plano {func.__name__}: {str(e)}")
+    finally:
+        # Cada hilo del pool abre su propia conexión; no dejarla abierta
+        close_old_connections()
+
+
+def run_in_background(func, *args, **kwargs):
+    """
+    Programa `func(*args, **kwargs)` para ejecutarse después del commit actual.
+
+    Returns:
+        bool: False si el modo es 'worker' y la tarea queda para el comando de gestión
+    """
+    mode = settings.BACKGROUND_TASKS_MODE
+    if mode == 'worker':
+        return False
+    if mode == 'sync':
+        transaction.on_commit(lambda: _run(func, args, kwargs))
+    else:
+        transaction.on_commit(lambda: _get_executor().submit(_run, func, args, kwargs))
+    return True
@@ -0,0 +1,93 @@
+"""
+Tags para el admin de tablas grandes.
+"""
+import calendar
+import datetime
+from django import template
+from django.contrib.admin.templatetags.base import InclusionAdminNode
+from django.utils import formats, timezone
+from django.utils.text import capfirst
+from django.utils.translation import gettext as _
+
+register = template.Library()
+
+
+def _field_bound(model, field_name, descending):
+    """Valor mínimo o máximo del campo: una búsqueda en su índice."""
+    order = f'-{field_name}' if descending else field_name
+    value = model._default_manager.order_by(order).values_list(field_name, flat=True).first()
+    if isinstance(value, datetime.datetime) and timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value
+
+
+def lightweight_date_hierarchy(cl):
+    """
+    Igual que el date_hierarchy del admin, pero sin consultas DISTINCT por
+    año/mes/día sobre la tabla filtrada (que recorren todas las filas del
+    periodo): los meses y días se generan con el calendario y los años con el
+    primer y último valor del campo.
+    """
+    field_name = cl.date_hierarchy
+    year_field = f'{field_name}__year'
+    month_field = f'{field_name}__month'
+    day_field = f'{field_name}__day'
+    year_lookup = cl.params.get(year_field)
+    month_lookup = cl.params.get(month_field)
+    day_lookup = cl.params.get(day_field)
+
+    def link(filters):
+        return cl.get_query_string(filters, [f'{field_name}__'])
+
+    if year_lookup and month_lookup and day_lookup:
+        day = datetime.date(int(year_lookup), int(month_lookup), int(day_lookup))
+        return {
+            'show': True,
+            'back': {
+                'link': link({year_field: year_lookup, month_field: month_lookup}),
+                'title': capfirst(formats.date_format(day, 'YEAR_MONTH_FORMAT')),
+            },
+            'choices': [{'title': capfirst(formats.date_format(day, 'MONTH_DAY_FORMAT'))}],
+        }
+    if year_lookup and month_lookup:
+        year, month = int(year_lookup), int(month_lookup)
+        return {
+            'show': True,
+            'back': {'link': link({year_field: year_lookup}), 'title': str(year_lookup)},
+            'choices': [
+                {
+                    'link': link({year_field: year, month_field: month, day_field: day}),
+                    'title': capfirst(formats.date_format(datetime.date(year, month, day), 'MONTH_DAY_FORMAT')),
+                }
+                for day in range(1, calendar.monthrange(year, month)[1] + 1)
+            ],
+        }
+    if year_lookup:
+        year = int(year_lookup)
+        return {
+            'show': True,
+            'back': {'link': link({}), 'title': _('All dates')},
+            'choices': [
+                {
+                    'link': link({year_field: year, month_field: month}),
+                    'title': capfirst(formats.date_format(datetime.date(year, month, 1), 'YEAR_MONTH_FORMAT')),
+                }
+                for month in range(1, 13)
+            ],
+        }
+
+    first = _field_bound(cl.model, field_name, descending=False)
+    last = _field_bound(cl.model, field_name, descending=True)
+    years = range(first.year, last.year + 1) if first and last else []
+    return {
+        'show': True,
+        'back': None,
+        'choices': [{'link': link({year_field: str(year)}), 'title': str(year)} for year in years],
+    }
+
+
+@register.tag(name='lightweight_date_hierarchy')
+def lightweight_date_hierarchy_tag(parser, token):
+    return InclusionAdminNode(
+        parser, token, func=lightweight_date_hierarchy, template_name='date_hierarchy.html', takes_context=False,
+    )
@@ -0,0 +1,179 @@
+"""
+Resolución del negocio (tenant) a partir del slug de la URL.
+
+La búsqueda slug -> Business se resuelve con dos niveles de caché:
+un LRU en memoria del proceso (con TTL corto, para que los cambios hechos por
+otros procesos se vean pronto) y la caché compartida de Django. Ambos se
+invalidan en Business.save/delete (ver core.signals).
+
+El LRU local guarda el negocio serializado (pickle) y cada llamada recibe su
+propia instancia: los cambios que una petición haga sobre ella (setattr antes
+de save, prefetches, atributos _loaded_*) no se ven en otras peticiones ni
+quedan en la caché si el save falla.
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from .models import Business
+
+# Marca para cachear slugs inexistentes y evitar consultas repetidas
+_MISSING = '__missing__'
+
+
+class LocalLRUCache:
+    """
+    Caché LRU en memoria, segura entre hilos, con expiración por entrada.
+    """
+
+    def __init__(self, maxsize=1024, ttl=10):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_local_cache = LocalLRUCache(
+    maxsize=getattr(settings, 'TENANT_CACHE_LOCAL_SIZE', 1024),
+    ttl=getattr(settings, 'TENANT_CACHE_LOCAL_TTL', 10),
+)
+
+
+def _slug_key(slug):
+    return f'tenant:slug:{slug}'
+
+
+def _owner_key(owner_id):
+    return f'tenant:owner:{owner_id}'
+
+
+def _local_entry(business):
+    """Valor que se guarda en el LRU local: _MISSING o el negocio serializado."""
+    if business == _MISSING:
+        return _MISSING
+    return pickle.dumps(business, pickle.HIGHEST_PROTOCOL)
+
+
+def _from_local_entry(entry):
+    """Instancia nueva (propia de quien llama) a partir de una entrada del LRU local."""
+    return None if entry == _MISSING else pickle.loads(entry)
+
+
+def get_business_by_slug(slug):
+    """
+    Retorna el Business activo con ese slug, o None si no existe.
+
+    Args:
+        slug: str - Slug del negocio tomado de la URL
+
+    Returns:
+        Business | None - una instancia propia de esta llamada (nunca compartida)
+    """
+    key = _slug_key(slug)
+    entry = _local_cache.get(key)
+    if entry is None:
+        business = cache.get(key)
+        if business is None:
+            business = Business.objects.filter(slug=slug, is_active=True).first() or _MISSING
+            timeout = settings.TENANT_CACHE_TIMEOUT if business is not _MISSING else 60
+            cache.set(key, business, timeout)
+        entry = _local_entry(business)
+        _local_cache.set(key, entry)
+
+    return _from_local_entry(entry)
+
+
+async def aget_business_by_slug(slug):
+    """Versión asíncrona de get_business_by_slug (caché y ORM asíncronos)."""
+    key = _slug_key(slug)
+    entry = _local_cache.get(key)
+    if entry is None:
+        business = await cache.aget(key)
+        if business is None:
+            business = await Business.objects.filter(slug=slug, is_active=True).afirst() or _MISSING
+            timeout = settings.TENANT_CACHE_TIMEOUT if business is not _MISSING else 60
+            await cache.aset(key, business, timeout)
+        entry = _local_entry(business)
+        _local_cache.set(key, entry)
+
+    return _from_local_entry(entry)
+
+
+def get_owner_business_slug(user):
+    """
+    Retorna el slug del primer negocio activo del owner, o None.
+    Usado por las redirecciones al dashboard después del login.
+    """
+    key = _owner_key(user.pk)
+    slug = cache.get(key)
+    if slug is None:
+        slug = (
+            Business.objects.filter(owner=user, is_active=True)
+            .values_list('slug', flat=True).first()
+        ) or _MISSING
+        cache.set(key, slug, settings.TENANT_CACHE_TIMEOUT)
+
+    return None if slug == _MISSING else slug
+
+
+def invalidate_business(slugs=(), owner_ids=()):
+    """
+    Elimina de ambas cachés las entradas de los slugs y owners indicados.
+    Acepta varios valores para invalidar en bloque (ej: cambios de slug u owner).
+    """
+    keys = [_slug_key(slug) for slug in slugs if slug]
+    keys += [_owner_key(owner_id) for owner_id in owner_ids if owner_id]
+    for key in keys:
+        _local_cache.delete(key)
+    if keys:
+        cache.delete_many(keys)
+
+
+def get_request_business(request, slug):
+    """
+    Retorna el negocio resuelto por TenantMiddleware, o lo resuelve
+    si la petición no pasó por el middleware.
+    """
+    business = getattr(request, 'business', None)
+    if business is None or business.slug != slug:
+        business = get_business_by_slug(slug)
+        request.business = business
+    return business
+
+
+async def aget_request_business(request, slug):
+    """Versión asíncrona de get_request_business."""
+    business = getattr(request, 'business', None)
+    if business is None or business.slug != slug:
+        business = await aget_business_by_slug(slug)
+        request.business = business
+    return business
@@ -0,0 +1,33 @@
+"""
+Las consultas críticas de citas (las de `manage.py check_query_plans`) deben
+resolverse con índices, sin recorrer completa la tabla de citas.
+"""
+from django.db import connection
+from django.test import TestCase
+from core.db import analyze_tables
+from core.management.commands.check_query_plans import disable_seqscan, hot_queries, is_full_scan
+from core.management.commands.check_view_budgets import build_fixture
+from core.models import Appointment
+
+
+class QueryPlanTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = build_fixture(1000)['business']
+
+    def assertUsesIndexes(self):
+        disable_seqscan(connection)
+        table = Appointment._meta.db_table
+        for name, queryset in hot_queries(self.business.pk).items():
+            with self.subTest(query=name):
+                plan = queryset.explain()
+                self.assertFalse(is_full_scan(connection.vendor, plan, table), f'{name}:\n{plan}')
+
+    def test_hot_queries_use_indexes(self):
+        self.assertUsesIndexes()
+
+    def test_hot_queries_use_indexes_with_statistics(self):
+        # Con estadísticas (ANALYZE) el planner puede elegir otro plan
+        analyze_tables([Appointment])
+        self.assertUsesIndexes()
@@ -0,0 +1,78 @@
+"""
+Presupuestos de cada vista con la misma tabla que `manage.py check_view_budgets`
+(VIEW_BUDGETS): número exacto de consultas en cada escala y crecimiento de la
+latencia entre la escala menor y la mayor. El comando sigue sirviendo para ver
+la tabla completa (--report) y para los presupuestos absolutos de latencia.
+"""
+import shutil
+import statistics
+import tempfile
+import time
+from django.db import connection, transaction
+from django.test import TestCase
+from core.management.commands.check_view_budgets import (
+    LATENCY_GROWTH_FACTOR, VIEW_BUDGETS, budget_clients, budget_settings, build_fixture,
+    latency_growth_exceeded, query_budget, request_view,
+)
+
+SCALES = (10, 1000)
+# Ejecuciones por vista para la latencia (se usa la mediana)
+REPEAT = 3
+
+
+class ViewBudgetTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        media_root = tempfile.mkdtemp(prefix='budgets-media-')
+        cls.addClassCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        test_settings = budget_settings(media_root)
+        test_settings.enable()
+        cls.addClassCleanup(test_settings.disable)
+        super().setUpClass()
+
+    def _views_at_scale(self, scale):
+        """Genera (budget, fixture, cliente) con el fixture de `scale`, que se revierte al final."""
+        with transaction.atomic():
+            fixture = build_fixture(scale)
+            clients = budget_clients(fixture)
+            for budget in VIEW_BUDGETS:
+                yield budget, fixture, clients[budget['user']]
+            transaction.set_rollback(True)
+
+    def _request(self, budget, fixture, client, check_queries=False):
+        with transaction.atomic():
+            if check_queries:
+                with self.assertNumQueries(query_budget(budget, connection)):
+                    response = request_view(budget, fixture, client)
+            else:
+                response = request_view(budget, fixture, client)
+            transaction.set_rollback(True)
+        self.assertLess(response.status_code, 400)
+        return response
+
+    def test_query_budgets(self):
+        for scale in SCALES:
+            for budget, fixture, client in self._views_at_scale(scale):
+                with self.subTest(view=budget['name'], scale=scale):
+                    self._request(budget, fixture, client, check_queries=True)
+
+    def test_latency_does_not_grow_with_data(self):
+        medians = {}
+        for scale in SCALES:
+            for budget, fixture, client in self._views_at_scale(scale):
+                durations = []
+                for _ in range(REPEAT):
+                    start = time.perf_counter()
+                    self._request(budget, fixture, client)
+                    durations.append((time.perf_counter() - start) * 1000)
+                medians[scale, budget['name']] = statistics.median(durations)
+
+        for budget in VIEW_BUDGETS:
+            few_ms, many_ms = medians[SCALES[0], budget['name']], medians[SCALES[-1], budget['name']]
+            with self.subTest(view=budget['name']):
+                self.assertFalse(
+                    latency_growth_exceeded(budget, few_ms, many_ms),
+                    f"{few_ms:.0f} ms @ {SCALES[0]} → {many_ms:.0f} ms @ {SCALES[-1]} "
+                    f"(máx. ×{LATENCY_GROWTH_FACTOR})",
+                )
@@ -2,16 +2,30 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login, authenticate
 from django.contrib import messages
+from django.core.paginator import Paginator
 from django.utils import timezone
 from django.db.models import Q
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.urls import reverse
+import hmac
 import json
 from django.views.decorators.http import require_http_methods
-from datetime import datetime, timedelta, date
+from datetime import datetime, timedelta, date, time
+from zoneinfo import ZoneInfo
 from .models import Business, Service, Appointment, CustomUser, GalleryImage
-from .services import AvailabilityService
+from .services import (
+    MAX_COMPACT_DAYS, AvailabilityService, active_bookings, day_intervals, exceptions_by_date,
+    filter_overlapping, local_day_range, schedule_exceptions,
+)
+from .decorators import business_required, owner_required
+from .tenancy import get_owner_business_slug, get_request_business
+from .caching import aavailability_etag, acached_public_json, acatalog_etag, cache_public_page
+from .db import booking_atomic
+from .archive import get_client_history, count_client_appointments
+from .metrics import REGISTRY, BOOKINGS, DASHBOARD_API_LATENCY
+from .exports import EXPORT_FORMATS, business_export_rows, export_response
 
 
 def login_redirect_view(request):
@@ -22,15 +36,9 @@ def login_redirect_view(request):
     if request.user.is_authenticated:
         if request.user.is_owner:
             # Intentar obtener el negocio del usuario
-            try:
-                business = Business.objects.get(owner=request.user, is_active=True)
-                return redirect('core:dashboard', business_slug=business.slug)
-            except Business.DoesNotExist:
-                pass
-            except Business.MultipleObjectsReturned:
-                business = Business.objects.filter(owner=request.user, is_active=True).first()
-                if business:
-                    return redirect('core:dashboard', business_slug=business.slug)
+            business_slug = get_owner_business_slug(request.user)
+            if business_slug:
+                return redirect('core:dashboard', business_slug=business_slug)
         
         # Si no es owner o no tiene negocio, ir al admin
         return redirect('admin:index')
@@ -39,25 +47,35 @@ def login_redirect_view(request):
     return redirect('admin:login')
 
 
+# Próximas reservas por página en "Mis reservas"
+UPCOMING_PAGE_SIZE = 20
+
+
 @login_required
 def my_appointments_view(request):
     """
     Vista para que los clientes vean sus propias reservas.
+
+    Las próximas se paginan (?pagina=N), de la más cercana a la más lejana:
+    renderizarlas todas hacía que la página creciera con el número de citas.
     """
-    # Obtener todas las citas del usuario actual
-    appointments = Appointment.objects.filter(
+    now = timezone.now()
+    upcoming = Appointment.objects.filter(
         client=request.user,
-        is_block=False  # Excluir bloqueos
-    ).select_related('business', 'service').order_by('-start_time')
+        is_block=False,  # Excluir bloqueos
+        start_time__gte=now,
+        status__in=['pending', 'confirmed'],
+    ).select_related('business', 'service').order_by('start_time', 'id')
+    upcoming_page = Paginator(upcoming, UPCOMING_PAGE_SIZE).get_page(request.GET.get('pagina'))
     
-    # Separar por estado
-    upcoming = appointments.filter(start_time__gte=timezone.now(), status__in=['pending', 'confirmed'])
-    past = appointments.exclude(start_time__gte=timezone.now())
+    # Historial: citas pasadas de la tabla activa y, si hace falta, del archivo.
+    # Se pide una de más para saber si hay más de las 10 que se muestran.
+    past = get_client_history(request.user, limit=11, now=now)
     
     context = {
-        'upcoming_appointments': upcoming,
+        'upcoming_appointments': upcoming_page,
         'past_appointments': past,
-        'total_appointments': appointments.count()
+        'total_appointments': count_client_appointments(request.user)
     }
     
     return render(request, 'core/my_appointments.html', context)
@@ -71,21 +89,24 @@ def home_view(request):
     return render(request, 'core/home.html', {})
 
 
+@cache_public_page
 def client_booking_view(request, business_slug):
     """
     Vista pública para que los clientes reserven citas.
     Muestra los servicios disponibles y permite seleccionar fecha/hora.
     """
-    try:
-        business = get_object_or_404(Business, slug=business_slug, is_active=True)
-    except Exception as e:
-        messages.error(request, f'Error al cargar el negocio: {str(e)}')
+    business = get_request_business(request, business_slug)
+    if business is None:
+        messages.error(request, 'Error al cargar el negocio: negocio no encontrado.')
         return redirect('core:home')
     
     services = Service.objects.filter(business=business, is_active=True)
     
     # Obtener imágenes subidas de la galería
-    gallery_images = GalleryImage.objects.filter(business=business).order_by('order', '-created_at')
+    # Solo imágenes con variantes (sin EXIF): la original nunca se publica
+    gallery_images = GalleryImage.objects.filter(
+        business=business, processing_status='ready',
+    ).order_by('order', '-created_at')
     
     selected_service_id = request.GET.get('service')
     selected_date = request.GET.get('date')
@@ -132,7 +153,51 @@ def client_booking_view(request, business_slug):
     return render(request, 'core/client_booking.html', context)
 
 
+# Horario que muestra la agenda del dashboard en los días cerrados
+DASHBOARD_CLOSED_DAY_HOURS = [(time(9, 0), time(20, 0))]
+
+
+def _dashboard_time_slots(business, selected_date):
+    """
+    Horas de la agenda del dashboard (cada 15 minutos) dentro de los tramos
+    de apertura del día, con la excepción de horario de la fecha si la hay.
+    Los días cerrados muestran de 09:00 a 20:00 para ver las citas que
+    hubiera. Retorna (time_slots, excepción o None).
+    """
+    exception = exceptions_by_date(
+        schedule_exceptions(business, selected_date, selected_date), [selected_date]
+    ).get(selected_date)
+    schedule_config = business.schedule_config or business.get_default_schedule()
+    # Solo se usan las horas locales: no hace falta la zona horaria
+    intervals = [
+        (open_at.time(), close_at.time())
+        for open_at, close_at in day_intervals(schedule_config, selected_date, None, exception)
+    ] or DASHBOARD_CLOSED_DAY_HOURS
+    
+    time_slots = []
+    for open_time, close_time in intervals:
+        minutes = open_time.hour * 60 + open_time.minute
+        close_minutes = close_time.hour * 60 + close_time.minute
+        while minutes < close_minutes:
+            hour, minute = divmod(minutes, 60)
+            time_slots.append({'time': f"{hour:02d}:{minute:02d}", 'hour': hour, 'minute': minute})
+            minutes += 15
+    return time_slots, exception
+
+
+def _schedule_exception_data(exception):
+    """Excepción de horario del día para la API del dashboard (None si no hay)."""
+    if exception is None:
+        return None
+    return {
+        'closed': exception.is_closed,
+        'reason': exception.reason,
+        'intervals': exception.intervals,
+    }
+
+
 @login_required
+@owner_required(message='No tienes permiso para acceder a este dashboard.')
 def dashboard_view(request, business_slug=None):
     """
     Dashboard para BusinessOwner.
@@ -145,23 +210,15 @@ def dashboard_view(request, business_slug=None):
             messages.error(request, 'No tienes permiso para acceder a esta página.')
             return redirect('admin:index')
         
-        # Obtener el negocio del usuario
-        try:
-            business = Business.objects.get(owner=request.user, is_active=True)
-            # Redirigir al dashboard con el slug del negocio
-            return redirect('core:dashboard', business_slug=business.slug)
-        except Business.DoesNotExist:
+        # Obtener el negocio del usuario y redirigir al dashboard con su slug
+        owner_slug = get_owner_business_slug(request.user)
+        if not owner_slug:
             messages.warning(request, 'No tienes un negocio registrado. Contacta al administrador.')
             return redirect('admin:index')
-        except Business.MultipleObjectsReturned:
-            business = Business.objects.filter(owner=request.user, is_active=True).first()
-            return redirect('core:dashboard', business_slug=business.slug)
-    else:
-        # Si se proporciona business_slug, verificar que el usuario sea el dueño
-        business = get_object_or_404(Business, slug=business_slug, is_active=True)
-        if business.owner != request.user:
-            messages.error(request, 'No tienes permiso para acceder a este dashboard.')
-            return redirect('admin:index')
+        return redirect('core:dashboard', business_slug=owner_slug)
+    
+    # El decorador owner_required ya verificó que el usuario sea el dueño
+    business = request.business
     
     # Obtener fecha seleccionada (por defecto hoy en la zona horaria del negocio)
     selected_date_str = request.GET.get('date')
@@ -190,43 +247,16 @@ def dashboard_view(request, business_slug=None):
             'is_selected': future_date == selected_date
         })
     
-    # Obtener citas del día seleccionado
+    # Obtener citas del día seleccionado (rango sobre start_time para usar el índice)
+    day_start, day_end = local_day_range(selected_date)
     appointments = Appointment.objects.filter(
         business=business,
-        start_time__date=selected_date
+        start_time__gte=day_start,
+        start_time__lt=day_end
     ).select_related('client', 'service').order_by('start_time')
     
     # Generar todas las horas del día para el calendario
-    schedule_config = business.schedule_config or business.get_default_schedule()
-    weekday = selected_date.weekday()
-    day_names = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
-    day_key = day_names[weekday]
-    day_config = schedule_config.get(day_key, {})
-    
-    # Horarios del día
-    open_time_str = day_config.get('open', '09:00') if day_config.get('enabled', False) else '09:00'
-    close_time_str = day_config.get('close', '20:00') if day_config.get('enabled', False) else '20:00'
-    
-    open_hour, open_minute = map(int, open_time_str.split(':'))
-    close_hour, close_minute = map(int, close_time_str.split(':'))
-    
-    # Generar todas las horas del día (cada 15 minutos)
-    time_slots = []
-    current_hour = open_hour
-    current_minute = open_minute
-    
-    while current_hour < close_hour or (current_hour == close_hour and current_minute < close_minute):
-        time_str = f"{current_hour:02d}:{current_minute:02d}"
-        time_slots.append({
-            'time': time_str,
-            'hour': current_hour,
-            'minute': current_minute
-        })
-        
-        current_minute += 15
-        if current_minute >= 60:
-            current_minute = 0
-            current_hour += 1
+    time_slots, schedule_exception = _dashboard_time_slots(business, selected_date)
     
     # Crear un diccionario de citas por hora para fácil acceso
     appointments_by_time = {}
@@ -260,6 +290,7 @@ def dashboard_view(request, business_slug=None):
         'selected_date': selected_date,
         'date_options': date_options,
         'time_slots': time_slots_with_appointments,
+        'schedule_exception': schedule_exception,
         'stats': {
             'total': total,
             'confirmed': confirmed,
@@ -273,15 +304,16 @@ def dashboard_view(request, business_slug=None):
 
 @login_required
 @require_http_methods(["POST"])
+@owner_required(message='No tienes permiso para realizar esta acción.')
 def update_appointment_status(request, business_slug, appointment_id):
     """
     Actualiza el estado de una cita (confirmar, no-asistió, completar).
     """
+    business = request.business
     appointment = get_object_or_404(Appointment, id=appointment_id)
-    business = get_object_or_404(Business, slug=business_slug, is_active=True)
     
-    # Verificar que el usuario sea el dueño del negocio
-    if appointment.business != business or business.owner != request.user:
+    # Verificar que la cita pertenezca al negocio
+    if appointment.business_id != business.id:
         messages.error(request, 'No tienes permiso para realizar esta acción.')
         return redirect('core:dashboard', business_slug=business.slug)
     
@@ -302,11 +334,12 @@ def update_appointment_status(request, business_slug, appointment_id):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@business_required
 def create_appointment(request, business_slug):
     """
     Crea una nueva cita desde la página pública de reservas.
     """
-    business = get_object_or_404(Business, slug=business_slug, is_active=True)
+    business = request.business
     
     try:
         service_id = request.POST.get('service_id')
@@ -314,6 +347,7 @@ def create_appointment(request, business_slug):
         notes = request.POST.get('notes', '')
         
         if not service_id or not start_time_str:
+            BOOKINGS.labels(result='invalid').inc()
             return JsonResponse({'success': False, 'error': 'Datos incompletos. service_id o start_time faltantes.'})
         
         service = Service.objects.get(id=service_id, business=business, is_active=True)
@@ -329,10 +363,12 @@ def create_appointment(request, business_slug):
                 dt = datetime.strptime(start_time_str, '%Y-%m-%d %H:%M')
                 start_time = timezone.make_aware(dt)
             except ValueError:
+                BOOKINGS.labels(result='invalid').inc()
                 return JsonResponse({'success': False, 'error': 'Formato de fecha/hora inválido.'})
         
-        # Verificar disponibilidad
+        # Verificación rápida de disponibilidad (se confirma dentro de la transacción)
         if not AvailabilityService.is_slot_available(business, service, start_time):
+            BOOKINGS.labels(result='unavailable').inc()
             return JsonResponse({'success': False, 'error': 'Este horario ya no está disponible.'})
         
         # Manejar autenticación/registro del cliente
@@ -371,16 +407,23 @@ def create_appointment(request, business_slug):
             if user:
                 login(request, user)
         
-        # Crear la cita
-        appointment = Appointment.objects.create(
-            business=business,
-            client=client,
-            service=service,
-            start_time=start_time,
-            status='pending',
-            notes=notes
-        )
+        # Crear la cita: verificar y crear con el lock de reservas tomado
+        # para que dos reservas simultáneas no ocupen el mismo lugar
+        with booking_atomic(business):
+            if not AvailabilityService.is_slot_available(business, service, start_time):
+                BOOKINGS.labels(result='unavailable').inc()
+                return JsonResponse({'success': False, 'error': 'Este horario ya no está disponible.'})
+            
+            appointment = Appointment.objects.create(
+                business=business,
+                client=client,
+                service=service,
+                start_time=start_time,
+                status='pending',
+                notes=notes
+            )
         
+        BOOKINGS.labels(result='created').inc()
         return JsonResponse({
             'success': True,
             'message': 'Reserva creada exitosamente.',
@@ -388,36 +431,35 @@ def create_appointment(request, business_slug):
         })
         
     except Service.DoesNotExist:
+        BOOKINGS.labels(result='invalid').inc()
         return JsonResponse({'success': False, 'error': 'Servicio no encontrado.'})
     except ValueError as e:
+        BOOKINGS.labels(result='invalid').inc()
         return JsonResponse({'success': False, 'error': f'Error en los datos: {str(e)}'})
     except Exception as e:
+        BOOKINGS.labels(result='error').inc()
         return JsonResponse({'success': False, 'error': f'Error al crear la reserva: {str(e)}'})
 
 @login_required
+@owner_required()
 def block_time_view(request, business_slug=None):
     """
     Vista para que el BusinessOwner bloquee un horario.
     """
-    # Si se proporciona business_slug, verificar que el usuario sea el dueño
+    # Si se proporciona business_slug, owner_required ya verificó que el usuario sea el dueño
     if business_slug:
-        business = get_object_or_404(Business, slug=business_slug, is_active=True)
-        if business.owner != request.user:
-            messages.error(request, 'No tienes permiso para acceder a esta página.')
-            return redirect('admin:index')
+        business = request.business
     else:
         if not request.user.is_owner:
             messages.error(request, 'No tienes permiso para acceder a esta página.')
             return redirect('admin:index')
         
         # Obtener el negocio del usuario
-        try:
-            business = Business.objects.get(owner=request.user, is_active=True)
-        except Business.DoesNotExist:
+        owner_slug = get_owner_business_slug(request.user)
+        business = get_request_business(request, owner_slug) if owner_slug else None
+        if business is None:
             messages.warning(request, 'No tienes un negocio registrado.')
             return redirect('admin:index')
-        except Business.MultipleObjectsReturned:
-            business = Business.objects.filter(owner=request.user, is_active=True).first()
     
     if request.method == 'POST':
         try:
@@ -442,30 +484,28 @@ def block_time_view(request, business_slug=None):
             else:
                 end_time = start_time + timedelta(hours=1)
             
-            # Verificar que no se solape con citas existentes
-            overlapping = Appointment.objects.filter(
-                business=business,
-                start_time__lt=end_time,
-                end_time__gt=start_time,
-                is_block=False,
-                status__in=['pending', 'confirmed']
-            ).exists()
-            
-            if overlapping:
-                messages.error(request, 'Este horario tiene citas confirmadas. No se puede bloquear.')
-                return redirect('core:block_time', business_slug=business.slug)
-            
-            # Crear el bloqueo (los bloqueos no requieren cliente ni servicio)
-            block_appointment = Appointment.objects.create(
-                business=business,
-                client=request.user,  # El dueño es el "cliente" del bloqueo (requerido por el modelo, pero no se usa)
-                service=None,  # Los bloqueos no tienen servicio
-                start_time=start_time,
-                end_time=end_time,
-                status='confirmed',  # Los bloqueos están confirmados por defecto
-                is_block=True,
-                notes=notes or 'Horario bloqueado por el propietario'
-            )
+            with booking_atomic(business):
+                # Verificar que no se solape con citas existentes
+                overlapping = filter_overlapping(
+                    active_bookings(Appointment.objects.filter(business=business)).filter(is_block=False),
+                    start_time, end_time
+                ).exists()
+                
+                if overlapping:
+                    messages.error(request, 'Este horario tiene citas confirmadas. No se puede bloquear.')
+                    return redirect('core:block_time', business_slug=business.slug)
+                
+                # Crear el bloqueo (los bloqueos no requieren cliente ni servicio)
+                block_appointment = Appointment.objects.create(
+                    business=business,
+                    client=request.user,  # El dueño es el "cliente" del bloqueo (requerido por el modelo, pero no se usa)
+                    service=None,  # Los bloqueos no tienen servicio
+                    start_time=start_time,
+                    end_time=end_time,
+                    status='confirmed',  # Los bloqueos están confirmados por defecto
+                    is_block=True,
+                    notes=notes or 'Horario bloqueado por el propietario'
+                )
             
             messages.success(request, f'Horario bloqueado exitosamente: {start_time.strftime("%d/%m/%Y %H:%M")} - {end_time.strftime("%H:%M")}')
             if business_slug:
@@ -493,17 +533,13 @@ def block_time_view(request, business_slug=None):
 
 
 @login_required
+@owner_required()
 def create_appointment_manual_view(request, business_slug):
     """
     Vista para que el BusinessOwner cree citas manualmente (para clientes que llaman).
     Solo para el día actual, solo con teléfono.
     """
-    business = get_object_or_404(Business, slug=business_slug, is_active=True)
-    
-    # Verificar que el usuario sea el dueño del negocio
-    if business.owner != request.user:
-        messages.error(request, 'No tienes permiso para acceder a esta página.')
-        return redirect('admin:index')
+    business = request.business
     
     services = Service.objects.filter(business=business, is_active=True)
     
@@ -575,24 +611,25 @@ def create_appointment_manual_view(request, business_slug):
             time_obj = datetime.strptime(time_str, '%H:%M').time()
             start_time = timezone.make_aware(datetime.combine(today, time_obj))
             
-            # Verificar disponibilidad
-            if not AvailabilityService.is_slot_available(business, service, start_time):
-                messages.error(request, 'Este horario ya no está disponible. Por favor, selecciona otro.')
-                return render(request, 'core/create_appointment_manual.html', {
-                    'business': business,
-                    'services': services,
-                    'selected_date': today,
-                })
-            
-            # Crear la cita
-            appointment = Appointment.objects.create(
-                business=business,
-                client=client,
-                service=service,
-                start_time=start_time,
-                status='confirmed',  # Las citas creadas manualmente se confirman automáticamente
-                notes=notes
-            )
+            with booking_atomic(business):
+                # Verificar disponibilidad
+                if not AvailabilityService.is_slot_available(business, service, start_time):
+                    messages.error(request, 'Este horario ya no está disponible. Por favor, selecciona otro.')
+                    return render(request, 'core/create_appointment_manual.html', {
+                        'business': business,
+                        'services': services,
+                        'selected_date': today,
+                    })
+                
+                # Crear la cita
+                appointment = Appointment.objects.create(
+                    business=business,
+                    client=client,
+                    service=service,
+                    start_time=start_time,
+                    status='confirmed',  # Las citas creadas manualmente se confirman automáticamente
+                    notes=notes
+                )
             
             messages.success(request, f'Cita creada exitosamente para {client.get_full_name() or client.phone} hoy a las {time_str}.')
             return redirect('core:dashboard', business_slug=business.slug)
@@ -614,17 +651,15 @@ def create_appointment_manual_view(request, business_slug):
 
 
 @login_required
+@owner_required(json_response=True)
+@DASHBOARD_API_LATENCY.time()
 def get_dashboard_appointments_api(request, business_slug):
     """
     API endpoint para obtener las citas del dashboard en formato JSON.
     Usado para actualización en tiempo real.
     """
     try:
-        business = get_object_or_404(Business, slug=business_slug, is_active=True)
-        
-        # Verificar que el usuario sea el dueño del negocio
-        if business.owner != request.user:
-            return JsonResponse({'error': 'No autorizado'}, status=403)
+        business = request.business
         
         # Obtener fecha seleccionada (por defecto hoy)
         selected_date_str = request.GET.get('date')
@@ -638,10 +673,12 @@ def get_dashboard_appointments_api(request, business_slug):
         else:
             selected_date = business_today
         
-        # Obtener citas del día seleccionado
+        # Obtener citas del día seleccionado (rango sobre start_time para usar el índice)
+        day_start, day_end = local_day_range(selected_date)
         appointments = Appointment.objects.filter(
             business=business,
-            start_time__date=selected_date
+            start_time__gte=day_start,
+            start_time__lt=day_end
         ).select_related('client', 'service').order_by('start_time')
         
         # Estadísticas
@@ -651,34 +688,7 @@ def get_dashboard_appointments_api(request, business_slug):
         completed = appointments.filter(status='completed').count()
         
         # Generar todas las horas del día para el calendario (igual que en dashboard_view)
-        schedule_config = business.schedule_config or business.get_default_schedule()
-        weekday = selected_date.weekday()
-        day_names = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
-        day_key = day_names[weekday]
-        day_config = schedule_config.get(day_key, {})
-        
-        open_time_str = day_config.get('open', '09:00') if day_config.get('enabled', False) else '09:00'
-        close_time_str = day_config.get('close', '20:00') if day_config.get('enabled', False) else '20:00'
-        
-        open_hour, open_minute = map(int, open_time_str.split(':'))
-        close_hour, close_minute = map(int, close_time_str.split(':'))
-        
-        time_slots = []
-        current_hour = open_hour
-        current_minute = open_minute
-        
-        while current_hour < close_hour or (current_hour == close_hour and current_minute < close_minute):
-            time_str = f"{current_hour:02d}:{current_minute:02d}"
-            time_slots.append({
-                'time': time_str,
-                'hour': current_hour,
-                'minute': current_minute
-            })
-            
-            current_minute += 15
-            if current_minute >= 60:
-                current_minute = 0
-                current_hour += 1
+        time_slots, schedule_exception = _dashboard_time_slots(business, selected_date)
         
         # Crear diccionario de citas por hora
         appointments_by_time = {}
@@ -728,7 +738,8 @@ def get_dashboard_appointments_api(request, business_slug):
                 'pending': pending,
                 'completed': completed,
             },
-            'time_slots': time_slots_data
+            'time_slots': time_slots_data,
+            'schedule_exception': _schedule_exception_data(schedule_exception),
         })
         
     except Exception as e:
@@ -736,16 +747,12 @@ def get_dashboard_appointments_api(request, business_slug):
 
 
 @login_required
+@owner_required()
 def edit_site_view(request, business_slug):
     """
     Vista para que el BusinessOwner edite su landing page.
     """
-    business = get_object_or_404(Business, slug=business_slug, is_active=True)
-    
-    # Verificar que el usuario sea el dueño del negocio
-    if business.owner != request.user:
-        messages.error(request, 'No tienes permiso para acceder a esta página.')
-        return redirect('admin:index')
+    business = request.business
     
     # Convertir gallery_json a formato legible para el textarea
     gallery_text = json.dumps(business.gallery_json, indent=2, ensure_ascii=False) if business.gallery_json else "[]"
@@ -763,6 +770,51 @@ def edit_site_view(request, business_slug):
 
 
 @login_required
+@require_http_methods(["GET"])
+@owner_required()
+def export_appointments_view(request, business_slug):
+    """
+    Descarga las citas del negocio (incluidas las archivadas) en CSV o JSONL.
+    
+    Parámetros GET: desde, hasta (YYYY-MM-DD, ambos incluidos; por defecto los
+    últimos 30 días), formato (csv|jsonl), gzip (1) y archivadas (0 para omitirlas).
+    """
+    business = request.business
+    business_tz = ZoneInfo(business.timezone)
+    today = business.get_local_today()
+    
+    try:
+        date_from = today - timedelta(days=30)
+        date_to = today
+        if request.GET.get('desde'):
+            date_from = datetime.strptime(request.GET['desde'], '%Y-%m-%d').date()
+        if request.GET.get('hasta'):
+            date_to = datetime.strptime(request.GET['hasta'], '%Y-%m-%d').date()
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Fecha inválida, usa YYYY-MM-DD.'}, status=400)
+    if date_from > date_to:
+        return JsonResponse({'success': False, 'error': 'La fecha inicial es posterior a la final.'}, status=400)
+    
+    export_format = request.GET.get('formato', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'success': False, 'error': 'Formato inválido (csv o jsonl).'}, status=400)
+    
+    start, _ = local_day_range(date_from, business_tz)
+    _, end = local_day_range(date_to, business_tz)
+    rows = business_export_rows(
+        business, start, end, include_archived=request.GET.get('archivadas', '1') != '0',
+    )
+    return export_response(
+        rows,
+        filename=f'citas-{business.slug}-{date_from.isoformat()}-{date_to.isoformat()}',
+        export_format=export_format,
+        compress=request.GET.get('gzip') == '1',
+        tz=business_tz,
+    )
+
+
+@login_required
+@owner_required(json_response=True)
 def update_business_field_api(request, business_slug):
     """
     API endpoint para actualizar campos individuales del negocio.
@@ -770,11 +822,7 @@ def update_business_field_api(request, business_slug):
     if request.method != 'POST':
         return JsonResponse({'success': False, 'error': 'Método no permitido'}, status=405)
     
-    business = get_object_or_404(Business, slug=business_slug, is_active=True)
-    
-    # Verificar que el usuario sea el dueño del negocio
-    if business.owner != request.user:
-        return JsonResponse({'success': False, 'error': 'No autorizado'}, status=403)
+    business = request.business
     
     try:
         data = json.loads(request.body)
@@ -820,7 +868,8 @@ def update_business_field_api(request, business_slug):
             # Para otros campos, asignar directamente
             setattr(business, field_name, field_value or '')
         
-        business.save()
+        # Guardar solo el campo editado (la instancia cacheada puede estar desactualizada en otros campos)
+        business.save(update_fields=[field_name, 'updated_at'])
         
         return JsonResponse({
             'success': True,
@@ -834,6 +883,7 @@ def update_business_field_api(request, business_slug):
 
 
 @login_required
+@owner_required(json_response=True)
 def upload_gallery_image(request, business_slug):
     """
     Vista para subir imágenes a la galería del negocio.
@@ -841,11 +891,7 @@ def upload_gallery_image(request, business_slug):
     if request.method != 'POST':
         return JsonResponse({'success': False, 'error': 'Método no permitido'}, status=405)
     
-    business = get_object_or_404(Business, slug=business_slug, is_active=True)
-    
-    # Verificar que el usuario sea el dueño del negocio
-    if business.owner != request.user:
-        return JsonResponse({'success': False, 'error': 'No autorizado'}, status=403)
+    business = request.business
     
     try:
         if 'image' not in request.FILES:
@@ -870,6 +916,7 @@ def upload_gallery_image(request, business_slug):
             'message': 'Imagen subida exitosamente',
             'image_id': gallery_image.id,
             'image_url': gallery_image.image.url,
+            'processing_status': gallery_image.processing_status,
             'caption': gallery_image.caption or ''
         })
         
@@ -878,6 +925,7 @@ def upload_gallery_image(request, business_slug):
 
 
 @login_required
+@owner_required(json_response=True)
 def delete_gallery_image(request, business_slug, image_id):
     """
     Vista para eliminar una imagen de la galería.
@@ -885,11 +933,7 @@ def delete_gallery_image(request, business_slug, image_id):
     if request.method != 'POST':
         return JsonResponse({'success': False, 'error': 'Método no permitido'}, status=405)
     
-    business = get_object_or_404(Business, slug=business_slug, is_active=True)
-    
-    # Verificar que el usuario sea el dueño del negocio
-    if business.owner != request.user:
-        return JsonResponse({'success': False, 'error': 'No autorizado'}, status=403)
+    business = request.business
     
     try:
         gallery_image = get_object_or_404(GalleryImage, id=image_id, business=business)
@@ -904,16 +948,67 @@ def delete_gallery_image(request, business_slug, image_id):
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
 
+async def _slots_payload(business, service, date_obj):
+    """Respuesta detallada: un objeto por slot disponible."""
+    grid, = await AvailabilityService.aget_slot_grids(business, service, [date_obj])
+    
+    # Formatear slots para el frontend
+    slots_formatted = [
+        {
+            'datetime': slot.strftime('%Y-%m-%d %H:%M:%S'),
+            'time': slot.strftime('%H:%M'),
+        }
+        for slot in grid.slots()
+    ]
+    return {
+        'success': True,
+        'slots': slots_formatted,
+        'service_duration': service.duration_minutes
+    }
+
+
+async def _compact_slots_payload(business, service, dates):
+    """Respuesta compacta: por día, primer slot, paso y rangos libres."""
+    grids = await AvailabilityService.aget_slot_grids(business, service, dates)
+    return {
+        'success': True,
+        'format': 'compact',
+        'days': [{'date': date.isoformat(), **grid.as_compact()} for date, grid in zip(dates, grids)],
+        'service_duration': service.duration_minutes,
+    }
+
+
+def _compact_dates(first_date, days):
+    """Fechas consecutivas pedidas con days=N, o None si N no es válido."""
+    try:
+        days = int(days)
+    except (TypeError, ValueError):
+        return None
+    if not 1 <= days <= MAX_COMPACT_DAYS:
+        return None
+    return [first_date + timedelta(days=i) for i in range(days)]
+
+
+# Las vistas públicas de disponibilidad y catálogo son async: bajo ASGI
+# (saasBarber/asgi.py) esperan la caché y la base de datos sin ocupar un hilo
+# por petición. Bajo WSGI Django las ejecuta con async_to_sync.
+
 @csrf_exempt
-def get_available_slots_api(request, business_slug):
+@business_required
+async def get_available_slots_api(request, business_slug):
     """
     API endpoint para obtener slots disponibles para un servicio y fecha.
+
+    Con "format": "compact" (en el cuerpo o en la query string) responde por
+    día el primer slot, el paso y los rangos libres [primer_slot, cantidad] en
+    lugar de un objeto por slot, y acepta "days" (1 a 14) para pedir varios
+    días consecutivos en una sola petición.
     """
     if request.method != 'POST':
         return JsonResponse({'error': 'Método no permitido'}, status=405)
     
     try:
-        business = get_object_or_404(Business, slug=business_slug, is_active=True)
+        business = request.business
         data = json.loads(request.body)
         
         service_id = data.get('service_id')
@@ -922,26 +1017,16 @@ def get_available_slots_api(request, business_slug):
         if not service_id or not date_str:
             return JsonResponse({'error': 'service_id y date son requeridos'}, status=400)
         
-        service = Service.objects.get(id=service_id, business=business, is_active=True)
+        service = await Service.objects.aget(id=service_id, business=business, is_active=True)
         date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
         
-        # Obtener slots disponibles usando el servicio
-        available_slots = AvailabilityService.get_available_slots(business, service, date_obj)
+        if (data.get('format') or request.GET.get('format')) == 'compact':
+            dates = _compact_dates(date_obj, data.get('days', 1))
+            if dates is None:
+                return JsonResponse({'error': f'days debe estar entre 1 y {MAX_COMPACT_DAYS}'}, status=400)
+            return JsonResponse(await _compact_slots_payload(business, service, dates))
         
-        # Formatear slots para el frontend
-        slots_formatted = [
-            {
-                'datetime': slot.strftime('%Y-%m-%d %H:%M:%S'),
-                'time': slot.strftime('%H:%M'),
-            }
-            for slot in available_slots
-        ]
-        
-        return JsonResponse({
-            'success': True,
-            'slots': slots_formatted,
-            'service_duration': service.duration_minutes
-        })
+        return JsonResponse(await _slots_payload(business, service, date_obj))
         
     except Service.DoesNotExist:
         return JsonResponse({'error': 'Servicio no encontrado'}, status=404)
@@ -949,3 +1034,97 @@ def get_available_slots_api(request, business_slug):
         return JsonResponse({'error': f'Error en formato de fecha: {str(e)}'}, status=400)
     except Exception as e:
         return JsonResponse({'error': f'Error al obtener slots: {str(e)}'}, status=500)
+
+
+@require_http_methods(["GET", "HEAD"])
+@business_required
+async def available_slots_view(request, business_slug, service_id, date):
+    """
+    Versión GET y cacheable de get_available_slots_api:
+    /<slug>/api/slots/<service_id>/<YYYY-MM-DD>/[?format=compact&days=N]
+
+    La URL identifica la respuesta, así que el navegador y los proxies pueden
+    cachearla; el ETag cambia cuando cambian las citas de esos días o el
+    horario/servicios del negocio (ver caching.aavailability_etag).
+    """
+    business = request.business
+    try:
+        date_obj = datetime.strptime(date, '%Y-%m-%d').date()
+    except ValueError:
+        return JsonResponse({'error': 'Fecha inválida, usa YYYY-MM-DD'}, status=400)
+    
+    compact = request.GET.get('format') == 'compact'
+    if compact:
+        dates = _compact_dates(date_obj, request.GET.get('days', 1))
+        if dates is None:
+            return JsonResponse({'error': f'days debe estar entre 1 y {MAX_COMPACT_DAYS}'}, status=400)
+    else:
+        dates = [date_obj]
+    
+    async def build():
+        service = await Service.objects.aget(id=service_id, business=business, is_active=True)
+        if compact:
+            return await _compact_slots_payload(business, service, dates)
+        return await _slots_payload(business, service, date_obj)
+    
+    etag = await aavailability_etag(business, service_id, dates, variant='compact' if compact else 'slots')
+    try:
+        return await acached_public_json(
+            request, f'slots:{etag}', etag,
+            settings.SLOTS_CACHE_MAX_AGE, settings.SLOTS_CACHE_TIMEOUT, build,
+        )
+    except Service.DoesNotExist:
+        return JsonResponse({'error': 'Servicio no encontrado'}, status=404)
+
+
+@require_http_methods(["GET", "HEAD"])
+@business_required
+async def service_catalog_api(request, business_slug):
+    """
+    Catálogo público de servicios activos del negocio, cacheado por versión
+    de contenido (cambia al editar servicios o datos del negocio).
+    """
+    business = request.business
+    
+    async def build():
+        services = Service.objects.filter(business=business, is_active=True).order_by('name')
+        return {
+            'success': True,
+            'business': business.slug,
+            'services': [
+                {
+                    'id': service.id,
+                    'name': service.name,
+                    'description': service.description or '',
+                    'duration_minutes': service.duration_minutes,
+                    'price': str(service.price),
+                }
+                async for service in services
+            ],
+        }
+    
+    etag = await acatalog_etag(business)
+    return await acached_public_json(
+        request, f'catalog:{etag}', etag,
+        settings.CATALOG_CACHE_MAX_AGE, settings.CATALOG_CACHE_TIMEOUT, build,
+    )
+
+
+@require_http_methods(["GET"])
+def metrics_view(request):
+    """
+    Métricas de la aplicación en formato de texto de Prometheus.
+
+    Requiere el header `Authorization: Bearer <METRICS_TOKEN>` o un usuario
+    staff; sin autenticación solo con DEBUG o METRICS_PUBLIC=True.
+    """
+    token = settings.METRICS_TOKEN
+    allowed = (
+        settings.DEBUG
+        or settings.METRICS_PUBLIC
+        or (token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'))
+        or request.user.is_staff
+    )
+    if not allowed:
+        return HttpResponse('No autorizado', status=401)
+    return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
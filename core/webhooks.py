@@ -0,0 +1,255 @@
+"""
+Webhooks salientes para eventos de citas.
+
+Los eventos se encolan en la tabla WebhookEvent después del commit de la
+transacción y un worker (`python manage.py deliver_webhooks`) los entrega en
+lotes por endpoint, firmados con HMAC-SHA256 y con reintentos exponenciales.
+Los eventos que agotan sus reintentos pasan a WebhookDeadLetter.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from .models import Appointment, WebhookEndpoint, WebhookEvent, WebhookDeadLetter
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = 'X-SaasBarber-Signature'
+TIMESTAMP_HEADER = 'X-SaasBarber-Timestamp'
+
+# Estado de la cita -> tipo de evento emitido al cambiar a ese estado
+STATUS_EVENTS = {
+    'confirmed': 'appointment.confirmed',
+    'completed': 'appointment.completed',
+    'cancelled': 'appointment.cancelled',
+    'no_show': 'appointment.no_show',
+}
+
+
+def build_appointment_payload(appointment):
+    """
+    Construye el contenido del evento a partir de la cita.
+    Solo usa datos ya cargados en memoria para no agregar consultas a la petición.
+    """
+    payload = {
+        'id': appointment.id,
+        'business_id': appointment.business_id,
+        'client_id': appointment.client_id,
+        'service_id': appointment.service_id,
+        'start_time': appointment.start_time.isoformat(),
+        'end_time': appointment.end_time.isoformat() if appointment.end_time else None,
+        'status': appointment.status,
+        'notes': appointment.notes or '',
+    }
+    if Appointment.service.is_cached(appointment) and appointment.service:
+        payload['service_name'] = appointment.service.name
+        payload['service_price'] = str(appointment.service.price)
+    if Appointment.business.is_cached(appointment):
+        payload['business_slug'] = appointment.business.slug
+    return payload
+
+
+def emit_appointment_event(appointment, event_type):
+    """
+    Encola un evento para todos los endpoints suscritos del negocio.
+    El encolado ocurre después del commit y nunca propaga errores a la vista.
+    """
+    business_id = appointment.business_id
+    payload = build_appointment_payload(appointment)
+    transaction.on_commit(lambda: enqueue_event(business_id, event_type, payload))
+
+
+def emit_appointment_events(business_id, events):
+    """
+    Encola varios eventos (lista de (event_type, payload)) de un mismo negocio
+    con una sola consulta de endpoints. Usado por operaciones en lote.
+    """
+    events = list(events)
+    if events:
+        transaction.on_commit(lambda: _enqueue_many(business_id, events))
+
+
+def enqueue_event(business_id, event_type, payload):
+    """Crea los WebhookEvent para los endpoints activos suscritos al evento."""
+    _enqueue_many(business_id, [(event_type, payload)])
+
+
+def _enqueue_many(business_id, events):
+    try:
+        endpoints = list(
+            WebhookEndpoint.objects.filter(business_id=business_id, is_active=True).only('id', 'events')
+        )
+        if not endpoints:
+            return 0
+
+        rows = [
+            WebhookEvent(endpoint=endpoint, event_type=event_type, payload=payload)
+            for event_type, payload in events
+            for endpoint in endpoints
+            if endpoint.is_subscribed(event_type)
+        ]
+        WebhookEvent.objects.bulk_create(rows)
+        return len(rows)
+    except Exception as e:
+        logger.error(f"Error al encolar webhooks del negocio {business_id}: {str(e)}")
+        return 0
+
+
+def sign_payload(secret, timestamp, body):
+    """Calcula la firma HMAC-SHA256 de `timestamp.body` con el secreto del endpoint."""
+    message = f"{timestamp}.".encode() + body
+    return 'sha256=' + hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret, timestamp, body, signature):
+    """Verifica la firma recibida por un receptor de webhooks."""
+    return hmac.compare_digest(sign_payload(secret, timestamp, body), signature or '')
+
+
+def get_backoff(attempts):
+    """Segundos de espera antes del siguiente intento (exponencial con tope)."""
+    base = settings.WEBHOOK_BACKOFF_SECONDS
+    return min(base * (2 ** max(attempts - 1, 0)), settings.WEBHOOK_BACKOFF_MAX_SECONDS)
+
+
+def _claim_due_events(limit, now):
+    """
+    Reserva los eventos vencidos moviendo su próximo intento hacia adelante,
+    para que otro worker concurrente no los entregue dos veces.
+    """
+    lease_until = now + timedelta(seconds=settings.WEBHOOK_TIMEOUT * 2 + 5)
+    with transaction.atomic():
+        ids = list(
+            WebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('id')
+            .values_list('id', flat=True)[:limit]
+        )
+        if ids:
+            WebhookEvent.objects.filter(id__in=ids).update(next_attempt_at=lease_until)
+    return list(WebhookEvent.objects.filter(id__in=ids).select_related('endpoint').order_by('id'))
+
+
+def _post_batch(endpoint, events):
+    """Envía un lote al endpoint. Retorna None si fue exitoso o el mensaje de error."""
+    body = json.dumps({
+        'events': [
+            {
+                'id': event.id,
+                'type': event.event_type,
+                'created_at': event.created_at,
+                'data': event.payload,
+            }
+            for event in events
+        ]
+    }, cls=DjangoJSONEncoder).encode()
+    timestamp = str(int(time.time()))
+    request = urllib.request.Request(
+        endpoint.url,
+        data=body,
+        method='POST',
+        headers={
+            'Content-Type': 'application/json',
+            'User-Agent': 'SaasBarber-Webhooks/1.0',
+            SIGNATURE_HEADER: sign_payload(endpoint.secret, timestamp, body),
+            TIMESTAMP_HEADER: timestamp,
+        },
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=settings.WEBHOOK_TIMEOUT) as response:
+            if 200 <= response.status < 300:
+                return None
+            return f"HTTP {response.status}"
+    except urllib.error.HTTPError as e:
+        return f"HTTP {e.code}"
+    except Exception as e:
+        return str(e) or e.__class__.__name__
+
+
+def _record_failure(events, error, now):
+    """Programa el reintento de un lote fallido o lo mueve a la tabla de fallidos."""
+    retry, dead = [], []
+    for event in events:
+        event.attempts += 1
+        event.last_error = error[:1000]
+        if event.attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+            dead.append(event)
+        else:
+            event.next_attempt_at = now + timedelta(seconds=get_backoff(event.attempts))
+            retry.append(event)
+
+    with transaction.atomic():
+        if retry:
+            WebhookEvent.objects.bulk_update(retry, ['attempts', 'last_error', 'next_attempt_at'])
+        if dead:
+            WebhookDeadLetter.objects.bulk_create([
+                WebhookDeadLetter(
+                    endpoint_id=event.endpoint_id,
+                    event_type=event.event_type,
+                    payload=event.payload,
+                    attempts=event.attempts,
+                    last_error=event.last_error,
+                    event_created_at=event.created_at,
+                )
+                for event in dead
+            ])
+            WebhookEvent.objects.filter(id__in=[event.id for event in dead]).delete()
+    return len(dead)
+
+
+def deliver_pending_events(limit=500, batch_size=None):
+    """
+    Entrega los eventos vencidos agrupados por endpoint.
+
+    Returns:
+        dict: Conteo de eventos entregados, reintentados y enviados a fallidos
+    """
+    batch_size = batch_size or settings.WEBHOOK_BATCH_SIZE
+    now = timezone.now()
+    stats = {'delivered': 0, 'retried': 0, 'dead': 0}
+
+    events_by_endpoint = defaultdict(list)
+    for event in _claim_due_events(limit, now):
+        events_by_endpoint[event.endpoint].append(event)
+
+    for endpoint, events in events_by_endpoint.items():
+        for i in range(0, len(events), batch_size):
+            batch = events[i:i + batch_size]
+            if not endpoint.is_active:
+                error = 'Endpoint desactivado'
+            else:
+                error = _post_batch(endpoint, batch)
+
+            if error is None:
+                WebhookEvent.objects.filter(id__in=[event.id for event in batch]).update(
+                    status='delivered', delivered_at=timezone.now(), last_error=''
+                )
+                stats['delivered'] += len(batch)
+            else:
+                logger.warning(f"Fallo al entregar {len(batch)} eventos a {endpoint.url}: {error}")
+                dead = _record_failure(batch, error, timezone.now())
+                stats['dead'] += dead
+                stats['retried'] += len(batch) - dead
+
+    return stats
+
+
+def requeue_dead_letters(dead_letters):
+    """Vuelve a encolar eventos fallidos (acción del admin)."""
+    dead_letters = list(dead_letters)
+    with transaction.atomic():
+        WebhookEvent.objects.bulk_create([
+            WebhookEvent(endpoint_id=dl.endpoint_id, event_type=dl.event_type, payload=dl.payload)
+            for dl in dead_letters
+        ])
+        WebhookDeadLetter.objects.filter(id__in=[dl.id for dl in dead_letters]).delete()
+    return len(dead_letters)
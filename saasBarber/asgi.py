@@ -3,6 +3,13 @@ ASGI config for saasBarber project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Las vistas públicas de disponibilidad y catálogo (core.views.get_available_slots_api,
+available_slots_view y service_catalog_api) son async: bajo un servidor ASGI,
+por ejemplo ``uvicorn saasBarber.asgi:application``, esperan la caché y el ORM
+sin ocupar un hilo por petición. El resto de las vistas son síncronas y Django
+las ejecuta en un hilo. ``python manage.py benchmark_asgi`` compara el
+throughput de ambos modos.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 """
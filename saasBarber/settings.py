@@ -21,6 +21,10 @@ DEBUG = config('DEBUG', default=True, cast=bool)
 
 ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost,127.0.0.1', cast=lambda v: [s.strip() for s in v.split(',')])
 
+# SECURITY WARNING: /metrics/ expone latencias y rutas internas. Sin DEBUG solo
+# responde a usuarios staff o con `Authorization: Bearer <METRICS_TOKEN>`;
+# define METRICS_TOKEN para el scraper de Prometheus (ver Métricas más abajo).
+
 
 # Application definition
 
@@ -36,11 +40,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryInstrumentationMiddleware',  # SQL/tiempos por petición (REQUEST_INSTRUMENTATION)
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.TenantMiddleware',  # Resuelve request.business desde el slug
+    'core.middleware.ProfilingMiddleware',  # ?_profile=1 para usuarios staff
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'core.middleware.OwnerRedirectMiddleware',  # Redirige owners a su dashboard
@@ -70,24 +77,78 @@ WSGI_APPLICATION = 'saasBarber.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-DATABASES = {
+# Motor configurable por entorno: DB_ENGINE=sqlite (por defecto) o DB_ENGINE=postgresql
+DB_ENGINE = config('DB_ENGINE', default='sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME', default='saasbarber'),
+            'USER': config('DB_USER', default='postgres'),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default='5432'),
+            # Conexiones persistentes: se reutilizan entre peticiones
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=600, cast=int),
+            # Verifica la conexión reutilizada antes de usarla (reconecta si se cayó)
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+            },
+            'TEST': {
+                'NAME': config('DB_TEST_NAME', default='test_saasbarber'),
+            },
+        }
+    }
+    INSTALLED_APPS.append('django.contrib.postgres')
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('DB_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=0, cast=int),
+        }
+    }
+
+# Modo de alta concurrencia para SQLite (core/db.py): WAL, synchronous=NORMAL,
+# busy_timeout, mmap y BEGIN IMMEDIATE en las escrituras de reservas.
+SQLITE_TUNING = config('SQLITE_TUNING', default=False, cast=bool)
+SQLITE_BUSY_TIMEOUT_MS = config('SQLITE_BUSY_TIMEOUT_MS', default=10000, cast=int)
+SQLITE_MMAP_SIZE = config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int)
+SQLITE_CACHE_SIZE_KB = config('SQLITE_CACHE_SIZE_KB', default=64 * 1024, cast=int)
+
+if SQLITE_TUNING and DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default']['ENGINE'] = 'core.backends.sqlite3'
+    DATABASES['default']['OPTIONS'] = {'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000}
+
+
+# Caché compartida (locmem por defecto; en producción usar Redis o Memcached)
+# Ejemplo: CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+#          CACHE_LOCATION=redis://127.0.0.1:6379/1
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='saasbarber'),
     }
 }
 
-# Para PostgreSQL en producción, descomentar y configurar:
-# DATABASES = {
-#     'default': {
-#         'ENGINE': 'django.db.backends.postgresql',
-#         'NAME': config('DB_NAME', default='saasbarber'),
-#         'USER': config('DB_USER', default='postgres'),
-#         'PASSWORD': config('DB_PASSWORD', default=''),
-#         'HOST': config('DB_HOST', default='localhost'),
-#         'PORT': config('DB_PORT', default='5432'),
-#     }
-# }
+# Resolución de negocio por slug (core/tenancy.py)
+TENANT_CACHE_TIMEOUT = config('TENANT_CACHE_TIMEOUT', default=300, cast=int)
+TENANT_CACHE_LOCAL_TTL = config('TENANT_CACHE_LOCAL_TTL', default=10, cast=int)
+TENANT_CACHE_LOCAL_SIZE = config('TENANT_CACHE_LOCAL_SIZE', default=1024, cast=int)
+
+# Caché de la landing page pública por negocio (core/caching.py)
+PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=600, cast=int)
+PAGE_CACHE_MAX_AGE = config('PAGE_CACHE_MAX_AGE', default=60, cast=int)
+PAGE_CACHE_SHARED_MAX_AGE = config('PAGE_CACHE_SHARED_MAX_AGE', default=300, cast=int)
+
+# Caché HTTP de los JSON públicos: disponibilidad (GET) y catálogo de servicios
+SLOTS_CACHE_TIMEOUT = config('SLOTS_CACHE_TIMEOUT', default=300, cast=int)
+SLOTS_CACHE_MAX_AGE = config('SLOTS_CACHE_MAX_AGE', default=15, cast=int)
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=3600, cast=int)
+CATALOG_CACHE_MAX_AGE = config('CATALOG_CACHE_MAX_AGE', default=300, cast=int)
+PUBLIC_API_STALE_WHILE_REVALIDATE = config('PUBLIC_API_STALE_WHILE_REVALIDATE', default=60, cast=int)
 
 
 # Password validation
@@ -152,4 +213,67 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    # La versión sale del namespace de la URL (/api/v1/ -> 'v1')
+    'DEFAULT_VERSIONING_CLASS': 'rest_framework.versioning.NamespaceVersioning',
+    'ALLOWED_VERSIONS': ['v1'],
+    # ?format= lo usan los endpoints (format=compact); el renderer se elige
+    # con el header Accept o con el sufijo .json
+    'URL_FORMAT_OVERRIDE': None,
+}
+
+# Webhooks salientes (ver core/webhooks.py)
+WEBHOOK_BATCH_SIZE = config('WEBHOOK_BATCH_SIZE', default=50, cast=int)
+WEBHOOK_TIMEOUT = config('WEBHOOK_TIMEOUT', default=5, cast=int)
+WEBHOOK_MAX_ATTEMPTS = config('WEBHOOK_MAX_ATTEMPTS', default=8, cast=int)
+WEBHOOK_BACKOFF_SECONDS = config('WEBHOOK_BACKOFF_SECONDS', default=30, cast=int)
+WEBHOOK_BACKOFF_MAX_SECONDS = config('WEBHOOK_BACKOFF_MAX_SECONDS', default=3600, cast=int)
+
+# Tareas en segundo plano (core/tasks.py): 'thread', 'sync' o 'worker'
+BACKGROUND_TASKS_MODE = config('BACKGROUND_TASKS_MODE', default='thread')
+BACKGROUND_TASKS_WORKERS = config('BACKGROUND_TASKS_WORKERS', default=2, cast=int)
+
+# Archivo de citas antiguas (core/archive.py, comando archive_appointments)
+APPOINTMENT_ARCHIVE_AFTER_DAYS = config('APPOINTMENT_ARCHIVE_AFTER_DAYS', default=365, cast=int)
+APPOINTMENT_ARCHIVE_BATCH_SIZE = config('APPOINTMENT_ARCHIVE_BATCH_SIZE', default=500, cast=int)
+
+# Exportación de citas en streaming (core/exports.py): filas leídas por consulta
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Instrumentación por petición (core.middleware.QueryInstrumentationMiddleware):
+# header Server-Timing + línea JSON en el logger core.instrumentation
+REQUEST_INSTRUMENTATION = config('REQUEST_INSTRUMENTATION', default=False, cast=bool)
+REQUEST_SLOW_THRESHOLD_MS = config('REQUEST_SLOW_THRESHOLD_MS', default=500, cast=int)
+REQUEST_INSTRUMENTATION_TOP_QUERIES = config('REQUEST_INSTRUMENTATION_TOP_QUERIES', default=5, cast=int)
+
+# Métricas Prometheus (core/metrics.py, endpoint /metrics/). Con varios workers
+# define METRICS_DIR (directorio compartido) para sumar todos los procesos.
+METRICS_DIR = config('METRICS_DIR', default='')
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5, cast=float)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+# Solo si el endpoint no es alcanzable desde fuera (red interna): sin autenticación
+METRICS_PUBLIC = config('METRICS_PUBLIC', default=False, cast=bool)
+
+# Perfilado bajo demanda para staff (core/profiling.py)
+REQUEST_PROFILING = config('REQUEST_PROFILING', default=True, cast=bool)
+PROFILING_SAMPLE_INTERVAL_MS = config('PROFILING_SAMPLE_INTERVAL_MS', default=2, cast=float)
+PROFILING_MAX_PROFILES = config('PROFILING_MAX_PROFILES', default=200, cast=int)
+# Los volcados van fuera de MEDIA_ROOT (no se sirven como /media/): solo se
+# descargan desde el admin, con sesión de staff
+PROFILING_STORAGE_DIR = config('PROFILING_STORAGE_DIR', default=str(BASE_DIR / 'private' / 'profiles'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core.instrumentation': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
 }
@@ -5,9 +5,12 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from core.views import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics/', metrics_view, name='metrics'),  # Antes de core.urls: '<slug>/' lo capturaría
+    path('api/v1/', include(('core.api.urls', 'api'), namespace='v1')),
     path('', include('core.urls')),
 ]
 